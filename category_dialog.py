@@ -3,17 +3,25 @@
 用于添加、编辑、删除游戏分类
 """
 
+import uuid
 import tkinter as tk
 from tkinter import ttk, messagebox, colorchooser
 from typing import Dict, List, Optional, Callable
+from category_index import CategoryIndex, UNCATEGORIZED
+from game_library import LibrarySnapshot, LibraryTransaction
+from virtual_list import VirtualList
 
 
 class CategoryDialog:
-    def __init__(self, parent: tk.Tk, categories: List[Dict], games: List[Dict],
-                 on_save: Callable[[List[Dict], List[Dict]], None]):
+    def __init__(self, parent: tk.Tk, categories: List[Dict], library: LibrarySnapshot,
+                 on_save: Callable[[List[Dict], LibraryTransaction], None]):
         self.parent = parent
-        self.categories = categories
-        self.games = games
+        # 分类列表很小，直接使用副本；游戏的修改暂存在事务中，取消时不影响游戏库
+        self.categories = [dict(cat) for cat in categories]
+        self.game_ids = library.ids()
+        self.transaction = library.transaction()
+        # 分类成员索引：计数、移动、重命名和删除都只处理涉及的游戏
+        self.category_index = CategoryIndex(self.transaction, self.categories)
         self.on_save = on_save
         
         self.dialog = tk.Toplevel(parent)
@@ -29,8 +37,9 @@ class CategoryDialog:
         y = parent.winfo_y() + (parent.winfo_height() - 650) // 2
         self.dialog.geometry(f"+{x}+{y}")
         
-        self.selected_category = None
-        self.selected_games = set()  # 存储选中的游戏名称
+        self.selected_category_id = None  # 选中分类的ID
+        self.selected_games = set()  # 存储选中的游戏ID
+        self._select_anchor = None  # 上一次点击的游戏ID，Shift+点击时作为范围的起点
         self.create_widgets()
         
     def create_widgets(self):
@@ -195,10 +204,11 @@ class CategoryDialog:
 
         # 游戏列表
         game_columns = ('check', 'name', 'platform', 'current_category')
-        self.game_tree = ttk.Treeview(
+        # 虚拟列表只为可见的行创建条目，切换勾选时只刷新可见行
+        self.game_tree = VirtualList(
             right_frame,
-            columns=game_columns,
-            show='headings',
+            game_columns,
+            self.game_row_values,
             selectmode='none'
         )
 
@@ -212,27 +222,20 @@ class CategoryDialog:
         self.game_tree.column('platform', width=70)
         self.game_tree.column('current_category', width=100)
 
-        game_scrollbar = ttk.Scrollbar(right_frame, orient=tk.VERTICAL,
-                                       command=self.game_tree.yview)
-        self.game_tree.configure(yscrollcommand=game_scrollbar.set)
-
-        self.game_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        game_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)        
+        self.game_tree.pack(fill=tk.BOTH, expand=True)
+        # 默认选中"全部"分类
+        for cat in self.categories:
+            if cat['name'] == '全部':
+                self.selected_category_id = cat['id']
+                break
+        
         # 加载数据
         self.load_categories()
         self.load_games()
         
-        # 绑定点击事件
+        # 绑定点击事件（Shift+点击同样由 on_game_click 处理）
         self.category_tree.bind('<Button-1>', self.on_category_click)
-        self.game_tree.bind('<Button-1>', self.on_game_click)
-        
-        # 默认选中"全部"分类
-        for item in self.category_tree.get_children():
-            values = self.category_tree.item(item)['values']
-            if values[1] == '全部':
-                self.selected_category = '全部'
-                self.load_categories()
-                break
+        self.game_tree.tree.bind('<Button-1>', self.on_game_click)
         
         # 底部按钮
         button_frame = tk.Frame(self.dialog, bg="#f8f9fa")
@@ -267,46 +270,50 @@ class CategoryDialog:
         ).pack(side=tk.RIGHT)
         
     def load_categories(self):
-        """加载分类到列表"""
+        """加载分类到列表（行的iid就是分类ID）"""
         for item in self.category_tree.get_children():
             self.category_tree.delete(item)
         
         for cat in self.categories:
-            # 计算每个分类的游戏数量
-            count = 0
-            if cat['name'] == '全部':
-                count = len(self.games)
-            else:
-                count = sum(1 for game in self.games if game.get('category', '未分类') == cat['name'])
-            
-            color_preview = self.create_color_preview(cat['color'])
-            # 单选框状态
-            radio = '●' if self.selected_category == cat['name'] else '○'
-            
-            self.category_tree.insert('', tk.END, values=(
-                radio,
-                cat['name'],
-                color_preview,
-                count
-            ))
+            self.category_tree.insert('', tk.END, iid=cat['id'], values=self.category_row_values(cat))
+    
+    def category_row_values(self, cat: Dict) -> tuple:
+        """分类列表中一行显示的内容"""
+        # 每个分类的游戏数量直接从索引中读取
+        if cat['name'] == '全部':
+            count = len(self.game_ids)
+        else:
+            count = self.category_index.count(cat['id'])
+        
+        color_preview = self.create_color_preview(cat['color'])
+        # 单选框状态
+        radio = '●' if self.selected_category_id == cat['id'] else '○'
+        return (radio, cat['name'], color_preview, count)
+    
+    def update_category_rows(self, category_ids=None):
+        """只更新指定分类的行（None 表示更新所有行的内容，不重建列表）"""
+        for cat in self.categories:
+            if category_ids is None or cat['id'] in category_ids:
+                self.category_tree.item(cat['id'], values=self.category_row_values(cat))
+    
+    def get_selected_category(self) -> Optional[Dict]:
+        """选中的分类"""
+        for cat in self.categories:
+            if cat['id'] == self.selected_category_id:
+                return cat
+        return None
     
     def load_games(self):
         """加载所有游戏到列表"""
-        for item in self.game_tree.get_children():
-            self.game_tree.delete(item)
-        
-        for game in self.games:
-            # 始终显示所有游戏
-            display_category = game.get('category', '未分类')
-            # 复选框状态
-            check = '☑' if game['name'] in self.selected_games else '☐'
-            
-            self.game_tree.insert('', tk.END, values=(
-                check,
-                game['name'],
-                game['platform'],
-                display_category
-            ))
+        # 始终显示所有游戏
+        self.game_tree.set_items(self.game_ids)
+    
+    def game_row_values(self, game_id: str) -> tuple:
+        """游戏列表中一行显示的内容"""
+        game = self.transaction.get(game_id)
+        # 复选框状态
+        check = '☑' if game_id in self.selected_games else '☐'
+        return (check, game['name'], game['platform'], game.get('category', UNCATEGORIZED))
     
     def on_category_click(self, event):
         """分类点击事件"""
@@ -315,41 +322,54 @@ class CategoryDialog:
         if region == 'cell':
             # 获取点击的项
             item = self.category_tree.identify_row(event.y)
-            if item:
-                # 获取点击的列
-                column = self.category_tree.identify_column(event.x)
-                # 获取分类名称（第二列）
-                values = self.category_tree.item(item)['values']
-                category_name = values[1]
-                
-                # 更新选中的分类
-                self.selected_category = category_name
-                self.load_categories()
+            if item and item != self.selected_category_id:
+                # 更新选中的分类，只需要更新原来选中和新选中的两行
+                previous = self.selected_category_id
+                self.selected_category_id = item
+                self.update_category_rows({previous, item})
     
     def on_game_click(self, event):
         """游戏点击事件"""
         # 获取点击的位置
-        region = self.game_tree.identify('region', event.x, event.y)
+        region = self.game_tree.identify_region(event.x, event.y)
         if region == 'cell':
             # 获取点击的项
-            item = self.game_tree.identify_row(event.y)
-            if item:
+            game_id = self.game_tree.item_at(event.y)
+            if game_id:
                 # 获取点击的列
                 column = self.game_tree.identify_column(event.x)
                 # 只有点击第一列（复选框列）时才切换状态
                 if column == '#1':
-                    # 获取游戏名称（第二列）
-                    values = self.game_tree.item(item)['values']
-                    game_name = values[1]
+                    if event.state & 0x0001 and self._select_anchor is not None:
+                        # Shift+点击：把上次点击的游戏到这次点击的游戏之间的所有游戏
+                        # 一次设为上次点击的游戏的选中状态
+                        self.select_range(self._select_anchor, game_id)
+                        return
                     
                     # 切换选中状态
-                    if game_name in self.selected_games:
-                        self.selected_games.remove(game_name)
+                    if game_id in self.selected_games:
+                        self.selected_games.remove(game_id)
                     else:
-                        self.selected_games.add(game_name)
+                        self.selected_games.add(game_id)
+                    self._select_anchor = game_id
                     
-                    # 重新加载游戏列表
-                    self.load_games()
+                    # 只更新这一行
+                    self.game_tree.refresh_items([game_id])
+    
+    def select_range(self, anchor: str, game_id: str):
+        """选中（或取消选中）anchor 到 game_id 之间的游戏，状态与 anchor 相同"""
+        start = self.game_tree.position(anchor)
+        end = self.game_tree.position(game_id)
+        if start is None or end is None:
+            return
+        if start > end:
+            start, end = end, start
+        game_ids = self.game_tree.items[start:end + 1]
+        if anchor in self.selected_games:
+            self.selected_games.update(game_ids)
+        else:
+            self.selected_games.difference_update(game_ids)
+        self.game_tree.refresh_items(game_ids)
     
     def create_color_preview(self, color: str) -> str:
         """创建颜色预览文本"""
@@ -361,23 +381,20 @@ class CategoryDialog:
     
     def edit_category(self):
         """编辑选中分类"""
-        if not self.selected_category:
+        category = self.get_selected_category()
+        if not category:
             messagebox.showwarning("提示", "请先选择一个分类！")
             return
-        
-        # 找到对应的分类
-        for cat in self.categories:
-            if cat['name'] == self.selected_category:
-                self.open_edit_dialog(cat)
-                break
+        self.open_edit_dialog(category)
     
     def delete_category(self):
         """删除选中分类"""
-        if not self.selected_category:
+        category = self.get_selected_category()
+        if not category:
             messagebox.showwarning("提示", "请先选择一个分类！")
             return
         
-        category_name = self.selected_category
+        category_name = category['name']
         
         # 不允许删除"全部"分类
         if category_name == '全部':
@@ -385,70 +402,57 @@ class CategoryDialog:
             return
         
         # 检查是否有游戏使用该分类
-        games_in_category = [g for g in self.games if g.get('category', '未分类') == category_name]
-        if games_in_category:
+        game_count = self.category_index.count(category['id'])
+        if game_count:
             if not messagebox.askyesno("确认删除", 
-                f"分类 '{category_name}' 中有 {len(games_in_category)} 个游戏。\n"
+                f"分类 '{category_name}' 中有 {game_count} 个游戏。\n"
                 f"删除后这些游戏将变为'未分类'。\n"
                 f"确定要删除吗？"):
                 return
-            # 将游戏分类改为"未分类"
-            for game in games_in_category:
-                game['category'] = '未分类'
         
         if messagebox.askyesno("确认删除", f"确定要删除分类 '{category_name}' 吗？"):
-            self.categories = [cat for cat in self.categories if cat['name'] != category_name]
-            self.load_categories()
+            # 将游戏分类改为"未分类"（只处理该分类中的游戏）
+            uncategorized = self.category_index.delete(category['id'])
+            self.categories = [cat for cat in self.categories if cat['id'] != category['id']]
+            self.selected_category_id = None
+            self.category_tree.delete(category['id'])
+            self.game_tree.refresh_items(uncategorized)
             messagebox.showinfo("成功", f"分类 '{category_name}' 已删除")
     
     def select_all_games(self):
         """全选游戏"""
-        self.selected_games = set(game['name'] for game in self.games)
-        self.load_games()
+        self.selected_games = set(self.game_ids)
+        self.game_tree.refresh()
     
     def deselect_all_games(self):
         """取消选择所有游戏"""
         self.selected_games.clear()
-        self.load_games()
+        self.game_tree.refresh()
     
     def move_games_to_category(self):
         """将选中的游戏移动到选中的分类"""
         # 检查是否选择了分类
-        if not self.selected_category or self.selected_category == '全部':
+        selected_category = self.get_selected_category()
+        if not selected_category or selected_category['name'] == '全部':
             messagebox.showwarning("提示", "请先在左侧选择一个目标分类！")
             return
-        
-        # 找到选中分类的ID
-        selected_category_id = None
-        selected_category_name = self.selected_category
-        for cat in self.categories:
-            if cat['name'] == selected_category_name:
-                selected_category_id = cat.get('id')
-                break
-        
-        if not selected_category_id:
-            messagebox.showwarning("提示", "分类ID不存在，请重新选择分类！")
-            return
+        selected_category_name = selected_category['name']
         
         # 检查是否选择了游戏
         if not self.selected_games:
             messagebox.showwarning("提示", "请先在右侧选择要移动的游戏！")
             return
         
-        # 更新游戏分类（使用category_id）
-        moved_count = 0
-        for game in self.games:
-            if game['name'] in self.selected_games:
-                old_category = game.get('category', '未分类')
-                game['category'] = selected_category_name  # 保留名称用于显示
-                game['category_id'] = selected_category_id  # 使用ID进行关联
-                moved_count += 1
-                print(f"移动游戏 '{game['name']}' 从 '{old_category}' 到 '{selected_category_name}'")
+        # 按集合一次移动所有选中的游戏（category_id 关联，category 保留名称用于显示）
+        moved = self.category_index.move(self.selected_games, selected_category)
+        moved_count = len(moved)
         
         if moved_count > 0:
+            print(f"移动 {moved_count} 个游戏到 '{selected_category_name}'")
             self.selected_games.clear()  # 清空选中状态
-            self.load_categories()
-            self.load_games()
+            # 各分类的数量都可能变化，更新分类行的内容；游戏列表只需刷新可见行
+            self.update_category_rows()
+            self.game_tree.refresh()
             messagebox.showinfo("成功", f"已将 {moved_count} 个游戏移动到 '{selected_category_name}' 分类")
         else:
             messagebox.showwarning("提示", "没有游戏被移动")
@@ -555,26 +559,25 @@ class CategoryDialog:
             
             if category:
                 # 编辑现有分类，保持ID不变
-                old_name = category['name']
                 category['name'] = name
                 category['color'] = color
-                # 同步更新所有相关游戏的category字段
-                for game in self.games:
-                    if game.get('category') == old_name or game.get('category_id') == category['id']:
-                        game['category'] = name
+                # 同步更新该分类中游戏的category字段
+                renamed = self.category_index.rename(category)
+                self.update_category_rows({category['id']})
+                self.game_tree.refresh_items(renamed)
                 messagebox.showinfo("成功", f"分类 '{name}' 已更新")
             else:
                 # 添加新分类，生成唯一ID
-                import uuid
-                self.categories.append({
+                new_category = {
                     'id': str(uuid.uuid4()),
                     'name': name,
                     'color': color
-                })
+                }
+                self.categories.append(new_category)
+                self.category_tree.insert('', tk.END, iid=new_category['id'],
+                                          values=self.category_row_values(new_category))
                 messagebox.showinfo("成功", f"分类 '{name}' 已添加")
             
-            self.load_categories()
-            self.load_games()
             dialog.destroy()
         
         tk.Button(
@@ -604,7 +607,7 @@ class CategoryDialog:
         ).pack(side=tk.LEFT)
     
     def save_categories(self):
-        """保存分类和游戏数据"""
-        self.on_save(self.categories, self.games)
+        """保存分类，并提交事务中暂存的游戏修改"""
+        self.on_save(self.categories, self.transaction)
         messagebox.showinfo("成功", "分类和游戏数据已保存！")
         self.dialog.destroy()
\ No newline at end of file
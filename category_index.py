@@ -0,0 +1,91 @@
+"""
+分类索引模块
+维护分类ID到游戏ID集合的索引和每个分类的游戏数，批量移动、重命名和删除分类都按集合运算完成
+"""
+
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set
+
+from game_library import LibraryTransaction
+
+# 不属于任何分类的游戏显示的分类名称
+UNCATEGORIZED = '未分类'
+
+
+class CategoryIndex:
+    """分类成员索引
+
+    游戏的 category/category_id 修改暂存在 transaction 中，取消对话框时直接丢弃即可。
+    没有分类ID或分类ID已不存在的游戏记在 None 之下，即"未分类"。
+    每个操作只处理涉及的游戏，返回被修改的游戏ID集合，调用方据此只保存和刷新这些游戏。
+    """
+
+    def __init__(self, transaction: LibraryTransaction, categories: List[Dict]):
+        self.transaction = transaction
+        self.members: Dict[Optional[str], Set[str]] = {}
+        # 游戏ID -> 所属分类ID
+        self._category_of: Dict[str, Optional[str]] = {}
+        known = {cat['id'] for cat in categories}
+        for game in transaction:
+            game_id = game['id']
+            category_id = game.get('category_id')
+            if category_id not in known:
+                category_id = None
+            self._category_of[game_id] = category_id
+            self.members.setdefault(category_id, set()).add(game_id)
+
+    def count(self, category_id: Optional[str]) -> int:
+        """分类中的游戏数"""
+        return len(self.members.get(category_id, ()))
+
+    def members_of(self, category_id: Optional[str]) -> FrozenSet[str]:
+        """分类中所有游戏的ID"""
+        return frozenset(self.members.get(category_id, ()))
+
+    def category_of(self, game_id: str) -> Optional[str]:
+        """游戏所属的分类ID"""
+        return self._category_of.get(game_id)
+
+    def _reassign(self, game_ids: Set[str], category_id: Optional[str]):
+        """把游戏从原来的分类成员集合中移到 category_id 的集合中"""
+        sources: Dict[Optional[str], Set[str]] = {}
+        for game_id in game_ids:
+            sources.setdefault(self._category_of[game_id], set()).add(game_id)
+            self._category_of[game_id] = category_id
+        for source, ids in sources.items():
+            remaining = self.members[source]
+            remaining -= ids
+            if not remaining:
+                del self.members[source]
+        self.members.setdefault(category_id, set()).update(game_ids)
+
+    def move(self, game_ids: Iterable[str], category: Dict) -> FrozenSet[str]:
+        """把游戏移动到分类中，返回实际被修改的游戏ID（已经在该分类中的游戏不变）"""
+        target = category['id']
+        moving = {game_id for game_id in game_ids
+                  if game_id in self._category_of and self._category_of[game_id] != target}
+        if not moving:
+            return frozenset()
+        self._reassign(moving, target)
+        for game_id in moving:
+            self.transaction.update(game_id, category=category['name'], category_id=target)
+        return frozenset(moving)
+
+    def rename(self, category: Dict) -> FrozenSet[str]:
+        """分类改名后同步成员游戏的分类名称，返回被修改的游戏ID"""
+        changed = set()
+        for game_id in self.members.get(category['id'], ()):
+            if self.transaction.get(game_id).get('category') != category['name']:
+                self.transaction.update(game_id, category=category['name'])
+                changed.add(game_id)
+        return frozenset(changed)
+
+    def delete(self, category_id: str) -> FrozenSet[str]:
+        """删除分类，其中的游戏变为未分类，返回被修改的游戏ID"""
+        moving = self.members.get(category_id)
+        if not moving:
+            return frozenset()
+        moving = set(moving)
+        self._reassign(moving, None)
+        for game_id in moving:
+            self.transaction.update(game_id, category=UNCATEGORIZED, category_id=None)
+        return frozenset(moving)
@@ -0,0 +1,72 @@
+"""
+去重索引模块
+按规范化的游戏名称和可执行文件路径建立哈希索引，O(1) 判断游戏是否重复
+"""
+
+from typing import Dict, Iterable, Optional
+
+from game_library import GameLibrary
+
+
+class DedupIndex:
+    """游戏去重索引
+
+    名称和路径的规范化与 GameLibrary 的索引相同（不访问文件系统）。
+    每个键记录有多少个游戏使用它，删除其中一个游戏时其他同名游戏仍然算作重复。
+    游戏库中的游戏被修改或删除后要调用 update()/remove()，否则旧名称会一直被当作重复。
+    """
+
+    def __init__(self, games: Iterable[Dict] = ()):
+        self.names: Dict[str, int] = {}
+        self.executables: Dict[str, int] = {}
+        for game in games:
+            self.add(game)
+
+    normalize_name = staticmethod(GameLibrary.normalize_name)
+    normalize_path = staticmethod(GameLibrary.normalize_path)
+
+    def _keys(self, game: Dict):
+        return ((self.names, self.normalize_name(game.get('name'))),
+                (self.executables, self.normalize_path(game.get('executable'))))
+
+    def copy(self) -> 'DedupIndex':
+        """复制索引（扫描时在副本上追加，不影响原索引）"""
+        index = DedupIndex()
+        index.names = dict(self.names)
+        index.executables = dict(self.executables)
+        return index
+
+    def contains(self, game: Dict) -> bool:
+        """游戏名称或可执行文件是否已存在"""
+        return any(key and key in counts for counts, key in self._keys(game))
+
+    def add(self, game: Dict):
+        """把游戏加入索引"""
+        for counts, key in self._keys(game):
+            if key:
+                counts[key] = counts.get(key, 0) + 1
+
+    def remove(self, game: Optional[Dict]):
+        """把游戏移出索引（游戏库中删除游戏后调用）"""
+        if game is None:
+            return
+        for counts, key in self._keys(game):
+            count = counts.get(key)
+            if count is None:
+                continue
+            if count > 1:
+                counts[key] = count - 1
+            else:
+                del counts[key]
+
+    def update(self, old: Optional[Dict], new: Dict):
+        """游戏被修改后用新的名称和路径替换旧的"""
+        self.remove(old)
+        self.add(new)
+
+    def add_if_new(self, game: Dict) -> bool:
+        """游戏不重复时加入索引并返回 True，否则返回 False"""
+        if self.contains(game):
+            return False
+        self.add(game)
+        return True
@@ -0,0 +1,145 @@
+"""
+可执行文件解析模块
+在游戏安装目录中按广度优先查找并评分，选出最可能的游戏主程序
+"""
+
+import math
+import os
+import re
+from collections import deque
+from difflib import SequenceMatcher
+from typing import List, Optional, Tuple
+
+
+class ExecutableResolver:
+    """有界的游戏主程序查找器
+
+    按广度优先搜索安装目录，受最大深度和最多检查条目数限制；
+    根据文件名与游戏名称的相似度、文件大小和常见命名规则给候选评分，
+    遇到足够确定的候选时立即返回。
+    """
+
+    # 文件名包含这些片段的一定不是游戏主程序
+    EXCLUDE_PATTERNS = [
+        'unins', 'setup', 'install', 'crash', 'report', 'redist', 'vcredist',
+        'dxsetup', 'dotnet', 'updater', 'webhelper', 'cefprocess', 'prereq',
+        'easyanticheat', 'battleye', 'uploader', 'helper', 'diagnostic',
+    ]
+
+    # 这些目录通常只包含运行库或安装程序，不进入查找
+    SKIP_DIRS = {
+        '_commonredist', 'commonredist', 'redist', 'redistributables', 'directx',
+        'vcredist', 'dotnet', '__installer', 'installer', 'support', 'prerequisites',
+        'easyanticheat', 'battleye', '_redist', 'crashreporter',
+    }
+
+    # 常见主程序命名规则带来的加分
+    NAME_BONUSES = [
+        ('-shipping', 0.25),
+        ('win64', 0.1),
+        ('game', 0.05),
+        ('launcher', 0.05),
+    ]
+
+    def __init__(self, max_depth: int = 4, max_entries: int = 5000, confident_score: float = 0.85):
+        self.max_depth = max_depth
+        self.max_entries = max_entries
+        self.confident_score = confident_score
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        """小写并去掉空白和标点，便于比较名称"""
+        return re.sub(r'[\W_]+', '', text.lower())
+
+    def is_excluded(self, filename: str) -> bool:
+        """文件名是否属于卸载、安装、崩溃报告等辅助程序"""
+        name_lower = filename.lower()
+        return any(pattern in name_lower for pattern in self.EXCLUDE_PATTERNS)
+
+    def parse_display_icon(self, display_icon: Optional[str]) -> Optional[str]:
+        """从注册表 DisplayIcon 值中解析可执行文件路径，例如 "C:\\Game\\game.exe",0"""
+        if not display_icon:
+            return None
+        path = display_icon.strip()
+        if path.startswith('"'):
+            path = path[1:].split('"', 1)[0]
+        elif ',' in path:
+            path = path.rsplit(',', 1)[0]
+        path = path.strip()
+        if not path.lower().endswith('.exe') or self.is_excluded(os.path.basename(path)):
+            return None
+        return path if os.path.isfile(path) else None
+
+    def score(self, filename: str, size: int, depth: int, display_name: Optional[str]) -> float:
+        """给候选可执行文件评分，分数越高越可能是游戏主程序"""
+        stem = os.path.splitext(filename)[0]
+        stem_norm = self._normalize(stem)
+        score = 0.0
+
+        if display_name:
+            name_norm = self._normalize(display_name)
+            if stem_norm and name_norm:
+                similarity = SequenceMatcher(None, stem_norm, name_norm).ratio()
+                if stem_norm in name_norm or name_norm in stem_norm:
+                    similarity = max(similarity, 0.9)
+                score += 0.6 * similarity
+
+        # 游戏主程序通常比辅助工具大：1MB 约 0.75，100MB 以上为 1
+        if size > 0:
+            score += 0.2 * min(1.0, math.log10(size) / 8)
+
+        stem_lower = stem.lower()
+        for pattern, bonus in self.NAME_BONUSES:
+            if pattern in stem_lower:
+                score += bonus
+
+        return score - 0.05 * depth
+
+    def resolve(self, install_location: Optional[str], display_name: Optional[str] = None,
+                display_icon: Optional[str] = None, token=None) -> Optional[str]:
+        """查找游戏主程序，找不到时返回 None
+
+        token: 可选的 CancelToken，取消后立即返回目前最好的候选。
+        """
+        icon_path = self.parse_display_icon(display_icon)
+        if icon_path:
+            return icon_path
+
+        if not install_location or not os.path.isdir(install_location):
+            return None
+
+        best: Tuple[float, Optional[str]] = (float('-inf'), None)
+        entries_seen = 0
+        queue = deque([(install_location, 0)])
+
+        while queue:
+            if token is not None and token.cancelled:
+                break
+            directory, depth = queue.popleft()
+            subdirs: List[str] = []
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        entries_seen += 1
+                        if entries_seen > self.max_entries:
+                            break
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                if entry.name.lower() not in self.SKIP_DIRS:
+                                    subdirs.append(entry.path)
+                            elif entry.name.lower().endswith('.exe') and not self.is_excluded(entry.name):
+                                size = entry.stat(follow_symlinks=False).st_size
+                                candidate_score = self.score(entry.name, size, depth, display_name)
+                                if candidate_score > best[0]:
+                                    best = (candidate_score, entry.path)
+                        except OSError:
+                            pass
+            except OSError:
+                pass
+
+            if best[0] >= self.confident_score or entries_seen > self.max_entries:
+                break
+            if depth < self.max_depth:
+                queue.extend((subdir, depth + 1) for subdir in subdirs)
+
+        return best[1]
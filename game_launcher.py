@@ -3,19 +3,46 @@
 支持查看游戏信息、快速启动游戏、添加新游戏
 """
 
+import time
+# 启动计时的起点（在导入其他模块之前）
+_STARTED_AT = time.perf_counter()
+
 import json
 import os
+import queue
 import sys
-import subprocess
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-from typing import Dict, List, Optional
-from game_scanner import GameScanner
-from scan_dialog import ScanDialog
-from category_dialog import CategoryDialog
+from typing import Dict, Iterable, List, Optional, Tuple
+from game_size import UNKNOWN_SIZE_TEXT, format_size, parse_size, size_fields, size_text
+from size_cache import SizeCache
+from scan_snapshot import ScanSnapshot
+from keyword_classifier import KeywordClassifier
+from dedup_index import DedupIndex
+from game_library import GameLibrary, LibraryTransaction
+from search_index import SearchIndex
+from virtual_list import VirtualList
+from library_store import migrate_legacy_data, open_library_store
+from launch_manager import LaunchEvent, LaunchManager
+from play_stats import PlayStats, format_play_time, format_played_at
+from size_job import SizeJob
+from startup_profile import StartupProfile
 
 class GameLauncher:
-    def __init__(self, data_file: str = None):
+    # 搜索框停止输入多久后开始筛选（毫秒）
+    SEARCH_DEBOUNCE_MS = 150
+    # 保存后多久检查后台写入是否失败（毫秒）
+    SAVE_ERROR_CHECK_MS = 1500
+    # 后台加载游戏库时检查是否完成的间隔（毫秒）
+    LOAD_POLL_MS = 20
+    # 可以点击排序的列和它们的标题
+    SORT_HEADINGS = {'size': '大小', 'play_time': '游玩时间', 'last_played': '最近游玩'}
+    
+    def __init__(self, data_file: str = None, profile: Optional[StartupProfile] = None,
+                 async_load: bool = True):
+        """async_load 为 True 时先显示窗口，再在后台线程中读取游戏库"""
+        self.profile = profile or StartupProfile()
         if data_file is None:
             # 判断是否为打包后的exe文件
             if getattr(sys, 'frozen', False):
@@ -27,22 +54,54 @@ class GameLauncher:
             data_file = os.path.join(script_dir, "game_library.json")
         
         self.data_file = data_file
-        self.games: List[Dict] = []
+        # 游戏库的原子写入和后台保存；.db 文件使用 SQLite 存储
+        self.store = open_library_store(self.data_file)
+        self.library = GameLibrary()
+        self.search_index = SearchIndex()
         self.platforms: List[Dict] = []
         self.categories: List[Dict] = []
+        self.dedup_index = DedupIndex()
+        # 大小缓存和扫描快照在第一次使用时才读取文件
+        self.size_cache = SizeCache.for_library(self.data_file)
+        self.scan_snapshot = ScanSnapshot.for_library(self.data_file)
+        # 游玩记录和游戏库一起在 read_library() 中读取
+        self.play_stats = PlayStats()
+        # 用户自定义的游戏/排除关键词配置
+        self.keyword_file = os.path.join(os.path.dirname(os.path.abspath(self.data_file)),
+                                         KeywordClassifier.CONFIG_FILENAME)
         
         print(f"数据文件路径: {self.data_file}")
         print(f"文件是否存在: {os.path.exists(self.data_file)}")
         
-        self.load_data()
+        # 上一次的筛选条件 (搜索词, 分类) 和等待执行的延迟筛选
+        self._filter_state = None
+        self._filter_after_id = None
+        # 点击列标题排序：None 不排序，否则为 (列名, 是否从大到小)
+        self.sort = None
+        self.profile.mark('初始化存储')
         
         self.root = tk.Tk()
         self.root.title("游戏启动器")
         self.root.geometry("1200x900")
         self.root.configure(bg="#f8f9fa")
         
+        # 在后台启动游戏并跟踪运行中的进程
+        self.launch_manager = LaunchManager(self.root, self.on_launch_event)
+        
         self.setup_styles()
         self.create_widgets()
+        self.profile.mark('创建窗口和控件')
+        
+        if async_load:
+            self.start_loading()
+        else:
+            self.load_data()
+            self.show_library()
+    
+    @property
+    def games(self) -> List[Dict]:
+        """按添加顺序返回游戏库中的所有游戏"""
+        return self.library.to_list()
         
     def setup_styles(self):
         style = ttk.Style()
@@ -105,79 +164,117 @@ class GameLauncher:
                        foreground='#2c3e50', borderwidth=1, relief='solid',
                        arrowcolor='#4a90e2')
         
-    def load_data(self):
+    @staticmethod
+    def initial_data() -> Dict:
+        """新建游戏库时的初始数据"""
+        return migrate_legacy_data({
+            "games": [],
+            "platforms": [],
+            "categories": [{"name": "全部", "color": "#95a5a6"}],
+            "summary": {
+                "total_games": 0,
+                "total_size": "0.00 MB",
+                "platforms_count": 0,
+                "categories_count": 1
+            }
+        })
+    
+    def read_library(self) -> Tuple[List[Dict], List[Dict], GameLibrary, DedupIndex, SearchIndex, PlayStats]:
+        """读取游戏库并建立索引，返回 (平台, 分类, 游戏库, 去重索引, 搜索索引, 游玩统计)
+
+        不访问界面，也不修改当前的游戏库，可以在后台线程中调用。
+        """
         try:
-            if not os.path.exists(self.data_file):
+            if not self.store.exists():
                 print(f"数据文件不存在，创建初始数据文件 - {self.data_file}")
                 # 创建空的初始数据文件
-                initial_data = {
-                    "games": [],
-                    "platforms": [],
-                    "categories": [{"name": "全部", "color": "#95a5a6"}],
-                    "summary": {
-                        "total_games": 0,
-                        "total_size": "0.00 MB",
-                        "platforms_count": 0,
-                        "categories_count": 1
-                    }
-                }
-                with open(self.data_file, 'w', encoding='utf-8') as f:
-                    json.dump(initial_data, f, ensure_ascii=False, indent=2)
-                self.games = []
-                self.platforms = []
-                self.categories = [{'name': '全部', 'color': '#95a5a6'}]
-                return
-            
-            with open(self.data_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                self.games = data.get('games', [])
-                self.platforms = data.get('platforms', [])
-                self.categories = data.get('categories', [{'name': '全部', 'color': '#95a5a6'}])
-                
-                # 兼容旧数据：为没有ID的分类生成ID
-                for cat in self.categories:
-                    if 'id' not in cat:
-                        import uuid
-                        cat['id'] = str(uuid.uuid4())
-                
-                # 兼容旧数据：为没有category_id的游戏根据分类名称添加ID
-                for game in self.games:
-                    if 'category_id' not in game and 'category' in game:
-                        category_name = game['category']
-                        for cat in self.categories:
-                            if cat['name'] == category_name:
-                                game['category_id'] = cat['id']
-                                break
-            
-            print(f"成功加载 {len(self.games)} 个游戏")
-            print(f"成功加载 {len(self.platforms)} 个平台")
-            print(f"成功加载 {len(self.categories)} 个分类")
+                data = self.initial_data()
+                self.store.write(data)
+            else:
+                # 兼容旧数据：补全分类ID、游戏的category_id和游戏ID
+                data = migrate_legacy_data(self.store.load())
         except json.JSONDecodeError as e:
             print(f"JSON解析错误: {e}")
             print("自动重新初始化数据文件...")
             # 文件为空或格式错误，自动重新初始化
-            initial_data = {
-                "games": [],
-                "platforms": [],
-                "categories": [{"name": "全部", "color": "#95a5a6"}],
-                "summary": {
-                    "total_games": 0,
-                    "total_size": "0.00 MB",
-                    "platforms_count": 0,
-                    "categories_count": 1
-                }
-            }
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(initial_data, f, ensure_ascii=False, indent=2)
-            self.games = []
-            self.platforms = []
-            self.categories = [{'name': '全部', 'color': '#95a5a6'}]
+            data = self.initial_data()
+            self.store.write(data)
+        library = GameLibrary(data['games'])
+        self.profile.mark('读取游戏库')
+        search_index = SearchIndex(library)
+        self.profile.mark('建立搜索索引')
+        # 会话日志只追加不缩短，同样在后台读取
+        play_stats = PlayStats.for_library(self.data_file)
+        self.profile.mark('读取游玩记录')
+        return data['platforms'], data['categories'], library, DedupIndex(library), search_index, play_stats
+    
+    def apply_library(self, loaded: Tuple[List[Dict], List[Dict], GameLibrary, DedupIndex, SearchIndex, PlayStats]):
+        """使用 read_library() 读取的数据替换当前的游戏库"""
+        (self.platforms, self.categories, self.library, self.dedup_index, self.search_index,
+         self.play_stats) = loaded
+        print(f"成功加载 {len(self.library)} 个游戏")
+        print(f"成功加载 {len(self.platforms)} 个平台")
+        print(f"成功加载 {len(self.categories)} 个分类")
+    
+    def report_load_error(self, error: Exception):
+        """加载失败时提示用户并使用空的游戏库"""
+        print(f"加载数据时出错: {error}")
+        messagebox.showerror("错误", f"加载数据失败:\n{str(error)}")
+        self.apply_library(([], migrate_legacy_data({})['categories'], GameLibrary(), DedupIndex(), SearchIndex(),
+                            PlayStats.for_library(self.data_file)))
+    
+    def load_data(self):
+        """在当前线程中读取游戏库"""
+        try:
+            self.apply_library(self.read_library())
         except Exception as e:
-            print(f"加载数据时出错: {e}")
-            messagebox.showerror("错误", f"加载数据失败:\n{str(e)}")
-            self.games = []
-            self.platforms = []
-            self.categories = [{'name': '全部', 'color': '#95a5a6'}]
+            self.report_load_error(e)
+    
+    def start_loading(self):
+        """在后台线程中读取游戏库，窗口先显示出来；加载完成前禁用修改游戏库的按钮"""
+        self.set_library_actions(tk.DISABLED)
+        result = queue.Queue()
+        
+        def worker():
+            try:
+                result.put((self.read_library(), None))
+            except Exception as e:
+                result.put((None, e))
+        
+        threading.Thread(target=worker, daemon=True).start()
+        self.root.after(self.LOAD_POLL_MS, self.poll_loading, result)
+    
+    def poll_loading(self, result: queue.Queue):
+        """后台加载完成后在界面线程中替换游戏库并显示列表"""
+        try:
+            loaded, error = result.get_nowait()
+        except queue.Empty:
+            self.root.after(self.LOAD_POLL_MS, self.poll_loading, result)
+            return
+        if error is not None:
+            self.report_load_error(error)
+        else:
+            self.apply_library(loaded)
+        self.show_library()
+        self.set_library_actions(tk.NORMAL)
+    
+    def show_library(self):
+        """游戏库加载后刷新列表、平台按钮和统计信息"""
+        self.load_games_to_list()
+        self.update_platform_buttons()
+        self.update_stats()
+        self.profile.mark('显示游戏列表')
+        # 列表绘制完成后输出启动耗时
+        self.root.after_idle(self.finish_startup_profile)
+    
+    def finish_startup_profile(self):
+        self.profile.mark('绘制游戏列表')
+        self.profile.report()
+    
+    def set_library_actions(self, state: str):
+        """启用或禁用会修改游戏库的按钮"""
+        for button in self.library_buttons:
+            button.config(state=state)
     
     def create_widgets(self):
         title_label = ttk.Label(self.root, text="🎮 游戏启动器", style='Title.TLabel')
@@ -196,7 +293,7 @@ class GameLauncher:
                  background='#f8f9fa', foreground='#7f8c8d').pack(side=tk.LEFT, padx=(0, 10))
         
         self.search_var = tk.StringVar()
-        self.search_var.trace('w', self.filter_games)
+        self.search_var.trace('w', self.schedule_filter)
         search_entry = ttk.Entry(search_frame, textvariable=self.search_var, font=('Microsoft YaHei', 10))
         search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
         
@@ -215,30 +312,29 @@ class GameLauncher:
         self.category_combo.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 10))
         
         # 分类管理按钮
-        ttk.Button(category_frame, text="📂 管理分类", 
-                  command=self.open_category_dialog).pack(side=tk.LEFT)
+        category_button = ttk.Button(category_frame, text="📂 管理分类",
+                                     command=self.open_category_dialog)
+        category_button.pack(side=tk.LEFT)
         
-        columns = ('name', 'category', 'platform', 'size')
-        self.game_tree = ttk.Treeview(left_frame, columns=columns, show='headings', style='GameList.Treeview')
+        columns = ('name', 'category', 'platform', 'size', 'play_time', 'last_played')
+        # 虚拟列表只为可见的行创建条目，行的内容按游戏ID从游戏库中读取
+        self.game_tree = VirtualList(left_frame, columns, self.game_row_values,
+                                     style='GameList.Treeview', on_select=self.on_game_select)
         
         self.game_tree.heading('name', text='游戏名称')
         self.game_tree.heading('category', text='分类')
         self.game_tree.heading('platform', text='平台')
-        self.game_tree.heading('size', text='大小')
-        
-        self.game_tree.column('name', width=350, anchor='center')
-        self.game_tree.column('category', width=120, anchor='center')
-        self.game_tree.column('platform', width=120, anchor='center')
-        self.game_tree.column('size', width=100, anchor='center')
-        
-        scrollbar = ttk.Scrollbar(left_frame, orient=tk.VERTICAL, command=self.game_tree.yview)
-        self.game_tree.configure(yscrollcommand=scrollbar.set)
+        for column, text in self.SORT_HEADINGS.items():
+            self.game_tree.heading(column, text=text, command=lambda c=column: self.toggle_sort(c))
         
-        self.game_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.game_tree.column('name', width=260, anchor='center')
+        self.game_tree.column('category', width=100, anchor='center')
+        self.game_tree.column('platform', width=100, anchor='center')
+        self.game_tree.column('size', width=90, anchor='center')
+        self.game_tree.column('play_time', width=80, anchor='center')
+        self.game_tree.column('last_played', width=120, anchor='center')
         
-        self.game_tree.bind('<<TreeviewSelect>>', self.on_game_select)
-        self.load_games_to_list()
+        self.game_tree.pack(fill=tk.BOTH, expand=True)
 
         # 右侧滚动容器
         right_container = ttk.Frame(main_frame, width=380)
@@ -275,7 +371,7 @@ class GameLauncher:
 
         self.info_labels = {}
         info_fields = [('name', '游戏名称:'), ('platform', '平台:'), ('size', '大小:'),
-                      ('executable', '启动程序:'), ('directory', '安装目录:')]
+                      ('play_stats', '游玩记录:'), ('executable', '启动程序:'), ('directory', '安装目录:')]
 
         for key, label_text in info_fields:
             frame = ttk.Frame(info_frame)
@@ -290,16 +386,24 @@ class GameLauncher:
         self.launch_button = ttk.Button(button_frame, text="🚀 启动游戏",
                                        style='Launch.TButton', command=self.launch_game, state=tk.DISABLED)
         self.launch_button.pack(fill=tk.X, pady=5)
+        # 最近一次启动的状态（启动中、启动耗时、退出）
+        self.launch_status_label = ttk.Label(button_frame, text="", style='Info.TLabel', wraplength=300)
+        self.launch_status_label.pack(anchor=tk.W, pady=(0, 5))
 
-        ttk.Button(button_frame, text="➕ 添加游戏", style='Add.TButton',
-                  command=self.open_add_game_dialog).pack(fill=tk.X, pady=5)
+        add_button = ttk.Button(button_frame, text="➕ 添加游戏", style='Add.TButton',
+                                command=self.open_add_game_dialog)
+        add_button.pack(fill=tk.X, pady=5)
 
-        ttk.Button(button_frame, text="🔄 刷新数据", style='Refresh.TButton',
-                  command=self.refresh_data).pack(fill=tk.X, pady=5)
+        refresh_button = ttk.Button(button_frame, text="🔄 刷新数据", style='Refresh.TButton',
+                                    command=self.refresh_data)
+        refresh_button.pack(fill=tk.X, pady=5)
 
         # 扫描游戏按钮
-        ttk.Button(button_frame, text="🔍 扫描游戏", style='Scan.TButton',
-                  command=self.open_scan_dialog).pack(fill=tk.X, pady=5)
+        scan_button = ttk.Button(button_frame, text="🔍 扫描游戏", style='Scan.TButton',
+                                 command=self.open_scan_dialog)
+        scan_button.pack(fill=tk.X, pady=5)
+        # 游戏库加载完成前禁用的按钮
+        self.library_buttons = [category_button, add_button, refresh_button, scan_button]
 
         # 编辑和删除按钮
         edit_delete_frame = tk.Frame(button_frame, bg="#f8f9fa")
@@ -313,22 +417,27 @@ class GameLauncher:
                                           command=self.delete_game, state=tk.DISABLED)
         self.delete_button.pack(side=tk.LEFT, padx=(0, 5))
 
-        platform_frame = ttk.LabelFrame(right_frame, text="平台启动器")
-        platform_frame.pack(fill=tk.X, pady=(10, 0))
+        running_frame = ttk.LabelFrame(right_frame, text="运行中的游戏")
+        running_frame.pack(fill=tk.X, pady=(10, 0))
+        self.running_list = tk.Listbox(running_frame, height=4, font=('Microsoft YaHei', 9),
+                                       bg="#f8f9fa", relief='flat', highlightthickness=0)
+        self.running_list.pack(fill=tk.X, padx=10, pady=5)
 
-        for platform in self.platforms:
-            btn = ttk.Button(platform_frame, text=f"📱 {platform['name']}",
-                      style='Platform.TButton', command=lambda p=platform: self.launch_platform(p))
-            btn.pack(fill=tk.X, padx=10, pady=5)
+        # 平台按钮和统计数字在游戏库加载后填充
+        self.platform_frame = ttk.LabelFrame(right_frame, text="平台启动器")
+        self.platform_frame.pack(fill=tk.X, pady=(10, 0))
 
         stats_frame = ttk.LabelFrame(right_frame, text="统计信息")
         stats_frame.pack(fill=tk.X, pady=(10, 0))
 
-        total_games = len(self.games)
-        total_size = self.calculate_total_size()
-
-        ttk.Label(stats_frame, text=f"总游戏数: {total_games}", style='Info.TLabel').pack(anchor=tk.W, padx=10, pady=5)
-        ttk.Label(stats_frame, text=f"总大小: {total_size}", style='Info.TLabel').pack(anchor=tk.W, padx=10, pady=5)
+        self.total_games_label = ttk.Label(stats_frame, text="总游戏数: 加载中...", style='Info.TLabel')
+        self.total_games_label.pack(anchor=tk.W, padx=10, pady=5)
+        self.total_size_label = ttk.Label(stats_frame, text="总大小: 加载中...", style='Info.TLabel')
+        self.total_size_label.pack(anchor=tk.W, padx=10, pady=5)
+        self.category_size_label = ttk.Label(stats_frame, text="", style='Info.TLabel', wraplength=300)
+        self.category_size_label.pack(anchor=tk.W, padx=10, pady=5)
+        self.play_time_label = ttk.Label(stats_frame, text="", style='Info.TLabel', wraplength=300)
+        self.play_time_label.pack(anchor=tk.W, padx=10, pady=5)
         ttk.Label(stats_frame, text=f"数据文件:", style='Info.TLabel').pack(anchor=tk.W, padx=10, pady=5)
         ttk.Label(stats_frame, text=self.data_file, style='Info.TLabel', wraplength=300).pack(anchor=tk.W, padx=10, pady=(0, 5))
         
@@ -336,63 +445,115 @@ class GameLauncher:
         donate_button = ttk.Button(stats_frame, text="💖 打赏作者", command=self.show_donate_dialog)
         donate_button.pack(fill=tk.X, padx=10, pady=(10, 5))
         
+    def update_platform_buttons(self):
+        """按当前的平台列表重建平台启动按钮"""
+        for child in self.platform_frame.winfo_children():
+            child.destroy()
+        for platform in self.platforms:
+            btn = ttk.Button(self.platform_frame, text=f"📱 {platform['name']}",
+                      style='Platform.TButton', command=lambda p=platform: self.launch_platform(p))
+            btn.pack(fill=tk.X, padx=10, pady=5)
+    
+    def update_stats(self):
+        """更新统计信息（大小合计由游戏库增量维护，不需要遍历游戏）"""
+        self.total_games_label.config(text=f"总游戏数: {len(self.library)}")
+        self.total_size_label.config(text=f"总大小: {self.calculate_total_size()}")
+        self.update_play_stats()
+        category_name = self.current_category.get()
+        category_id = self.find_category_id(category_name)
+        if category_id is None:
+            self.category_size_label.config(text="")
+            return
+        size, _ = self.library.category_size(category_id)
+        self.category_size_label.config(
+            text=f"当前分类: {self.library.count_by_category(category_id)} 个游戏，{format_size(size)}")
+    
     def load_games_to_list(self):
         # 初始化分类列表
         self.update_category_list()
         # 加载游戏（使用filter_games方法）
         self.filter_games()
     
-    def on_game_select(self, event):
+    def on_game_select(self, event=None):
         selection = self.game_tree.selection()
         if not selection:
             self.edit_button.config(state=tk.DISABLED)
             self.delete_button.config(state=tk.DISABLED)
             return
-        item = self.game_tree.item(selection[0])
-        values = item['values']
-        for game in self.games:
-            if game['name'] == values[0]:
-                self.info_labels['name'].config(text=game['name'])
-                self.info_labels['platform'].config(text=game['platform'])
-                self.info_labels['size'].config(text=game['size'])
-                self.info_labels['executable'].config(text=game['executable'])
-                self.info_labels['directory'].config(text=game['directory'])
-                self.launch_button.config(state=tk.NORMAL)
-                self.edit_button.config(state=tk.NORMAL)
-                self.delete_button.config(state=tk.NORMAL)
-                break
+        # 行的iid就是游戏ID
+        game = self.library.get(selection[0])
+        if game:
+            self.info_labels['name'].config(text=game['name'])
+            self.info_labels['platform'].config(text=game['platform'])
+            size = size_text(game)
+            if game.get('file_count') is not None:
+                size += f"（{game['file_count']} 个文件）"
+            self.info_labels['size'].config(text=size)
+            self.info_labels['play_stats'].config(text=self.play_stats_text(game['id']))
+            self.info_labels['executable'].config(text=game['executable'])
+            self.info_labels['directory'].config(text=game['directory'])
+            self.update_launch_button()
+            self.edit_button.config(state=tk.NORMAL)
+            self.delete_button.config(state=tk.NORMAL)
     
     def launch_game(self):
         selection = self.game_tree.selection()
         if not selection:
             return
-        item = self.game_tree.item(selection[0])
-        values = item['values']
-        for game in self.games:
-            if game['name'] == values[0]:
-                executable = game['executable']
-                game_dir = game.get('directory', '')
-                if os.path.exists(executable):
-                    # 设置工作目录为游戏安装目录，确保游戏能找到数据文件
-                    working_dir = game_dir if os.path.exists(game_dir) else os.path.dirname(executable)
-                    # 获取启动参数
-                    args = game.get('args', '')
-                    cmd = [executable]
-                    if args:
-                        cmd.extend(args.split())
-                    subprocess.Popen(cmd, cwd=working_dir)
-                    messagebox.showinfo("成功", f"正在启动: {game['name']}")
-                else:
-                    messagebox.showerror("错误", f"游戏文件不存在:\n{executable}")
-                break
+        game = self.library.get(selection[0])
+        if game:
+            # 检查文件和创建进程都在后台进行，不阻塞界面
+            if self.launch_manager.launch(game['id'], game['name'], game['executable'],
+                                          game.get('args', ''), game.get('directory', '')):
+                self.launch_status_label.config(text=f"正在启动: {game['name']}")
+            else:
+                self.launch_status_label.config(text=f"{game['name']} 已经在运行")
+            self.update_launch_button()
+            self.update_running_list()
     
     def launch_platform(self, platform: Dict):
         if 'executable' in platform and platform['executable']:
-            if os.path.exists(platform['executable']):
-                subprocess.Popen([platform['executable']])
-                messagebox.showinfo("成功", f"正在启动: {platform['name']}")
+            if self.launch_manager.launch('platform:' + platform['name'], platform['name'],
+                                          platform['executable']):
+                self.launch_status_label.config(text=f"正在启动: {platform['name']}")
             else:
-                messagebox.showerror("错误", f"平台文件不存在:\n{platform['executable']}")
+                self.launch_status_label.config(text=f"{platform['name']} 已经在运行")
+            self.update_running_list()
+    
+    def on_launch_event(self, event: LaunchEvent):
+        """游戏进程已启动、启动失败或已退出"""
+        if event.kind == 'started':
+            latency_ms = event.latency * 1000
+            print(f"已启动 {event.name}（PID {event.pid}），启动耗时 {latency_ms:.0f} ms")
+            self.launch_status_label.config(text=f"已启动: {event.name}（PID {event.pid}，{latency_ms:.0f} ms）")
+        elif event.kind == 'failed':
+            self.launch_status_label.config(text="")
+            messagebox.showerror("错误", f"无法启动 {event.name}:\n{event.error}")
+        else:
+            minutes = (event.ended_at - event.started_at) / 60
+            print(f"{event.name}（PID {event.pid}）已退出，返回值 {event.returncode}，运行 {minutes:.1f} 分钟")
+            self.launch_status_label.config(text=f"{event.name} 已退出（运行 {minutes:.1f} 分钟）")
+            if event.key in self.library:
+                self.record_session(event)
+        self.update_launch_button()
+        self.update_running_list()
+    
+    def update_launch_button(self):
+        """选中的游戏正在运行时禁用启动按钮，避免重复启动"""
+        selection = self.game_tree.selection()
+        if not selection or selection[0] not in self.library:
+            return
+        if self.launch_manager.is_running(selection[0]):
+            self.launch_button.config(text="▶ 运行中", state=tk.DISABLED)
+        else:
+            self.launch_button.config(text="🚀 启动游戏", state=tk.NORMAL)
+    
+    def update_running_list(self):
+        """更新运行中的游戏列表"""
+        self.running_list.delete(0, tk.END)
+        for entry in self.launch_manager.running_processes():
+            pid = f"PID {entry.pid}" if entry.pid is not None else "启动中"
+            self.running_list.insert(tk.END, f"{entry.name}（{pid}）")
     
     def update_category_list(self):
         """更新分类列表"""
@@ -404,27 +565,37 @@ class GameLauncher:
         """分类改变时筛选游戏"""
         self.current_category.set(self.category_var.get())
         self.filter_games()
+        self.update_stats()
+    
+    def schedule_filter(self, *args):
+        """搜索框输入时延迟筛选，连续输入只在停顿后筛选一次"""
+        if self._filter_after_id is not None:
+            self.root.after_cancel(self._filter_after_id)
+        self._filter_after_id = self.root.after(self.SEARCH_DEBOUNCE_MS, self.filter_games)
     
     def filter_games(self, *args):
         """根据搜索和分类筛选游戏"""
+        if self._filter_after_id is not None:
+            self.root.after_cancel(self._filter_after_id)
+            self._filter_after_id = None
+        
         search_text = self.search_var.get().lower()
         category_name = self.current_category.get()
         
         # 找到选中分类的ID
-        selected_category_id = None
-        if category_name != '全部':
-            for cat in self.categories:
-                if cat['name'] == category_name:
-                    selected_category_id = cat.get('id')
-                    break
+        selected_category_id = self.find_category_id(category_name)
         
-        for item in self.game_tree.get_children():
-            self.game_tree.delete(item)
+        # 分类没变且只是在上次的搜索词后追加了字符时，只需要在上次的结果中继续查找
+        within = None
+        if (self._filter_state is not None and self._filter_state[1] == category_name
+                and search_text.startswith(self._filter_state[0])):
+            within = set(self.game_tree.items)
         
-        for game in self.games:
-            # 检查搜索匹配
-            search_match = (search_text in game['name'].lower() or 
-                          search_text in game['platform'].lower())
+        matched_ids = []
+        for game_id in self.search_index.search(search_text, within):
+            game = self.library.get(game_id)
+            if game is None:
+                continue
             
             # 检查分类匹配（使用category_id，但兼容旧数据使用category）
             category_match = False
@@ -435,26 +606,136 @@ class GameLauncher:
             elif game.get('category') == category_name:
                 category_match = True
             
-            if search_match and category_match:
-                self.game_tree.insert('', tk.END, values=(
-                    game['name'],
-                    game.get('category', '未分类'),
-                    game['platform'], 
-                    game['size']
-                ))
+            if category_match:
+                matched_ids.append(game_id)
+        
+        if self.sort is not None:
+            matched_ids = self.sort_games(matched_ids)
+        self.game_tree.set_items(matched_ids)
+        self._filter_state = (search_text, category_name)
+    
+    def find_category_id(self, category_name: str) -> Optional[str]:
+        """分类名称对应的分类ID；'全部' 或找不到时返回 None"""
+        if category_name == '全部':
+            return None
+        for cat in self.categories:
+            if cat['name'] == category_name:
+                return cat.get('id')
+        return None
+    
+    def sort_games(self, game_ids: List[str]) -> List[str]:
+        """按当前排序列排序筛选结果，大小未知或没有玩过的游戏排在最后
+
+        游戏库和游玩统计都维护着排好序的索引，只需按索引顺序挑出筛选结果中的游戏。
+        """
+        column, descending = self.sort
+        if column == 'size':
+            order = self.library.ids_by_size(descending)
+        else:
+            order = self.play_stats.ids_by(column, descending)
+        wanted = set(game_ids)
+        ordered = [game_id for game_id in order if game_id in wanted]
+        if len(ordered) < len(game_ids):
+            known = set(ordered)
+            ordered.extend(game_id for game_id in game_ids if game_id not in known)
+        return ordered
+    
+    def toggle_sort(self, column: str):
+        """点击列标题：依次切换为从大到小、从小到大、不排序；点击另一列时从大到小排序"""
+        if self.sort is None or self.sort[0] != column:
+            self.sort = (column, True)
+        elif self.sort[1]:
+            self.sort = (column, False)
+        else:
+            self.sort = None
+        for name, text in self.SORT_HEADINGS.items():
+            if self.sort is not None and self.sort[0] == name:
+                text += ' ▼' if self.sort[1] else ' ▲'
+            self.game_tree.heading(name, text=text)
+        # 排序只改变顺序，需要重新筛选全部游戏
+        self.reset_game_rows()
+        self.filter_games()
+    
+    def play_stats_text(self, game_id: str) -> str:
+        """游戏信息中显示的游玩记录"""
+        stats = self.play_stats.get(game_id)
+        if stats is None:
+            return "还没有玩过"
+        return (f"共 {format_play_time(stats['play_time'])}，启动 {stats['launch_count']} 次，"
+                f"最后游玩 {format_played_at(stats['last_played'])}")
+    
+    def update_play_stats(self):
+        """更新统计信息中的游玩时间（读取游玩统计维护的汇总）"""
+        text = (f"总游玩时间: {format_play_time(self.play_stats.total_play_time)}"
+                f"（{self.play_stats.session_count} 次）")
+        most_played = []
+        for game_id in self.play_stats.ids_by('play_time'):
+            game = self.library.get(game_id)
+            if game is not None:
+                most_played.append(game['name'])
+                if len(most_played) == 3:
+                    break
+        if most_played:
+            text += f"\n玩得最多: {'、'.join(most_played)}"
+        self.play_time_label.config(text=text)
+    
+    def record_session(self, event: LaunchEvent):
+        """游戏退出后记录这次游玩，只刷新这个游戏的行和统计"""
+        self.play_stats.record(event.key, event.started_at, event.ended_at, event.returncode)
+        if self.sort is not None and self.sort[0] != 'size':
+            # 按游玩统计排序时这个游戏的位置会改变
+            self.reset_game_rows()
+            self.filter_games()
+        else:
+            self.game_tree.refresh_items([event.key])
+        self.update_play_stats()
+        selection = self.game_tree.selection()
+        if selection and selection[0] == event.key:
+            self.info_labels['play_stats'].config(text=self.play_stats_text(event.key))
+    
+    def game_row_values(self, game_id: str) -> tuple:
+        """列表中一行显示的内容"""
+        game = self.library.get(game_id)
+        if game is None:
+            return ()
+        stats = self.play_stats.get(game_id)
+        if stats is None:
+            play_time, last_played = '-', '-'
+        else:
+            play_time, last_played = format_play_time(stats['play_time']), format_played_at(stats['last_played'])
+        return (game['name'], game.get('category', '未分类'), game['platform'], size_text(game),
+                play_time, last_played)
+    
+    def reset_game_rows(self):
+        """游戏库变化后清除上一次的筛选状态，下次筛选重新查找所有游戏"""
+        self._filter_state = None
     
     def open_category_dialog(self):
         """打开分类管理对话框"""
-        dialog = CategoryDialog(self.root, self.categories.copy(), self.games.copy(),
+        # 对话框模块只在第一次打开时导入，减少启动时间
+        from category_dialog import CategoryDialog
+        # 对话框拿到游戏库的只读快照，修改暂存在事务中，保存时才提交
+        dialog = CategoryDialog(self.root, self.categories, self.library.snapshot(),
                                self.on_categories_saved)
     
-    def on_categories_saved(self, updated_categories, updated_games):
+    def on_categories_saved(self, updated_categories, transaction: LibraryTransaction):
         """分类保存回调"""
         self.categories = updated_categories
-        self.games = updated_games
+        # 提交前记下被修改游戏的旧内容，去重索引据此增量更新
+        previous = {game_id: self.library.get(game_id) for game_id in transaction.changed_ids}
+        # 只提交在对话框中被修改过的游戏
+        changed, removed = self.library.commit(transaction)
+        for game in changed:
+            self.search_index.update(game)
+            self.dedup_index.update(previous.get(game['id']), game)
+        for game_id in removed:
+            self.search_index.remove(game_id)
+            self.dedup_index.remove(previous.get(game_id))
+        self.reset_game_rows()
         self.update_category_list()
-        self.save_data()
+        self.save_data(changed_games=changed, removed_ids=removed)
         self.filter_games()  # 重新筛选游戏列表
+        self.update_stats()
     
     def open_add_game_dialog(self):
         dialog = tk.Toplevel(self.root)
@@ -497,6 +778,15 @@ class GameLauncher:
         ttk.Label(form_frame, text="游戏大小:", font=('Microsoft YaHei', 10),
                  background='#2c3e50', foreground='#ecf0f1').pack(anchor=tk.W)
         size_var = tk.StringVar(value="未选择文件")
+        # 测量得到的大小字段
+        measured = size_fields()
+        
+        def on_size_measured(fields):
+            measured.update(fields)
+            size_var.set(size_text(measured))
+        
+        # 路径停止变化后在后台计算大小，不阻塞输入
+        size_job = self.create_size_job(dialog, size_var, on_size_measured)
         ttk.Label(form_frame, textvariable=size_var, font=('Microsoft YaHei', 10),
                  background='#2c3e50', foreground='#ecf0f1').pack(anchor=tk.W, pady=(5, 10))
         
@@ -510,13 +800,18 @@ class GameLauncher:
             exe = exe_var.get()
             if exe and os.path.exists(exe):
                 game_dir = os.path.dirname(exe)
-                size = self.calculate_directory_size(game_dir)
-                size_var.set(size)
+                if dir_var.get() != game_dir:
+                    # 换了目录，之前的测量结果作废
+                    measured.update(size_fields())
+                    size_var.set("等待计算...")
+                    size_job.request(game_dir)
                 dir_var.set(game_dir)
                 if not name_var.get():
                     game_name = os.path.splitext(os.path.basename(exe))[0]
                     name_var.set(game_name)
             else:
+                size_job.cancel()
+                measured.update(size_fields())
                 size_var.set("未选择文件")
                 dir_var.set("未选择文件")
         
@@ -529,7 +824,6 @@ class GameLauncher:
             game_name = name_var.get().strip()
             platform = platform_var.get()
             exe = exe_var.get().strip()
-            size = size_var.get()
             directory = dir_var.get()
             
             if not game_name:
@@ -540,10 +834,16 @@ class GameLauncher:
                 messagebox.showerror("错误", "请选择有效的游戏可执行文件！")
                 return
             
-            new_game = {"name": game_name, "platform": platform, "executable": exe, "size": size, "directory": directory}
-            self.games.append(new_game)
-            self.save_data()
-            self.refresh_data()
+            if size_job.running:
+                messagebox.showinfo("提示", "正在计算游戏大小，请稍候再添加", parent=dialog)
+                return
+            
+            new_game = self.library.add({"name": game_name, "platform": platform, "executable": exe,
+                                         "directory": directory, **measured})
+            self.dedup_index.add(new_game)
+            self.search_index.add(new_game)
+            self.save_data(changed_games=[new_game])
+            self.refresh_game_list()
             messagebox.showinfo("成功", f"游戏 '{game_name}' 已成功添加！")
             dialog.destroy()
         
@@ -556,81 +856,92 @@ class GameLauncher:
         if filename:
             var.set(filename)
     
-    def calculate_directory_size(self, directory):
-        try:
-            total_size = 0
-            for dirpath, dirnames, filenames in os.walk(directory):
-                for filename in filenames:
-                    filepath = os.path.join(dirpath, filename)
-                    try:
-                        total_size += os.path.getsize(filepath)
-                    except:
-                        pass
-            if total_size >= 1073741824:
-                return f"{total_size / 1073741824:.2f} GB"
-            elif total_size >= 1048576:
-                return f"{total_size / 1048576:.2f} MB"
-            elif total_size >= 1024:
-                return f"{total_size / 1024:.2f} KB"
-            else:
-                return f"{total_size} Bytes"
-        except:
-            return "计算失败"
+    def create_size_job(self, dialog, size_var: tk.StringVar, on_done) -> SizeJob:
+        """创建对话框使用的后台大小计算，计算过程中在 size_var 中显示进度，对话框关闭时取消"""
+        def on_progress(total_bytes, total_files):
+            size_var.set(f"正在计算... 已统计 {total_files} 个文件，{format_size(total_bytes)}")
+        
+        size_job = SizeJob(dialog, self.size_cache, on_done, on_progress)
+        dialog.bind('<Destroy>', lambda e: size_job.cancel() if e.widget is dialog else None, add='+')
+        return size_job
     
-    def save_data(self):
+    def save_data(self, changed_games: Optional[List[Dict]] = None, removed_ids: Iterable[str] = ()):
+        """保存游戏库
+
+        传入 changed_games/removed_ids 时，支持按行写入的存储（SQLite）只写入这些游戏；
+        否则保存完整数据。
+        """
         try:
-            data = {"games": self.games, "platforms": self.platforms, "categories": self.categories,
-                   "summary": {"total_games": len(self.games), "total_size": self.calculate_total_size(),
-                              "platforms_count": len(self.platforms), "categories_count": len(self.categories)}}
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            # 在后台线程中写入：游戏字典不会被原地修改，平台和分类传入副本
+            if self.store.ROW_UPDATES and changed_games is not None:
+                self.store.save_changes(changed_games, removed_ids,
+                                        [dict(c) for c in self.categories],
+                                        [dict(p) for p in self.platforms])
+            else:
+                data = {"games": self.library.to_list(), "platforms": [dict(p) for p in self.platforms],
+                       "categories": [dict(c) for c in self.categories],
+                       "summary": {"total_games": len(self.library), "total_size": self.calculate_total_size(),
+                                  "platforms_count": len(self.platforms), "categories_count": len(self.categories)}}
+                self.store.save(data)
         except Exception as e:
             messagebox.showerror("错误", f"保存失败：{str(e)}")
+            return
+        # 写入完成后检查是否失败
+        self.root.after(self.SAVE_ERROR_CHECK_MS, self.report_save_error)
+    
+    def report_save_error(self):
+        """后台保存失败时提示用户"""
+        error = self.store.take_error()
+        if error:
+            messagebox.showerror("错误", f"保存失败：{str(error)}")
     
     def refresh_data(self):
-        self.game_tree.delete(*self.game_tree.get_children())
+        # 先等后台保存完成，再从文件重新加载
+        self.store.flush()
+        self.reset_game_rows()
         self.load_data()
-        self.load_games_to_list()
+        self.show_library()
+        self.clear_game_info()
+    
+    def refresh_game_list(self):
+        """游戏库在内存中修改后刷新列表（不重新读取数据文件）"""
+        self.reset_game_rows()
+        self.filter_games()
+        self.clear_game_info()
+        self.update_stats()
+    
+    def clear_game_info(self):
         for label in self.info_labels.values():
             label.config(text='-')
         self.launch_button.config(state=tk.DISABLED)
     
     def calculate_total_size(self):
-        total_mb = 0
-        for game in self.games:
-            size_str = game['size']
-            if 'GB' in size_str:
-                total_mb += float(size_str.replace(' GB', '')) * 1024
-            elif 'MB' in size_str:
-                total_mb += float(size_str.replace(' MB', ''))
-        if total_mb >= 1024:
-            return f"{total_mb/1024:.2f} GB"
-        else:
-            return f"{total_mb:.2f} MB"
+        """游戏库总大小的显示文字（使用游戏库增量维护的合计）"""
+        return format_size(self.library.total_size()[0])
     
 
     def edit_game(self):
         selection = self.game_tree.selection()
         if not selection:
             return
-        item = self.game_tree.item(selection[0])
-        values = item["values"]
-        for game in self.games:
-            if game["name"] == values[0]:
-                self.open_edit_dialog(game)
-                break
+        game = self.library.get(selection[0])
+        if game:
+            self.open_edit_dialog(game)
     
     def delete_game(self):
         selection = self.game_tree.selection()
         if not selection:
             return
-        item = self.game_tree.item(selection[0])
-        values = item["values"]
-        game_name = values[0]
+        game = self.library.get(selection[0])
+        if not game:
+            return
+        game_name = game["name"]
         if messagebox.askyesno("确认删除", "确定要删除游戏 '" + game_name + "' 吗？"):
-            self.games = [g for g in self.games if g["name"] != game_name]
-            self.save_data()
-            self.refresh_data()
+            self.library.remove(game["id"])
+            self.search_index.remove(game["id"])
+            self.dedup_index.remove(game)
+            self.save_data(changed_games=[], removed_ids=[game["id"]])
+            self.refresh_game_list()
             messagebox.showinfo("成功", "游戏 '" + game_name + "' 已删除")
     
     def open_edit_dialog(self, game):
@@ -665,8 +976,26 @@ class GameLauncher:
         dir_var = tk.StringVar(value=game["directory"])
         ttk.Entry(form_frame, textvariable=dir_var, font=("Microsoft YaHei", 10)).pack(fill=tk.X, pady=(0, 10))
         tk.Label(form_frame, text="游戏大小:", font=("Microsoft YaHei", 10), bg="#2c3e50", fg="#ecf0f1").pack(anchor=tk.W, pady=(0, 5))
-        size_var = tk.StringVar(value=game["size"])
-        ttk.Entry(form_frame, textvariable=size_var, font=("Microsoft YaHei", 10)).pack(fill=tk.X, pady=(0, 10))
+        size_var = tk.StringVar(value=size_text(game))
+        size_frame = tk.Frame(form_frame, bg="#2c3e50")
+        size_frame.pack(fill=tk.X, pady=(0, 10))
+        ttk.Entry(size_frame, textvariable=size_var, font=("Microsoft YaHei", 10)).pack(side=tk.LEFT, fill=tk.X, expand=True)
+        # 重新计算得到的大小字段（包括文件数和测量时间）
+        recomputed = {}
+        def on_size_recomputed(fields):
+            recomputed.clear()
+            recomputed.update(fields)
+            size_var.set(size_text(fields))
+        size_job = self.create_size_job(dialog, size_var, on_size_recomputed)
+        def recompute_size():
+            directory = dir_var.get().strip() or os.path.dirname(exe_var.get().strip())
+            if not directory or not os.path.isdir(directory):
+                messagebox.showerror("错误", "安装目录不存在，无法计算大小！", parent=dialog)
+                return
+            size_var.set("等待计算...")
+            # 手动重新计算时忽略缓存，文件被原地修改过也能得到正确的大小
+            size_job.request(directory, refresh=True, delay=0)
+        tk.Button(size_frame, text="🔄 重新计算", command=recompute_size, bg="#3498db", fg="#ecf0f1").pack(side=tk.LEFT, padx=(5, 0))
         button_frame = tk.Frame(form_frame, bg="#2c3e50")
         button_frame.pack(fill=tk.X, pady=(20, 0))
         def save_edit():
@@ -676,25 +1005,42 @@ class GameLauncher:
             new_exe = exe_var.get().strip()
             new_directory = dir_var.get().strip()
             new_size = size_var.get().strip()
+            # 大小没有修改时保留测量结果，手动修改时只记录字节数
+            if size_job.running:
+                messagebox.showinfo("提示", "正在计算游戏大小，请稍候再保存", parent=dialog)
+                return
+            if recomputed and new_size == size_text(recomputed):
+                size_changes = dict(recomputed)
+            elif new_size == size_text(game):
+                size_changes = {}
+            elif not new_size or new_size == UNKNOWN_SIZE_TEXT:
+                size_changes = size_fields()
+            else:
+                size_bytes = parse_size(new_size)
+                if size_bytes is None:
+                    messagebox.showerror("错误", "无法识别游戏大小，请输入例如 12.5 GB 或 800 MB")
+                    return
+                size_changes = size_fields(size_bytes)
             if not new_name:
                 messagebox.showerror("错误", "游戏名称不能为空！")
                 return
             if not new_exe or not os.path.exists(new_exe):
                 messagebox.showerror("错误", "可执行文件不存在！")
                 return
-            game["name"] = new_name
-            game["platform"] = new_platform
-            game["category"] = new_category
-            game["executable"] = new_exe
-            game["directory"] = new_directory
-            game["size"] = new_size
+            changes = {"name": new_name, "platform": new_platform, "category": new_category,
+                       "executable": new_exe, "directory": new_directory, **size_changes}
             # 根据分类名称查找并更新category_id
             for cat in self.categories:
                 if cat['name'] == new_category:
-                    game['category_id'] = cat.get('id')
+                    changes['category_id'] = cat.get('id')
                     break
-            self.save_data()
-            self.refresh_data()
+            # 对话框打开期间游戏可能已经被修改过，去重索引要移除的是游戏库中当前的内容
+            old = self.library.get(game["id"])
+            updated = self.library.update(game["id"], **changes)
+            self.search_index.update(updated)
+            self.dedup_index.update(old, updated)
+            self.save_data(changed_games=[updated])
+            self.refresh_game_list()
             messagebox.showinfo("成功", "游戏 '" + new_name + "' 信息已更新")
             dialog.destroy()
         tk.Button(button_frame, text="✅ 保存修改", command=save_edit, bg="#27ae60", fg="#ecf0f1", font=("Microsoft YaHei", 10, "bold"), padx=15, pady=5).pack(side=tk.LEFT, padx=(0, 10))
@@ -703,20 +1049,25 @@ class GameLauncher:
 
     def open_scan_dialog(self):
         """打开扫描对话框"""
-        dialog = ScanDialog(self.root, self.games, self.on_scanned_games_added)
+        # 扫描器、扫描对话框和注册表访问只在第一次打开时导入，减少启动时间
+        from game_scanner import GameScanner
+        from scan_dialog import ScanDialog
+        # 扫描在后台线程中读取已有游戏，传入不会再变化的快照
+        dialog = ScanDialog(self.root, self.library.snapshot(), self.on_scanned_games_added,
+                            self.size_cache, self.scan_snapshot,
+                            GameScanner.build_classifier(self.keyword_file),
+                            self.dedup_index)
     
     def on_scanned_games_added(self, games):
         """处理扫描到的游戏添加"""
+        added = []
         for game in games:
-            is_duplicate = False
-            for existing in self.games:
-                if existing['name'] == game['name']:
-                    is_duplicate = True
-                    break
-            if not is_duplicate:
-                self.games.append(game)
-        self.save_data()
-        self.refresh_data()
+            if self.dedup_index.add_if_new(game):
+                added.append(self.library.add(game))
+                self.search_index.add(added[-1])
+        # 扫描结果在一个事务中批量写入
+        self.save_data(changed_games=added)
+        self.refresh_game_list()
         messagebox.showinfo("成功", f"成功添加 {len(games)} 个游戏到游戏库！")
 
     def browse_file_for_edit(self, var):
@@ -793,11 +1144,15 @@ class GameLauncher:
         close_button.pack()
 
     def run(self):
+        self.root.after_idle(self.profile.mark, '显示窗口')
         try:
             self.root.mainloop()
         except Exception as e:
             print(f"程序运行出错: {e}")
             messagebox.showerror("错误", f"程序运行出错:\n{str(e)}")
+        finally:
+            # 退出前写完尚未保存的数据
+            self.store.close()
 
 if __name__ == "__main__":
     try:
@@ -805,12 +1160,18 @@ if __name__ == "__main__":
         print("游戏启动器启动中...")
         print("=" * 50)
         
+        # --profile-startup: 输出启动各阶段的耗时
+        args = sys.argv[1:]
+        profile = StartupProfile('--profile-startup' in args, _STARTED_AT)
+        profile.mark('导入模块')
+        args = [arg for arg in args if arg != '--profile-startup']
+        
         data_file = None
-        if len(sys.argv) > 1:
-            data_file = sys.argv[1]
+        if args:
+            data_file = args[0]
             print(f"使用指定的数据文件: {data_file}")
         
-        launcher = GameLauncher(data_file)
+        launcher = GameLauncher(data_file, profile)
         launcher.run()
     except Exception as e:
         print(f"程序启动失败: {e}")
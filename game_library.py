@@ -0,0 +1,366 @@
+"""
+游戏库存储模块
+在内存中按游戏ID保存游戏，并维护名称、可执行文件、平台和分类的哈希索引，
+以及按大小排序的索引和各平台、分类的大小合计；
+对话框使用只读快照，并在事务中暂存修改，确认后再一次提交到游戏库
+"""
+
+import bisect
+import os
+import uuid
+from types import MappingProxyType
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Set, Tuple
+
+
+class GameLibrary:
+    """带索引的游戏库
+
+    每个游戏都有稳定的 'id' 字段（旧数据在加载时补上），界面中的行也使用这个 ID，
+    按 ID、名称、可执行文件、平台和分类查找都是 O(1)。
+    游戏字典存入后不再原地修改：update() 会生成新的字典替换旧的，
+    这样索引不会和数据不一致，其他地方持有的旧字典也不会被意外改变。
+
+    游戏大小的合计（全部、每个平台、每个分类）在添加、修改和删除时增量更新，
+    统计信息直接读取合计，不需要遍历游戏库。
+
+    snapshot() 本身是 O(1) 的：快照与游戏库共用同一个字典，游戏库在下一次修改前才复制一次字典（写时复制）。
+    这次复制是 O(n) 的（n 为游戏数），只复制 ID -> 游戏字典的引用，不复制游戏字典本身；
+    每创建一次快照，之后的第一次修改付出一次这样的复制，同一快照之后的修改不再复制。
+    """
+
+    def __init__(self, games: Iterable[Dict] = ()):
+        self._games: Dict[str, Dict] = {}
+        self._by_name: Dict[str, Dict[str, None]] = {}
+        self._by_executable: Dict[str, Dict[str, None]] = {}
+        self._by_platform: Dict[str, Dict[str, None]] = {}
+        self._by_category: Dict[str, Dict[str, None]] = {}
+        # 按 (字节数, 游戏ID) 排序的列表，大小未知的游戏不在其中
+        self._size_order: List[Tuple[int, str]] = []
+        # 大小合计 [字节数, 已知大小的游戏数]
+        self._total_size = [0, 0]
+        self._platform_sizes: Dict[str, List[int]] = {}
+        self._category_sizes: Dict[str, List[int]] = {}
+        # _games 是否被快照共用，共用时修改前要先复制
+        self._shared = False
+        self.load(games)
+
+    @staticmethod
+    def new_id() -> str:
+        """生成新的游戏ID"""
+        return str(uuid.uuid4())
+
+    @staticmethod
+    def normalize_name(name: Optional[str]) -> str:
+        """名称去掉首尾空白并忽略大小写"""
+        return name.strip().casefold() if name else ''
+
+    @staticmethod
+    def normalize_path(path: Optional[str]) -> str:
+        """路径规范化并忽略大小写（Windows），不访问文件系统"""
+        return os.path.normcase(os.path.normpath(path)) if path else ''
+
+    def load(self, games: Iterable[Dict]):
+        """清空并重新载入游戏，没有ID或ID重复的游戏会分配新ID"""
+        # 换成新字典，已有的快照不受影响
+        self._games = {}
+        self._shared = False
+        self._by_name.clear()
+        self._by_executable.clear()
+        self._by_platform.clear()
+        self._by_category.clear()
+        self._size_order.clear()
+        self._total_size = [0, 0]
+        self._platform_sizes.clear()
+        self._category_sizes.clear()
+        for game in games:
+            self.add(game)
+
+    def __len__(self) -> int:
+        return len(self._games)
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(list(self._games.values()))
+
+    def __contains__(self, game_id: str) -> bool:
+        return game_id in self._games
+
+    def to_list(self) -> List[Dict]:
+        """按添加顺序返回所有游戏"""
+        return list(self._games.values())
+
+    def get(self, game_id: str) -> Optional[Dict]:
+        """按ID查找游戏"""
+        return self._games.get(game_id)
+
+    def _lookup(self, index: Dict[str, Dict[str, None]], key: str) -> List[Dict]:
+        return [self._games[game_id] for game_id in index.get(key, ())]
+
+    def find_by_name(self, name: str) -> List[Dict]:
+        """按名称查找游戏（忽略大小写）"""
+        return self._lookup(self._by_name, self.normalize_name(name))
+
+    def find_by_executable(self, executable: str) -> List[Dict]:
+        """按可执行文件路径查找游戏"""
+        return self._lookup(self._by_executable, self.normalize_path(executable))
+
+    def ids_by_platform(self, platform: str) -> Set[str]:
+        """某个平台下所有游戏的ID"""
+        return set(self._by_platform.get(platform, ()))
+
+    def ids_by_category(self, category_id: str) -> Set[str]:
+        """某个分类下所有游戏的ID"""
+        return set(self._by_category.get(category_id, ()))
+
+    def count_by_category(self, category_id: str) -> int:
+        """某个分类下的游戏数"""
+        return len(self._by_category.get(category_id, ()))
+
+    def ids_by_size(self, descending: bool = False) -> List[str]:
+        """已知大小的游戏ID，按大小排序"""
+        ids = [game_id for _, game_id in self._size_order]
+        if descending:
+            ids.reverse()
+        return ids
+
+    def total_size(self) -> Tuple[int, int]:
+        """全部游戏的 (总字节数, 已知大小的游戏数)"""
+        return self._total_size[0], self._total_size[1]
+
+    def platform_size(self, platform: str) -> Tuple[int, int]:
+        """某个平台的 (总字节数, 已知大小的游戏数)"""
+        size, count = self._platform_sizes.get(platform, (0, 0))
+        return size, count
+
+    def category_size(self, category_id: str) -> Tuple[int, int]:
+        """某个分类的 (总字节数, 已知大小的游戏数)"""
+        size, count = self._category_sizes.get(category_id, (0, 0))
+        return size, count
+
+    def _index_keys(self, game: Dict):
+        return (
+            (self._by_name, self.normalize_name(game.get('name'))),
+            (self._by_executable, self.normalize_path(game.get('executable'))),
+            (self._by_platform, game.get('platform') or ''),
+            (self._by_category, game.get('category_id') or ''),
+        )
+
+    def _index(self, game: Dict):
+        for index, key in self._index_keys(game):
+            if key:
+                # 用字典充当有序集合，查找结果保持添加顺序
+                index.setdefault(key, {})[game['id']] = None
+        size = game.get('size_bytes')
+        if size is not None:
+            bisect.insort(self._size_order, (size, game['id']))
+            self._add_size(game, size, 1)
+
+    def _unindex(self, game: Dict):
+        for index, key in self._index_keys(game):
+            ids = index.get(key)
+            if ids is not None:
+                ids.pop(game['id'], None)
+                if not ids:
+                    del index[key]
+        size = game.get('size_bytes')
+        if size is not None:
+            position = bisect.bisect_left(self._size_order, (size, game['id']))
+            if position < len(self._size_order) and self._size_order[position] == (size, game['id']):
+                del self._size_order[position]
+            self._add_size(game, -size, -1)
+
+    def _add_size(self, game: Dict, size: int, count: int):
+        """把一个游戏的大小计入（或移出）各项合计"""
+        self._total_size[0] += size
+        self._total_size[1] += count
+        for totals, key in ((self._platform_sizes, game.get('platform') or ''),
+                            (self._category_sizes, game.get('category_id') or '')):
+            entry = totals.setdefault(key, [0, 0])
+            entry[0] += size
+            entry[1] += count
+            if not entry[1]:
+                del totals[key]
+
+    def _writable_games(self) -> Dict[str, Dict]:
+        """修改前调用：字典被快照共用时先复制一份
+
+        复制是 O(n) 的，但只复制 ID -> 游戏字典的引用，不复制游戏字典；每个快照最多触发一次。
+        """
+        if self._shared:
+            self._games = dict(self._games)
+            self._shared = False
+        return self._games
+
+    def add(self, game: Dict) -> Dict:
+        """添加游戏并返回存入的字典（没有ID或ID重复时分配新ID）"""
+        if not game.get('id') or game['id'] in self._games:
+            game = {**game, 'id': self.new_id()}
+        self._writable_games()[game['id']] = game
+        self._index(game)
+        return game
+
+    def update(self, game_id: str, **changes) -> Optional[Dict]:
+        """用修改后的新字典替换游戏，返回新的游戏字典；游戏不存在时返回 None"""
+        old = self._games.get(game_id)
+        if old is None:
+            return None
+        new = {**old, **changes, 'id': game_id}
+        self._unindex(old)
+        # 替换已有键不会改变字典中的顺序
+        self._writable_games()[game_id] = new
+        self._index(new)
+        return new
+
+    def remove(self, game_id: str) -> Optional[Dict]:
+        """删除游戏并返回被删除的字典"""
+        if game_id not in self._games:
+            return None
+        game = self._writable_games().pop(game_id)
+        self._unindex(game)
+        return game
+
+    def snapshot(self) -> 'LibrarySnapshot':
+        """当前游戏库的只读快照（O(1)，之后对游戏库的修改不会影响快照）
+
+        代价推迟到游戏库的下一次修改：那时要复制一次 ID -> 游戏字典的引用（O(n)）。
+        """
+        self._shared = True
+        return LibrarySnapshot(self, self._games)
+
+    def commit(self, transaction: 'LibraryTransaction') -> Tuple[List[Dict], List[str]]:
+        """把事务中暂存的修改一次应用到游戏库，返回 (新增或修改后的游戏, 删除的游戏ID)
+
+        只应用事务中修改过的字段：事务期间游戏库对同一个游戏其他字段的修改会保留，
+        同一个字段两边都修改过时以事务为准；游戏库中已经删除的游戏不会因为事务中的修改而恢复。
+        """
+        if transaction.snapshot.library is not self:
+            raise ValueError("事务不是基于这个游戏库的快照创建的")
+        changes, added_games, removed_ids = transaction.delta()
+        removed = [game_id for game_id in removed_ids if self.remove(game_id) is not None]
+        stored = []
+        for game_id, fields in changes.items():
+            if game_id in self._games:
+                stored.append(self.update(game_id, **fields))
+        for game in added_games:
+            stored.append(self.add(game))
+        return stored, removed
+
+
+class LibrarySnapshot:
+    """游戏库某一时刻的只读快照
+
+    游戏以只读映射（MappingProxyType）的形式返回，需要修改时用 transaction() 创建事务。
+    快照不会再改变，可以交给后台线程读取。
+    """
+
+    def __init__(self, library: GameLibrary, games: Dict[str, Dict]):
+        self.library = library
+        self._games = games
+
+    def __len__(self) -> int:
+        return len(self._games)
+
+    def __iter__(self) -> Iterator[Mapping]:
+        return (MappingProxyType(game) for game in self._games.values())
+
+    def __contains__(self, game_id: str) -> bool:
+        return game_id in self._games
+
+    def ids(self) -> List[str]:
+        """按游戏库顺序返回所有游戏ID"""
+        return list(self._games)
+
+    def get(self, game_id: str) -> Optional[Mapping]:
+        """按ID查找游戏"""
+        game = self._games.get(game_id)
+        return MappingProxyType(game) if game is not None else None
+
+    def transaction(self) -> 'LibraryTransaction':
+        """基于这个快照创建事务"""
+        return LibraryTransaction(self)
+
+
+class LibraryTransaction:
+    """在快照上暂存的修改
+
+    读取时先看暂存的修改，再看快照；已有游戏只记录被修改的字段，新增的游戏记录完整的字典，
+    不影响快照和游戏库，放弃事务就等于撤销所有修改。确认后由 GameLibrary.commit() 一次提交。
+    """
+
+    def __init__(self, snapshot: LibrarySnapshot):
+        self.snapshot = snapshot
+        # 快照中的游戏ID -> 被修改的字段
+        self._changes: Dict[str, Dict] = {}
+        # 新增的游戏ID -> 游戏字典
+        self._added: Dict[str, Dict] = {}
+        self._removed: Set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self.snapshot) - len(self._removed) + len(self._added)
+
+    def __iter__(self) -> Iterator[Mapping]:
+        for game_id in self.snapshot.ids():
+            game = self.get(game_id)
+            if game is not None:
+                yield game
+        for game in self._added.values():
+            yield MappingProxyType(game)
+
+    def __contains__(self, game_id: str) -> bool:
+        return self.get(game_id) is not None
+
+    def get(self, game_id: str) -> Optional[Mapping]:
+        """按ID查找游戏（包括暂存的修改）"""
+        if game_id in self._removed:
+            return None
+        game = self._added.get(game_id)
+        if game is not None:
+            return MappingProxyType(game)
+        changes = self._changes.get(game_id)
+        if changes:
+            return MappingProxyType({**self.snapshot.get(game_id), **changes})
+        return self.snapshot.get(game_id)
+
+    def update(self, game_id: str, **changes) -> Optional[Mapping]:
+        """暂存对游戏的修改，返回修改后的游戏；游戏不存在时返回 None"""
+        changes.pop('id', None)
+        if game_id in self._added:
+            self._added[game_id] = {**self._added[game_id], **changes}
+        elif game_id in self.snapshot and game_id not in self._removed:
+            self._changes.setdefault(game_id, {}).update(changes)
+        else:
+            return None
+        return self.get(game_id)
+
+    def add(self, game: Dict) -> Mapping:
+        """暂存新增的游戏（没有ID时分配新ID）"""
+        game = {**game}
+        if not game.get('id') or game['id'] in self or game['id'] in self.snapshot:
+            game['id'] = GameLibrary.new_id()
+        self._added[game['id']] = game
+        return MappingProxyType(game)
+
+    def remove(self, game_id: str):
+        """暂存删除游戏"""
+        self._added.pop(game_id, None)
+        self._changes.pop(game_id, None)
+        if game_id in self.snapshot:
+            self._removed.add(game_id)
+
+    @property
+    def changed_ids(self) -> Set[str]:
+        """有暂存修改（包括新增和删除）的游戏ID"""
+        return set(self._changes) | set(self._added) | self._removed
+
+    def delta(self) -> Tuple[Dict[str, Dict], List[Dict], List[str]]:
+        """暂存的修改：(游戏ID -> 与快照不同的字段, 新增的游戏, 删除的游戏ID)
+
+        和快照中的值相同的字段会被忽略，没有字段变化的游戏不出现在结果中。
+        """
+        changes = {}
+        for game_id, fields in self._changes.items():
+            original = self.snapshot.get(game_id)
+            changed = {field: value for field, value in fields.items()
+                       if field not in original or original[field] != value}
+            if changed:
+                changes[game_id] = changed
+        return changes, [dict(game) for game in self._added.values()], sorted(self._removed)
@@ -4,9 +4,18 @@
 """
 
 import os
-import winreg
+import asyncio
 import threading
-from typing import List, Dict, Optional
+import queue
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+from scan_engine import ScanEngine, CancelToken
+from game_size import measured_size, migrate_size, size_fields
+from size_cache import SizeCache
+from scan_snapshot import ScanSnapshot
+from keyword_classifier import KeywordClassifier
+from dedup_index import DedupIndex
+from exe_resolver import ExecutableResolver
+from registry_provider import RegistryKey, RegistryProvider, default_registry_provider
 
 class GameScanner:
     """游戏扫描器类"""
@@ -57,14 +66,55 @@ class GameScanner:
         'mcafee', 'kaspersky', 'norton', 'avg', 'avast'
     ]
     
-    def __init__(self, existing_games: List[Dict] = None):
+    # 可选的扫描来源
+    SOURCES = ('registry', 'custom')
+    
+    # 编译好的分类器缓存：配置文件 -> (修改时间, KeywordClassifier)，每个配置文件只保留最新的一个
+    _classifier_cache: Dict[Optional[str], Tuple[Optional[float], KeywordClassifier]] = {}
+    
+    def __init__(self, existing_games: Iterable[Mapping] = None, size_cache: SizeCache = None,
+                 snapshot: ScanSnapshot = None, classifier: KeywordClassifier = None,
+                 dedup_index: DedupIndex = None, registry_provider: RegistryProvider = None):
         """初始化扫描器"""
         self.existing_games = existing_games or []
+        # 已有游戏的去重索引；每次扫描在副本上追加，同一次扫描内的重复也会被过滤
+        self.base_dedup_index = dedup_index or DedupIndex(self.existing_games)
+        self.dedup_index = self.base_dedup_index.copy()
+        self.classifier = classifier or self.build_classifier()
+        self.size_cache = size_cache or SizeCache()
+        self.snapshot = snapshot or ScanSnapshot()
         self.scanned_games: List[Dict] = []
+        # 增量扫描与上一次快照相比的差异：{'added': [...], 'removed': [...], 'changed': [...]}
+        self.scan_diff: Dict[str, List[Dict]] = {'added': [], 'removed': [], 'changed': []}
         self.scan_callback = None
         self.progress_callback = None
+        # 设置后扫描结果和进度通过线程安全队列传递，而不是在扫描线程中直接调用回调
+        self.event_queue: Optional[queue.Queue] = None
         self.is_scanning = False
         self.custom_directories: List[str] = []
+        # 取消令牌和时间预算（秒，None 表示不限制）
+        self.cancel_token = CancelToken()
+        self.time_budget: Optional[float] = None
+        self.directory_time_budget: Optional[float] = None
+        self.engine = ScanEngine()
+        self.exe_resolver = ExecutableResolver()
+        # 注册表数据源：Windows 上读取本机注册表，其他平台可以传入快照文件数据源
+        self.registry_provider = registry_provider or default_registry_provider()
+        
+    @classmethod
+    def build_classifier(cls, config_file: str = None) -> KeywordClassifier:
+        """编译关键词分类器，可合并用户关键词配置文件；结果按配置文件修改时间缓存"""
+        mtime = None
+        if config_file and os.path.exists(config_file):
+            mtime = os.path.getmtime(config_file)
+        cached = cls._classifier_cache.get(config_file)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        # 配置文件修改后替换掉旧的分类器
+        classifier = KeywordClassifier.from_config(
+            config_file, cls.GAME_KEYWORDS, cls.EXCLUDE_KEYWORDS, cls.SOFTWARE_PUBLISHERS)
+        cls._classifier_cache[config_file] = (mtime, classifier)
+        return classifier
         
     def set_scan_callback(self, callback):
         """设置扫描回调函数"""
@@ -74,160 +124,244 @@ class GameScanner:
         """设置进度回调函数"""
         self.progress_callback = callback
     
+    def set_event_queue(self, event_queue: queue.Queue):
+        """设置事件队列：扫描线程放入 ('game', 游戏信息)、('progress', (进度, 消息)) 和结束时的 ('done', None)"""
+        self.event_queue = event_queue
+    
+    def _emit_game(self, game_info: Dict):
+        """发送找到的游戏"""
+        if self.event_queue is not None:
+            self.event_queue.put(('game', game_info))
+        elif self.scan_callback:
+            self.scan_callback(game_info)
+    
+    def _emit_progress(self, progress: int, message: str):
+        """发送扫描进度"""
+        if self.event_queue is not None:
+            self.event_queue.put(('progress', (progress, message)))
+        elif self.progress_callback:
+            self.progress_callback(progress, message)
+    
     def set_custom_directories(self, directories: List[str]):
         """设置自定义扫描目录"""
         self.custom_directories = directories
+    
+    def set_time_budget(self, total: Optional[float] = None, per_directory: Optional[float] = None):
+        """设置整体扫描和单个目录（安装目录或自定义目录）的时间预算，单位秒"""
+        self.time_budget = total
+        self.directory_time_budget = per_directory
+    
+    def cancel(self):
+        """取消正在进行的扫描，已找到的结果会保留"""
+        self.cancel_token.cancel()
+    
+    @property
+    def was_cancelled(self) -> bool:
+        """扫描是否被取消或超出了整体时间预算"""
+        return self.cancel_token.cancelled
         
-    def scan_registry(self) -> List[Dict]:
+    def scan_registry(self, incremental: bool = False) -> List[Dict]:
         """扫描Windows注册表中的游戏"""
         games = []
-        registry_paths = [
-            (winreg.HKEY_LOCAL_MACHINE, r'SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall'),
-            (winreg.HKEY_LOCAL_MACHINE, r'SOFTWARE\WOW6432Node\Microsoft\Windows\CurrentVersion\Uninstall'),
-            (winreg.HKEY_CURRENT_USER, r'SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall'),
-        ]
-        
-        total_keys = 0
-        current_key = 0
+        for game_info in self._iter_registry(incremental):
+            games.append(game_info)
+            self._emit_game(game_info)
+        return games
+    
+    def _iter_registry(self, incremental: bool = False) -> Iterator[Dict]:
+        """逐个产出注册表中识别出的游戏（已去重）
+
+        incremental 为 True 时，最后写入时间和安装目录都没有变化的键直接复用快照中的结果。
+        """
+        previous = self.snapshot.registry
+        current = {}
         
         # 计算总键数
-        for root_key, sub_key in registry_paths:
-            try:
-                key = winreg.OpenKey(root_key, sub_key)
-                total_keys += winreg.QueryInfoKey(key)[0]
-                winreg.CloseKey(key)
-            except:
-                pass
+        total_keys = max(self.registry_provider.count_keys(), 1)
+        current_key = 0
         
         # 扫描注册表
-        for root_key, sub_key in registry_paths:
-            try:
-                key = winreg.OpenKey(root_key, sub_key)
-                for i in range(winreg.QueryInfoKey(key)[0]):
-                    try:
-                        sub_key_name = winreg.EnumKey(key, i)
-                        sub_key_path = fr'{sub_key}\{sub_key_name}'
-                        
-                        if self.progress_callback:
-                            current_key += 1
-                            progress = int((current_key / total_keys) * 100)
-                            self.progress_callback(progress, f'扫描注册表: {sub_key_name}')
-                        
-                        app_key = winreg.OpenKey(root_key, sub_key_path)
-                        
-                        try:
-                            display_name = winreg.QueryValueEx(app_key, 'DisplayName')[0]
-                            publisher = None
-                            install_location = None
-                            
-                            try:
-                                publisher = winreg.QueryValueEx(app_key, 'Publisher')[0]
-                            except:
-                                pass
-                            
-                            try:
-                                install_location = winreg.QueryValueEx(app_key, 'InstallLocation')[0]
-                            except:
-                                try:
-                                    install_location = winreg.QueryValueEx(app_key, 'InstallPath')[0]
-                                except:
-                                    pass
-                            
-                            # 检查是否是游戏
-                            if self._is_game(display_name, install_location, publisher):
-                                game_info = {
-                                    'name': display_name,
-                                    'platform': self._detect_platform(display_name, install_location),
-                                    'executable': self._find_executable(install_location),
-                                    'directory': install_location,
-                                    'size': self._calculate_size(install_location) if install_location else '未知'
-                                }
-                                
-                                if not self._is_duplicate(game_info):
-                                    games.append(game_info)
-                                    if self.scan_callback:
-                                        self.scan_callback(game_info)
-                        
-                        finally:
-                            winreg.CloseKey(app_key)
-                            
-                    except Exception as e:
-                        continue
-                        
-                winreg.CloseKey(key)
-            except Exception as e:
-                continue
+        finished = False
+        try:
+            for key in self.registry_provider.iter_keys():
+                if self.cancel_token.cancelled:
+                    break
                 
-        return games
+                current_key += 1
+                progress = min(int((current_key / total_keys) * 100), 100)
+                self._emit_progress(progress, f'扫描注册表: {key.name}')
+                
+                game_info = self._read_registry_key(key, incremental, previous, current)
+                if game_info and self.dedup_index.add_if_new(game_info):
+                    yield game_info
+            finished = not self.cancel_token.cancelled
+        finally:
+            if not finished:
+                # 扫描中途停止：没有检查到的键保留上一次的记录
+                current = {**previous, **current}
+            self.snapshot.registry = current
+    
+    def _read_registry_key(self, key: RegistryKey, incremental: bool,
+                           previous: Dict, current: Dict) -> Optional[Dict]:
+        """检查单个卸载键，返回识别出的游戏信息，并把结果记入 current 快照"""
+        try:
+            cached = previous.get(key.key_id)
+            if (incremental and cached and cached.get('last_write') == key.last_write
+                    and self._dir_mtime(cached.get('directory')) == cached.get('dir_mtime')):
+                # 注册表键和安装目录都没有变化，复用上次的结果
+                current[key.key_id] = cached
+                game_info = cached.get('game')
+                if not game_info:
+                    return None
+                # 旧版本快照中的大小是显示文字
+                game_info = dict(game_info)
+                migrate_size(game_info)
+                return game_info
+            
+            dir_token = self.cancel_token.child(self.directory_time_budget)
+            values = self.registry_provider.read_values(key)
+            game_info, install_location = self._read_registry_game(values, dir_token)
+            # 超时或取消时结果不完整，不写入快照，下次重新读取
+            if not dir_token.cancelled:
+                current[key.key_id] = {
+                    'last_write': key.last_write,
+                    'directory': install_location,
+                    'dir_mtime': self._dir_mtime(install_location),
+                    'game': game_info,
+                }
+            return game_info
+        except Exception:
+            return None
+    
+    def _read_registry_game(self, values: Dict, token: Optional[CancelToken] = None):
+        """根据卸载键的值识别游戏，返回 (游戏信息或None, 安装目录)"""
+        display_name = values.get('DisplayName')
+        publisher = values.get('Publisher')
+        install_location = values['InstallLocation'] if 'InstallLocation' in values else values.get('InstallPath')
+        display_icon = values.get('DisplayIcon')
+        
+        # 没有DisplayName的键也会记入快照，下次增量扫描可以直接跳过
+        if not display_name or not isinstance(display_name, str):
+            return None, install_location
+        
+        # 检查是否是游戏
+        if not self._is_game(display_name, install_location, publisher):
+            return None, install_location
+        
+        game_info = {
+            'name': display_name,
+            'platform': self._detect_platform(display_name, install_location),
+            'executable': self._find_executable(install_location, display_name, display_icon, token),
+            'directory': install_location,
+            **self._calculate_size(install_location, token)
+        }
+        return game_info, install_location
     
-    def scan_custom_directories(self) -> List[Dict]:
+    @staticmethod
+    def _dir_mtime(directory: Optional[str]) -> Optional[int]:
+        """获取目录修改时间，作为目录指纹"""
+        if not directory:
+            return None
+        try:
+            return os.stat(directory).st_mtime_ns
+        except OSError:
+            return None
+    
+    def scan_custom_directories(self, incremental: bool = False) -> List[Dict]:
         """扫描自定义目录"""
         games = []
-        
+        for game_info in self._iter_custom_directories(incremental):
+            games.append(game_info)
+            self._emit_game(game_info)
+        return games
+    
+    def _iter_custom_directories(self, incremental: bool = False) -> Iterator[Dict]:
+        """逐个产出自定义目录中识别出的游戏（已去重）
+
+        incremental 为 True 时，所有子目录修改时间都没有变化的目录直接复用快照中的结果。
+        """
         for directory in self.custom_directories:
+            if self.cancel_token.cancelled:
+                break
             if not os.path.exists(directory):
                 continue
             
-            if self.progress_callback:
-                self.progress_callback(50, f'扫描目录: {directory}')
+            self._emit_progress(50, f'扫描目录: {directory}')
+            
+            cached = self.snapshot.directories.get(directory)
+            if incremental and cached and self.snapshot.directory_unchanged(cached.get('dirs')):
+                found = [dict(game) for game in cached.get('games', [])]
+                for game_info in found:
+                    migrate_size(game_info)
+            else:
+                found = self._walk_custom_directory(directory)
             
-            # 扫描目录中的exe文件
-            for root, dirs, files in os.walk(directory):
-                for file in files:
-                    if file.endswith('.exe'):
-                        filepath = os.path.join(root, file)
-                        
-                        # 排除卸载程序和安装程序
-                        if 'unins' in file.lower() or 'setup' in file.lower() or 'install' in file.lower():
-                            continue
-                        
-                        # 检查是否是游戏
-                        if self._is_game(file, os.path.dirname(filepath), None):
-                            game_name = os.path.splitext(file)[0]
-                            game_info = {
-                                'name': game_name,
-                                'platform': self._detect_platform(game_name, os.path.dirname(filepath)),
-                                'executable': filepath,
-                                'directory': os.path.dirname(filepath),
-                                'size': self._calculate_size(os.path.dirname(filepath))
-                            }
-                            
-                            if not self._is_duplicate(game_info):
-                                games.append(game_info)
-                                if self.scan_callback:
-                                    self.scan_callback(game_info)
+            # 取消前已遍历部分中找到的游戏同样保留
+            for game_info in found:
+                if self.dedup_index.add_if_new(game_info):
+                    yield game_info
+    
+    def _walk_custom_directory(self, directory: str) -> List[Dict]:
+        """遍历一个自定义目录并识别其中的游戏，结果写入快照"""
+        found = []
         
-        return games
+        # 单次遍历目录树，同时得到exe列表和各目录大小
+        walk_result = self.engine.walk(directory, self.cancel_token.child(self.directory_time_budget))
+        self.size_cache.store_walk(walk_result)
+        
+        for filepath in walk_result.executables:
+            file = os.path.basename(filepath)
+            file_lower = file.lower()
+            
+            # 排除卸载程序和安装程序
+            if 'unins' in file_lower or 'setup' in file_lower or 'install' in file_lower:
+                continue
+            
+            # 检查是否是游戏
+            game_dir = os.path.dirname(filepath)
+            if self._is_game(file, game_dir, None):
+                game_name = os.path.splitext(file)[0]
+                # 遍历被取消或超时时，没有遍历完的目录只统计了一部分，大小记为未知
+                size_bytes = walk_result.size_of(game_dir)
+                if size_bytes is None:
+                    size = size_fields()
+                else:
+                    size = measured_size(size_bytes, walk_result.files_of(game_dir))
+                found.append({
+                    'name': game_name,
+                    'platform': self._detect_platform(game_name, game_dir),
+                    'executable': filepath,
+                    'directory': game_dir,
+                    **size
+                })
+        
+        # 不完整的遍历结果不能用于下次增量扫描
+        if walk_result.complete:
+            self.snapshot.directories[directory] = {
+                'dirs': dict(walk_result.dir_mtime),
+                'games': [dict(game) for game in found],
+            }
+        else:
+            self.snapshot.directories.pop(directory, None)
+        return found
     
     def _is_game(self, name: str, install_location: str, publisher: str = None) -> bool:
         """判断是否是游戏"""
         if not name:
             return False
-            
-        name_lower = name.lower()
         
         # 检查发布商
-        if publisher:
-            publisher_lower = publisher.lower()
-            for pub in self.SOFTWARE_PUBLISHERS:
-                if pub in publisher_lower:
-                    return False
-        
-        # 检查排除关键词
-        for exclude in self.EXCLUDE_KEYWORDS:
-            if exclude in name_lower:
-                return False
+        if publisher and self.classifier.is_software_publisher(publisher):
+            return False
         
-        # 检查游戏关键词
-        for keyword in self.GAME_KEYWORDS:
-            if keyword in name_lower:
-                return True
+        # 检查排除关键词和游戏关键词（一次匹配，排除关键词优先）
+        hit = self.classifier.classify(name)
+        if hit:
+            return hit[0] == 'include'
         
         # 检查路径中是否包含常见游戏目录
         if install_location:
-            path_lower = install_location.lower()
-            if 'game' in path_lower or 'steamapps' in path_lower or 'wegameapps' in path_lower:
-                return True
+            return self.classifier.is_game_path(install_location)
         
         return False
     
@@ -249,77 +383,142 @@ class GameScanner:
         else:
             return '独立游戏'
     
-    def _find_executable(self, install_location: str) -> Optional[str]:
-        """查找游戏的可执行文件"""
-        if not install_location or not os.path.exists(install_location):
-            return None
-        
-        for root, dirs, files in os.walk(install_location):
-            for file in files:
-                if file.endswith('.exe') and not file.lower().startswith('unins'):
-                    if 'unins' not in file.lower() and 'setup' not in file.lower():
-                        return os.path.join(root, file)
-        
-        return None
+    def _find_executable(self, install_location: str, display_name: str = None,
+                         display_icon: str = None, token: Optional[CancelToken] = None) -> Optional[str]:
+        """查找游戏的可执行文件（有界搜索并按名称相似度等评分）"""
+        return self.exe_resolver.resolve(install_location, display_name, display_icon, token)
     
-    def _calculate_size(self, directory: str) -> str:
-        """计算目录大小"""
+    def _calculate_size(self, directory: Optional[str], token: Optional[CancelToken] = None) -> Dict:
+        """计算目录大小，返回游戏记录中的大小字段（无法计算时大小为 None）"""
         if not directory or not os.path.exists(directory):
-            return '未知'
+            return size_fields()
         
         try:
-            total_size = 0
-            for dirpath, dirnames, filenames in os.walk(directory):
-                for filename in filenames:
-                    filepath = os.path.join(dirpath, filename)
-                    try:
-                        total_size += os.path.getsize(filepath)
-                    except:
-                        pass
-            
-            if total_size >= 1073741824:
-                return f'{total_size / 1073741824:.2f} GB'
-            elif total_size >= 1048576:
-                return f'{total_size / 1048576:.2f} MB'
-            elif total_size >= 1024:
-                return f'{total_size / 1024:.2f} KB'
-            else:
-                return f'{total_size} Bytes'
+            total_size, total_files = self.size_cache.measure(directory, token)
+            if token is not None and token.cancelled:
+                return size_fields()
+            return measured_size(total_size, total_files)
         except:
-            return '未知'
+            return size_fields()
     
-    def _is_duplicate(self, game_info: Dict) -> bool:
-        """检查游戏是否已存在"""
-        for existing in self.existing_games:
-            if existing['name'] == game_info['name']:
-                return True
-            if game_info['executable'] and existing['executable'] == game_info['executable']:
+    def iter_scan(self, sources: Iterable[str] = None, limit: Optional[int] = None,
+                  incremental: bool = False) -> Iterator[Dict]:
+        """按需扫描，识别出一个游戏就产出一个
+
+        sources: 扫描来源，'registry' 和/或 'custom'，默认两者都扫描（custom 需要先设置自定义目录）
+        limit:   最多产出的游戏数，达到后停止扫描
+        调用方不再取值时扫描也随之暂停；提前结束迭代时未检查的部分保留在快照中。
+        """
+        sources = tuple(sources) if sources is not None else self.SOURCES
+        self.dedup_index = self.base_dedup_index.copy()
+        self.cancel_token = CancelToken(self.time_budget)
+        return self._iter_sources(sources, limit, incremental)
+    
+    def _iter_sources(self, sources, limit, incremental) -> Iterator[Dict]:
+        """依次扫描各来源，结束后计算与上次快照的差异并保存快照"""
+        scanned_dirs = self.custom_directories if 'custom' in sources else []
+        previous_games = self.snapshot.games_by_key(scanned_dirs)
+        count = 0
+        try:
+            iterators = []
+            if 'registry' in sources:
+                iterators.append(self._iter_registry(incremental))
+            if scanned_dirs:
+                iterators.append(self._iter_custom_directories(incremental))
+            for iterator in iterators:
+                try:
+                    for game_info in iterator:
+                        yield game_info
+                        count += 1
+                        if limit is not None and count >= limit:
+                            return
+                finally:
+                    iterator.close()
+        finally:
+            self.scan_diff = self.snapshot.diff(previous_games, self.snapshot.games_by_key(scanned_dirs))
+            self.snapshot.save()
+            self.size_cache.save()
+    
+    async def ascan(self, sources: Iterable[str] = None, limit: Optional[int] = None,
+                    incremental: bool = False, buffer_size: int = 16) -> AsyncIterator[Dict]:
+        """异步扫描：async for game in scanner.ascan(): ...
+
+        扫描在后台线程中进行，最多有 buffer_size 个结果等待调用方取走，
+        超过时扫描线程暂停；调用方提前退出时扫描被取消。
+        """
+        loop = asyncio.get_running_loop()
+        buffer: asyncio.Queue = asyncio.Queue()
+        slots = threading.Semaphore(buffer_size)
+        end = object()
+        games = self.iter_scan(sources, limit, incremental)
+        
+        def deliver(item) -> bool:
+            try:
+                loop.call_soon_threadsafe(buffer.put_nowait, item)
                 return True
-        return False
+            except RuntimeError:
+                # 事件循环已经关闭
+                return False
+        
+        def produce():
+            try:
+                for game_info in games:
+                    # 缓冲区满时等待调用方取走结果（背压），同时响应取消
+                    while not slots.acquire(timeout=0.1):
+                        if self.cancel_token.cancelled:
+                            return
+                    if not deliver(game_info):
+                        return
+            finally:
+                games.close()
+                deliver(end)
+        
+        producer = loop.run_in_executor(None, produce)
+        finished = False
+        try:
+            while True:
+                game_info = await buffer.get()
+                if game_info is end:
+                    finished = True
+                    break
+                slots.release()
+                yield game_info
+        finally:
+            if finished:
+                await producer
+            else:
+                # 调用方提前退出：取消扫描，扫描线程会自行结束
+                self.cancel()
     
-    def start_scan(self, scan_custom_dirs: bool = False):
+    def start_scan(self, scan_custom_dirs: bool = False, incremental: bool = False,
+                   scan_registry: bool = True):
         """开始扫描（在后台线程中）"""
         if self.is_scanning:
             return
         
         self.is_scanning = True
         self.scanned_games = []
+        sources = []
+        if scan_registry:
+            sources.append('registry')
+        if scan_custom_dirs:
+            sources.append('custom')
+        games = self.iter_scan(sources, incremental=incremental)
         
         def scan_thread():
             try:
-                # 先扫描注册表
-                games = self.scan_registry()
-                
-                # 如果启用，再扫描自定义目录
-                if scan_custom_dirs and self.custom_directories:
-                    custom_games = self.scan_custom_directories()
-                    games.extend(custom_games)
+                for game_info in games:
+                    self.scanned_games.append(game_info)
+                    self._emit_game(game_info)
                 
-                self.scanned_games = games
-                if self.progress_callback:
-                    self.progress_callback(100, '扫描完成')
+                if self.was_cancelled:
+                    self._emit_progress(100, '扫描已停止')
+                else:
+                    self._emit_progress(100, '扫描完成')
             finally:
                 self.is_scanning = False
+                if self.event_queue is not None:
+                    self.event_queue.put(('done', None))
         
         thread = threading.Thread(target=scan_thread)
         thread.daemon = True
@@ -0,0 +1,66 @@
+"""
+游戏大小模块
+游戏记录中的大小以字节数保存（size_bytes/file_count/measured_at），只在显示时格式化
+"""
+
+import re
+import time
+from typing import Dict, Optional
+
+# 未知或无法计算的大小显示为这个文字
+UNKNOWN_SIZE_TEXT = '未知'
+
+_UNITS = {'b': 1, 'byte': 1, 'bytes': 1, 'kb': 1024, 'mb': 1024 ** 2, 'gb': 1024 ** 3, 'tb': 1024 ** 4}
+_SIZE_PATTERN = re.compile(r'^\s*([0-9]+(?:\.[0-9]+)?)\s*([a-zA-Z]*)\s*$')
+
+
+def format_size(total_size: int) -> str:
+    """将字节数格式化为显示字符串"""
+    if total_size >= 1073741824:
+        return f'{total_size / 1073741824:.2f} GB'
+    elif total_size >= 1048576:
+        return f'{total_size / 1048576:.2f} MB'
+    elif total_size >= 1024:
+        return f'{total_size / 1024:.2f} KB'
+    else:
+        return f'{total_size} Bytes'
+
+
+def parse_size(text: Optional[str]) -> Optional[int]:
+    """把 "12.34 GB"、"512 KB"、"100 Bytes" 之类的文字解析为字节数，无法解析时返回 None"""
+    if not text:
+        return None
+    match = _SIZE_PATTERN.match(text)
+    if not match:
+        return None
+    unit = _UNITS.get((match.group(2) or 'b').lower())
+    if unit is None:
+        return None
+    return int(round(float(match.group(1)) * unit))
+
+
+def size_fields(size_bytes: Optional[int] = None, file_count: Optional[int] = None,
+                measured_at: Optional[float] = None) -> Dict:
+    """游戏记录中的大小字段，未知的值为 None"""
+    return {'size_bytes': size_bytes, 'file_count': file_count, 'measured_at': measured_at}
+
+
+def measured_size(size_bytes: int, file_count: int) -> Dict:
+    """刚测量得到的大小字段，测量时间为当前时间"""
+    return size_fields(size_bytes, file_count, time.time())
+
+
+def size_text(game: Dict) -> str:
+    """游戏大小的显示文字"""
+    size_bytes = game.get('size_bytes')
+    return format_size(size_bytes) if size_bytes is not None else UNKNOWN_SIZE_TEXT
+
+
+def migrate_size(game: Dict) -> bool:
+    """把旧数据中的大小文字（'size' 字段）转换为字节数（原地修改），返回是否有修改"""
+    if 'size' not in game:
+        return False
+    size = game.pop('size')
+    if 'size_bytes' not in game:
+        game.update(size_fields(parse_size(size)))
+    return True
@@ -0,0 +1,110 @@
+"""
+关键词分类器模块
+将游戏关键词、排除关键词和发布商列表编译成正则，一次扫描完成匹配
+"""
+
+import json
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """把关键词列表构造成按公共前缀合并的正则（等价于一棵前缀树）"""
+    trie: Dict = {}
+    for word in words:
+        if not word:
+            continue
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node: Dict) -> str:
+        is_end = '' in node
+        branches = [re.escape(char) + build(child)
+                    for char, child in sorted(node.items()) if char != '']
+        if not branches:
+            return ''
+        if len(branches) == 1 and not is_end:
+            return branches[0]
+        body = '(?:' + '|'.join(branches) + ')'
+        return body + '?' if is_end else body
+
+    return build(trie)
+
+
+class KeywordClassifier:
+    """编译后的关键词分类器
+
+    classify() 在名称上只扫描一遍：遇到排除关键词立即返回，
+    否则返回第一个命中的游戏关键词。
+    """
+
+    CONFIG_FILENAME = "keywords.json"
+
+    # 路径中出现这些片段时视为游戏目录
+    PATH_KEYWORDS = ['game', 'steamapps', 'wegameapps']
+
+    def __init__(self, game_keywords: List[str], exclude_keywords: List[str],
+                 software_publishers: List[str], path_keywords: List[str] = None):
+        self.game_keywords = self._normalize(game_keywords)
+        self.exclude_keywords = self._normalize(exclude_keywords)
+        self.software_publishers = self._normalize(software_publishers)
+        self.path_keywords = self._normalize(path_keywords if path_keywords is not None else self.PATH_KEYWORDS)
+
+        # 每个位置先尝试排除关键词，再尝试游戏关键词；前瞻断言保证重叠的关键词也能被发现
+        self._name_pattern = re.compile('(?=(?P<exclude>{})|(?P<include>{}))'.format(
+            _trie_pattern(self.exclude_keywords) or '(?!)',
+            _trie_pattern(self.game_keywords) or '(?!)'))
+        self._publisher_pattern = re.compile(_trie_pattern(self.software_publishers) or '(?!)')
+        self._path_pattern = re.compile(_trie_pattern(self.path_keywords) or '(?!)')
+
+    @staticmethod
+    def _normalize(words: Iterable[str]) -> List[str]:
+        """小写并去重，保持原有顺序"""
+        return list(dict.fromkeys(w.lower() for w in words if w))
+
+    @classmethod
+    def from_config(cls, config_file: Optional[str], game_keywords: List[str],
+                    exclude_keywords: List[str], software_publishers: List[str]) -> 'KeywordClassifier':
+        """在内置关键词基础上合并用户配置文件中的关键词
+
+        配置文件格式：{"game_keywords": [...], "exclude_keywords": [...],
+                      "software_publishers": [...], "path_keywords": [...]}
+        """
+        extra = {}
+        if config_file and os.path.exists(config_file):
+            try:
+                with open(config_file, 'r', encoding='utf-8') as f:
+                    extra = json.load(f)
+            except Exception as e:
+                print(f"加载关键词配置失败: {e}")
+                extra = {}
+        return cls(
+            list(game_keywords) + extra.get('game_keywords', []),
+            list(exclude_keywords) + extra.get('exclude_keywords', []),
+            list(software_publishers) + extra.get('software_publishers', []),
+            cls.PATH_KEYWORDS + extra.get('path_keywords', []),
+        )
+
+    def classify(self, name: str) -> Optional[Tuple[str, str]]:
+        """返回 ('exclude', 关键词) / ('include', 关键词)，都没有命中时返回 None"""
+        first_include = None
+        for match in self._name_pattern.finditer(name.lower()):
+            exclude = match.group('exclude')
+            if exclude is not None:
+                return 'exclude', exclude
+            if first_include is None:
+                first_include = match.group('include')
+        if first_include is not None:
+            return 'include', first_include
+        return None
+
+    def is_software_publisher(self, publisher: str) -> bool:
+        """是否是明确的非游戏软件发布商"""
+        return self._publisher_pattern.search(publisher.lower()) is not None
+
+    def is_game_path(self, path: str) -> bool:
+        """路径中是否包含常见游戏目录"""
+        return self._path_pattern.search(path.lower()) is not None
@@ -0,0 +1,139 @@
+"""
+游戏启动管理模块
+在后台线程中启动游戏进程，记录运行中的进程并等待它们退出
+"""
+
+import os
+import queue
+import subprocess
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+
+class LaunchEvent:
+    """启动过程中的事件，交给界面线程处理
+
+    kind 为 'started'（进程已启动）、'failed'（启动失败）或 'exited'（进程已退出）。
+    """
+
+    def __init__(self, kind: str, key: str, name: str, pid: Optional[int] = None,
+                 latency: Optional[float] = None, started_at: Optional[float] = None,
+                 ended_at: Optional[float] = None, returncode: Optional[int] = None,
+                 error: Optional[str] = None):
+        self.kind = kind
+        self.key = key
+        self.name = name
+        self.pid = pid
+        # 从点击启动到进程创建完成的耗时（秒）
+        self.latency = latency
+        # 进程启动和退出的时间（time.time()）
+        self.started_at = started_at
+        self.ended_at = ended_at
+        self.returncode = returncode
+        self.error = error
+
+
+class RunningProcess:
+    """一个正在启动或运行中的进程
+
+    由界面线程创建，pid/process/started_at 只由负责启动的后台线程在进程创建后写入一次。
+    """
+
+    def __init__(self, key: str, name: str):
+        self.key = key
+        self.name = name
+        self.pid: Optional[int] = None
+        self.process: Optional[subprocess.Popen] = None
+        self.started_at: Optional[float] = None
+
+
+class LaunchManager:
+    """游戏启动管理器
+
+    launch() 只在界面线程中登记启动请求，检查文件和创建进程都在后台线程中进行，
+    进程创建后由同一个线程等待它退出。同一个游戏（同一个 key）在启动中或运行中时
+    不会再次启动。启动、失败和退出事件通过队列交给界面线程，由 after() 轮询后调用 on_event。
+    """
+
+    # 检查启动事件的间隔（毫秒）
+    POLL_MS = 100
+
+    def __init__(self, widget, on_event: Callable[[LaunchEvent], None]):
+        self.widget = widget
+        self.on_event = on_event
+        self._events = queue.Queue()
+        # key -> 启动中或运行中的进程，只在界面线程中修改
+        self.running: Dict[str, RunningProcess] = {}
+        self._poll_id = None
+
+    def is_running(self, key: str) -> bool:
+        """游戏是否正在启动或运行"""
+        return key in self.running
+
+    def running_processes(self) -> List[RunningProcess]:
+        """启动中和运行中的进程（按启动顺序）"""
+        return list(self.running.values())
+
+    def launch(self, key: str, name: str, executable: str, args: str = '',
+               working_dir: Optional[str] = None) -> bool:
+        """在后台启动程序；同一个 key 已经在启动中或运行中时返回 False"""
+        if key in self.running:
+            return False
+        entry = RunningProcess(key, name)
+        self.running[key] = entry
+        clicked_at = time.perf_counter()
+        threading.Thread(target=self._run, args=(entry, executable, args, working_dir, clicked_at),
+                         daemon=True).start()
+        if self._poll_id is None:
+            self._poll_id = self.widget.after(self.POLL_MS, self._poll)
+        return True
+
+    def _run(self, entry: RunningProcess, executable: str, args: str,
+             working_dir: Optional[str], clicked_at: float):
+        """后台线程：检查文件、创建进程并等待进程退出
+
+        任何异常都会转换为 'failed'（进程创建前）或 'exited'（进程创建后，returncode 为 None）事件，
+        保证界面线程总能把这个游戏从 running 中移除。
+        """
+        key, name = entry.key, entry.name
+        try:
+            if not executable or not os.path.exists(executable):
+                self._events.put(LaunchEvent('failed', key, name, error=f"文件不存在:\n{executable}"))
+                return
+            # 设置工作目录为游戏安装目录，确保游戏能找到数据文件
+            if not working_dir or not os.path.exists(working_dir):
+                working_dir = os.path.dirname(executable)
+            cmd = [executable]
+            if args:
+                cmd.extend(args.split())
+            process = subprocess.Popen(cmd, cwd=working_dir)
+            latency = time.perf_counter() - clicked_at
+            started_at = time.time()
+            entry.process, entry.pid, entry.started_at = process, process.pid, started_at
+            self._events.put(LaunchEvent('started', key, name, pid=process.pid,
+                                         latency=latency, started_at=started_at))
+            returncode = process.wait()
+        except Exception as e:
+            if entry.started_at is None:
+                self._events.put(LaunchEvent('failed', key, name, error=str(e)))
+            else:
+                self._events.put(LaunchEvent('exited', key, name, pid=entry.pid, started_at=entry.started_at,
+                                             ended_at=time.time(), error=str(e)))
+            return
+        self._events.put(LaunchEvent('exited', key, name, pid=process.pid, started_at=started_at,
+                                     ended_at=time.time(), returncode=returncode))
+
+    def _poll(self):
+        """在界面线程中处理后台线程的事件"""
+        self._poll_id = None
+        while True:
+            try:
+                event = self._events.get_nowait()
+            except queue.Empty:
+                break
+            if event.kind != 'started':
+                self.running.pop(event.key, None)
+            self.on_event(event)
+        if self.running:
+            self._poll_id = self.widget.after(self.POLL_MS, self._poll)
@@ -0,0 +1,457 @@
+"""
+游戏库存储模块
+负责读写游戏库文件：写入先写临时文件再原子替换，保存在后台线程中进行
+"""
+
+import json
+import os
+import tempfile
+import threading
+import uuid
+from typing import Callable, Dict, Iterable, List, Optional
+
+from game_library import GameLibrary
+from game_size import format_size, migrate_size
+
+# 使用这些扩展名的游戏库文件保存在 SQLite 数据库中
+SQLITE_EXTENSIONS = ('.db', '.sqlite', '.sqlite3')
+
+
+def migrate_legacy_data(data: Dict) -> Dict:
+    """兼容旧数据：补全分类ID、游戏的 category_id 和游戏ID，
+    并把大小文字转换为字节数（原地修改并返回 data）"""
+    data.setdefault('platforms', [])
+    categories = data.setdefault('categories', [{'name': '全部', 'color': '#95a5a6'}])
+    
+    # 为没有ID的分类生成ID
+    for cat in categories:
+        if 'id' not in cat:
+            cat['id'] = str(uuid.uuid4())
+    
+    # 为没有category_id的游戏根据分类名称添加ID
+    category_ids = {}
+    for cat in categories:
+        category_ids.setdefault(cat['name'], cat['id'])
+    for game in data.setdefault('games', []):
+        if 'category_id' not in game and 'category' in game and game['category'] in category_ids:
+            game['category_id'] = category_ids[game['category']]
+        if not game.get('id'):
+            game['id'] = GameLibrary.new_id()
+        migrate_size(game)
+    return data
+
+
+def open_library_store(path: str, journal: bool = True) -> 'LibraryStore':
+    """根据文件扩展名选择存储方式：.db/.sqlite 使用 SQLite，其他使用 JSON 文件
+
+    journal 为 True 时 JSON 游戏库使用日志模式，单个游戏的修改只追加到日志文件。
+    """
+    if path.lower().endswith(SQLITE_EXTENSIONS):
+        from sqlite_store import SqliteLibraryStore
+        # 同名的 JSON 游戏库会在第一次加载时迁移到数据库中
+        return SqliteLibraryStore(path, os.path.splitext(path)[0] + '.json')
+    if journal:
+        return JournalLibraryStore(path)
+    return JsonLibraryStore(path)
+
+
+def atomic_write_json(path: str, data: Dict, indent: Optional[int] = 2):
+    """把数据写入临时文件并同步到磁盘，再原子地替换目标文件
+
+    写入过程中崩溃或断电时，目标文件要么是旧内容，要么是完整的新内容。
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    # 同步目录，保证重命名本身也落盘（Windows 不支持打开目录）
+    if os.name != 'nt':
+        try:
+            dir_fd = os.open(directory, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        except OSError:
+            pass
+
+
+class LibraryStore:
+    """游戏库存储的接口
+
+    load() 返回 {'games': [...], 'platforms': [...], 'categories': [...]}；
+    save() 保存完整数据。ROW_UPDATES 为 True 的存储还支持 save_changes()，只写入变化的游戏。
+    """
+
+    ROW_UPDATES = False
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def load(self) -> Dict:
+        raise NotImplementedError
+
+    def write(self, data: Dict):
+        """立即保存完整数据"""
+        raise NotImplementedError
+
+    def save(self, data: Dict):
+        """在后台保存完整数据"""
+        raise NotImplementedError
+
+    def save_changes(self, changed_games: Iterable[Dict], removed_ids: Iterable[str],
+                     categories: List[Dict], platforms: List[Dict]):
+        """在后台只保存新增或修改的游戏、删除的游戏，以及分类和平台"""
+        raise NotImplementedError
+
+    def take_error(self) -> Optional[Exception]:
+        """返回并清除最近一次后台写入失败的异常"""
+        return None
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """等待后台写入完成"""
+        return True
+
+    def close(self, timeout: Optional[float] = None):
+        """写完尚未保存的数据并停止后台线程"""
+
+
+class JsonLibraryStore(LibraryStore):
+    """JSON 游戏库文件的读写
+
+    save() 只记录要保存的数据并立即返回，由后台线程序列化和写入；
+    短时间内的多次保存只写入最后一次的数据。传入 save() 的数据之后不应再被修改。
+    """
+
+    # 收到保存请求后等待多久再写入（秒），期间的其他保存请求合并为一次写入
+    COALESCE_DELAY = 0.2
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._pending: Optional[Dict] = None
+        self._writing = False
+        self._closed = False
+        # flush()/close() 要求立即写入，不再等待合并
+        self._urgent = False
+        self._error: Optional[Exception] = None
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def load(self) -> Dict:
+        """读取游戏库文件（文件格式错误时抛出 json.JSONDecodeError）"""
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def write(self, data: Dict):
+        """立即在当前线程中写入（用于创建初始文件等少量数据）"""
+        atomic_write_json(self.path, data)
+
+    def save(self, data: Dict):
+        """在后台保存数据"""
+        with self._condition:
+            if self._closed:
+                raise RuntimeError('游戏库存储已关闭')
+            self._pending = data
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._writer_loop, name='LibraryWriter', daemon=True)
+                self._thread.start()
+            self._condition.notify_all()
+
+    def take_error(self) -> Optional[Exception]:
+        """返回并清除最近一次后台写入失败的异常"""
+        with self._condition:
+            error, self._error = self._error, None
+            return error
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """等待所有保存请求写入完成，超时返回 False"""
+        with self._condition:
+            self._urgent = True
+            self._condition.notify_all()
+            return self._condition.wait_for(lambda: self._pending is None and not self._writing, timeout)
+
+    def close(self, timeout: Optional[float] = None):
+        """写完尚未保存的数据并停止后台线程"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self.flush(timeout)
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _writer_loop(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending is not None or self._closed)
+                if self._pending is None:
+                    return
+                # 等待一小段时间合并连续的保存；flush() 或关闭时立即写入
+                self._condition.wait_for(lambda: self._urgent or self._closed, self.COALESCE_DELAY)
+                data, self._pending = self._pending, None
+                self._urgent = False
+                self._writing = True
+            try:
+                atomic_write_json(self.path, data)
+            except Exception as e:
+                print(f"保存游戏库失败: {e}")
+                with self._condition:
+                    self._error = e
+            finally:
+                with self._condition:
+                    self._writing = False
+                    self._condition.notify_all()
+
+
+class QueuedWriterStore(LibraryStore):
+    """由一个后台线程按顺序执行写入操作的存储
+
+    子类把写入操作放入队列（_enqueue），后台线程每次取出排队中的所有操作，
+    交给 _run_ops() 一起执行。_open_writer()/_close_writer() 管理写入线程独占的资源。
+    """
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._ops: List[Callable] = []
+        self._writing = False
+        self._closed = False
+        self._error: Optional[Exception] = None
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def _open_writer(self):
+        return None
+
+    def _close_writer(self, resource):
+        pass
+
+    def _run_ops(self, resource, ops: List[Callable]):
+        for op in ops:
+            op(resource)
+
+    def _enqueue(self, op: Callable, replace_pending: bool = False):
+        with self._condition:
+            if self._closed:
+                raise RuntimeError('游戏库存储已关闭')
+            if replace_pending:
+                # 完整保存会覆盖之前所有尚未执行的修改
+                self._ops.clear()
+            self._ops.append(op)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._writer_loop, name='LibraryWriter', daemon=True)
+                self._thread.start()
+            self._condition.notify_all()
+
+    def take_error(self) -> Optional[Exception]:
+        with self._condition:
+            error, self._error = self._error, None
+            return error
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._ops and not self._writing, timeout)
+
+    def close(self, timeout: Optional[float] = None):
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self.flush(timeout)
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _writer_loop(self):
+        resource = self._open_writer()
+        try:
+            while True:
+                with self._condition:
+                    self._condition.wait_for(lambda: self._ops or self._closed)
+                    if not self._ops:
+                        return
+                    ops, self._ops = self._ops, []
+                    self._writing = True
+                try:
+                    self._run_ops(resource, ops)
+                except Exception as e:
+                    print(f"保存游戏库失败: {e}")
+                    with self._condition:
+                        self._error = e
+                finally:
+                    with self._condition:
+                        self._writing = False
+                        self._condition.notify_all()
+        finally:
+            self._close_writer(resource)
+
+
+class JournalLibraryStore(QueuedWriterStore):
+    """日志模式的 JSON 游戏库
+
+    游戏库文件是某一时刻的完整快照；之后每次修改以一行 JSON 追加到日志文件
+    （游戏库文件名 + .journal），加载时在快照上重放日志。
+    日志超过 COMPACT_BYTES 或存储关闭时，后台线程把当前数据写成新快照并清空日志。
+    日志中的操作可以重复执行，快照写入后、清空日志前崩溃也不会出错。
+    """
+
+    ROW_UPDATES = True
+    # 日志超过这个大小时合并到快照中
+    COMPACT_BYTES = 512 * 1024
+    JOURNAL_SUFFIX = '.journal'
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self.journal_path = path + self.JOURNAL_SUFFIX
+        # 写入线程维护的当前数据，用于合并快照（游戏ID -> 游戏，保持顺序）
+        self._games: Dict[str, Dict] = {}
+        self._categories: List[Dict] = []
+        self._platforms: List[Dict] = []
+        self._summary: Dict = {}
+
+    # ---- 读取 ----
+
+    def load(self) -> Dict:
+        """读取快照并重放日志"""
+        self.flush()
+        with open(self.path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        # 旧数据缺少ID时，补上的ID必须先写入快照，之后的日志才能引用它们
+        needs_ids = (any('id' not in cat for cat in data.get('categories', []))
+                     or any(not game.get('id') for game in data.get('games', [])))
+        migrate_legacy_data(data)
+        self._set_state(data)
+
+        replayed = self._replay()
+        if needs_ids:
+            self._compact()
+        elif replayed:
+            print(f"已重放 {replayed} 条游戏库修改记录")
+        return {'games': list(self._games.values()), 'platforms': list(self._platforms),
+                'categories': list(self._categories)}
+
+    def _set_state(self, data: Dict):
+        self._games = {game['id']: game for game in data.get('games', [])}
+        self._categories = list(data.get('categories', []))
+        self._platforms = list(data.get('platforms', []))
+        self._summary = dict(data.get('summary', {}))
+
+    def _replay(self) -> int:
+        """在当前数据上重放日志，返回重放的条数（无法解析的行被跳过，例如写入一半的最后一行）"""
+        if not os.path.exists(self.journal_path):
+            return 0
+        count = 0
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"跳过无法解析的日志记录: {line[:80]}")
+                    continue
+                self._apply(entry)
+                count += 1
+        return count
+
+    def _apply(self, entry: Dict):
+        op = entry.get('op')
+        if op == 'put':
+            game = entry['game']
+            # 已有的游戏保持原来的位置
+            self._games[game['id']] = game
+        elif op == 'delete':
+            self._games.pop(entry['id'], None)
+        elif op == 'categories':
+            self._categories = entry['categories']
+        elif op == 'platforms':
+            self._platforms = entry['platforms']
+
+    # ---- 写入（在后台线程中执行） ----
+
+    def _snapshot(self) -> Dict:
+        summary = dict(self._summary)
+        # 写快照本来就要遍历所有游戏，顺便重新汇总总大小
+        total_size = sum(game.get('size_bytes') or 0 for game in self._games.values())
+        summary.update({'total_games': len(self._games), 'total_size': format_size(total_size),
+                        'platforms_count': len(self._platforms), 'categories_count': len(self._categories)})
+        return {'games': list(self._games.values()), 'platforms': self._platforms,
+                'categories': self._categories, 'summary': summary}
+
+    def _compact(self):
+        """把当前数据写成新快照并清空日志"""
+        atomic_write_json(self.path, self._snapshot())
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, 'w', encoding='utf-8'):
+                pass
+
+    def _append(self, entries: List[Dict]):
+        """把修改追加到日志并同步到磁盘"""
+        lines = ''.join(json.dumps(entry, ensure_ascii=False) + '\n' for entry in entries)
+        with open(self.journal_path, 'a', encoding='utf-8') as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def write(self, data: Dict):
+        self.save(data)
+        self.flush()
+
+    def save(self, data: Dict):
+        def replace_all(_):
+            self._set_state(data)
+            self._compact()
+
+        self._enqueue(replace_all, replace_pending=True)
+
+    def save_changes(self, changed_games: Iterable[Dict], removed_ids: Iterable[str],
+                     categories: List[Dict], platforms: List[Dict]):
+        entries = [{'op': 'put', 'game': game} for game in changed_games]
+        entries.extend({'op': 'delete', 'id': game_id} for game_id in removed_ids)
+
+        def append(_):
+            # 分类和平台只在变化时记录
+            all_entries = list(entries)
+            if categories != self._categories:
+                all_entries.append({'op': 'categories', 'categories': categories})
+            if platforms != self._platforms:
+                all_entries.append({'op': 'platforms', 'platforms': platforms})
+            if not all_entries:
+                return
+            self._append(all_entries)
+            for entry in all_entries:
+                self._apply(entry)
+
+        self._enqueue(append)
+
+    def _run_ops(self, resource, ops: List[Callable]):
+        super()._run_ops(resource, ops)
+        self._compact_if_needed(self.COMPACT_BYTES)
+
+    def close(self, timeout: Optional[float] = None):
+        """合并日志后关闭，退出时游戏库文件总是完整的"""
+        with self._condition:
+            closed = self._closed
+        if not closed:
+            self._enqueue(lambda _: self._compact_if_needed(0))
+        super().close(timeout)
+
+    def _compact_if_needed(self, threshold: int):
+        """日志超过 threshold 字节时合并"""
+        try:
+            journal_size = os.path.getsize(self.journal_path)
+        except OSError:
+            return
+        if journal_size > threshold:
+            self._compact()
@@ -0,0 +1,134 @@
+"""
+游玩统计模块
+每次游戏会话（开始时间、结束时间、返回值）以一行追加到会话日志，
+同时增量维护每个游戏的游玩时间、最后游玩时间和启动次数，排序和统计面板只读取这些汇总
+"""
+
+import bisect
+import json
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+# 可以排序的汇总字段
+SORT_FIELDS = ('last_played', 'play_time', 'launch_count')
+
+
+def format_play_time(seconds: float) -> str:
+    """将游玩秒数格式化为显示字符串"""
+    if seconds >= 3600:
+        return f'{seconds / 3600:.1f} 小时'
+    elif seconds >= 60:
+        return f'{int(seconds // 60)} 分钟'
+    else:
+        return f'{int(seconds)} 秒'
+
+
+def format_played_at(timestamp: Optional[float]) -> str:
+    """最后游玩时间的显示字符串"""
+    if timestamp is None:
+        return '-'
+    return time.strftime('%Y-%m-%d %H:%M', time.localtime(timestamp))
+
+
+class PlayStats:
+    """游玩记录和汇总
+
+    会话日志每行是一个紧凑的 JSON 数组 [游戏ID, 开始时间, 结束时间, 返回值]，只追加不修改。
+    启动时读取一遍日志得到每个游戏的汇总 {'play_time', 'last_played', 'launch_count'}，
+    之后每条新会话只更新对应游戏的汇总和排序索引，排序和统计都不需要重新读取日志。
+    读取日志可以在后台线程中进行（加载游戏库时），之后只在界面线程中使用。
+    """
+
+    LOG_FILENAME = "play_sessions.jsonl"
+
+    def __init__(self, log_file: Optional[str] = None):
+        self.log_file = log_file
+        # 游戏ID -> 汇总
+        self.stats: Dict[str, Dict] = {}
+        # 每个排序字段按 (值, 游戏ID) 升序排列的索引
+        self._orders: Dict[str, List[Tuple[float, str]]] = {field: [] for field in SORT_FIELDS}
+        self.total_play_time = 0.0
+        self.session_count = 0
+        self.load()
+
+    @classmethod
+    def for_library(cls, data_file: str) -> 'PlayStats':
+        """创建与游戏库文件放在同一目录下的会话日志"""
+        log_dir = os.path.dirname(os.path.abspath(data_file))
+        return cls(os.path.join(log_dir, cls.LOG_FILENAME))
+
+    def load(self):
+        """读取会话日志并重新计算汇总（无法解析的行被跳过，例如写入一半的最后一行）"""
+        self.stats = {}
+        self.total_play_time = 0.0
+        self.session_count = 0
+        if self.log_file and os.path.exists(self.log_file):
+            try:
+                with open(self.log_file, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        try:
+                            game_id, started_at, ended_at, _ = json.loads(line)
+                            # 时间不是数字时在计入汇总之前就会出错，汇总保持不变
+                            self._add_session(game_id, started_at, ended_at)
+                        except (ValueError, TypeError):
+                            print(f"跳过无法解析的游玩记录: {line[:80]}")
+            except OSError as e:
+                print(f"加载游玩记录失败: {e}")
+        # 一次性建立排序索引，不必逐条插入
+        for field, order in self._orders.items():
+            order[:] = sorted((stats[field], game_id) for game_id, stats in self.stats.items())
+
+    def record(self, game_id: str, started_at: float, ended_at: float, returncode: Optional[int]):
+        """记录一次游戏会话：追加到日志并更新汇总"""
+        # 时间只保留一位小数，内存中的汇总使用同样的值，与重新读取日志的结果一致
+        started_at, ended_at = round(started_at, 1), round(ended_at, 1)
+        entry = [game_id, started_at, ended_at, returncode]
+        if self.log_file:
+            try:
+                with open(self.log_file, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n')
+            except OSError as e:
+                print(f"保存游玩记录失败: {e}")
+        old = self.stats.get(game_id)
+        if old is not None:
+            for field in SORT_FIELDS:
+                self._unindex(field, old[field], game_id)
+        stats = self._add_session(game_id, started_at, ended_at)
+        for field in SORT_FIELDS:
+            bisect.insort(self._orders[field], (stats[field], game_id))
+
+    def _add_session(self, game_id: str, started_at: float, ended_at: float) -> Dict:
+        """把一次会话计入游戏的汇总和总计，返回游戏的新汇总"""
+        duration = max(0.0, ended_at - started_at)
+        old = self.stats.get(game_id)
+        # 汇总只整体替换不原地修改，get() 返回的字典不会在之后被改变
+        stats = {
+            'play_time': (old['play_time'] if old else 0.0) + duration,
+            'last_played': max(old['last_played'], ended_at) if old else ended_at,
+            'launch_count': (old['launch_count'] if old else 0) + 1,
+        }
+        self.stats[game_id] = stats
+        self.total_play_time += duration
+        self.session_count += 1
+        return stats
+
+    def _unindex(self, field: str, value: float, game_id: str):
+        order = self._orders[field]
+        position = bisect.bisect_left(order, (value, game_id))
+        if position < len(order) and order[position] == (value, game_id):
+            del order[position]
+
+    def get(self, game_id: str) -> Optional[Dict]:
+        """游戏的汇总，没有玩过时返回 None"""
+        return self.stats.get(game_id)
+
+    def ids_by(self, field: str, descending: bool = True) -> List[str]:
+        """按汇总字段排序的游戏ID（只包含玩过的游戏）"""
+        ids = [game_id for _, game_id in self._orders[field]]
+        if descending:
+            ids.reverse()
+        return ids
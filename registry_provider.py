@@ -0,0 +1,191 @@
+"""
+注册表数据源模块
+为扫描器提供卸载信息（Uninstall 键），支持 Windows 注册表和导出的快照文件
+"""
+
+import json
+import re
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import winreg
+except ImportError:  # 非 Windows 平台
+    winreg = None
+
+
+class RegistryKey:
+    """一个卸载键：key_id 为完整路径（如 HKLM\\SOFTWARE\\...\\Uninstall\\xxx），last_write 为最后写入时间"""
+
+    __slots__ = ('key_id', 'name', 'last_write')
+
+    def __init__(self, key_id: str, name: str, last_write: int):
+        self.key_id = key_id
+        self.name = name
+        self.last_write = last_write
+
+
+class RegistryProvider:
+    """注册表数据源基类；本身不包含任何键，用于没有注册表的平台"""
+
+    UNINSTALL_PATHS = [
+        ('HKLM', r'SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall'),
+        ('HKLM', r'SOFTWARE\WOW6432Node\Microsoft\Windows\CurrentVersion\Uninstall'),
+        ('HKCU', r'SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall'),
+    ]
+
+    def count_keys(self) -> int:
+        """卸载键总数，用于计算进度"""
+        return 0
+
+    def iter_keys(self) -> Iterator[RegistryKey]:
+        """逐个产出卸载键（只包含键名和最后写入时间，不读取值）"""
+        return iter(())
+
+    def read_values(self, key: RegistryKey) -> Dict[str, Any]:
+        """一次读取卸载键下的所有值"""
+        return {}
+
+
+class WinRegProvider(RegistryProvider):
+    """读取本机 Windows 注册表"""
+
+    ROOTS = {'HKLM': 'HKEY_LOCAL_MACHINE', 'HKCU': 'HKEY_CURRENT_USER'}
+
+    def _root(self, root_name: str):
+        return getattr(winreg, self.ROOTS[root_name])
+
+    def count_keys(self) -> int:
+        total = 0
+        for root_name, sub_key in self.UNINSTALL_PATHS:
+            try:
+                with winreg.OpenKey(self._root(root_name), sub_key) as key:
+                    total += winreg.QueryInfoKey(key)[0]
+            except OSError:
+                pass
+        return total
+
+    def iter_keys(self) -> Iterator[RegistryKey]:
+        for root_name, sub_key in self.UNINSTALL_PATHS:
+            try:
+                key = winreg.OpenKey(self._root(root_name), sub_key)
+            except OSError:
+                continue
+            try:
+                for i in range(winreg.QueryInfoKey(key)[0]):
+                    try:
+                        name = winreg.EnumKey(key, i)
+                        with winreg.OpenKey(key, name) as app_key:
+                            last_write = winreg.QueryInfoKey(app_key)[2]
+                    except OSError:
+                        continue
+                    yield RegistryKey(fr'{root_name}\{sub_key}\{name}', name, last_write)
+            finally:
+                winreg.CloseKey(key)
+
+    def read_values(self, key: RegistryKey) -> Dict[str, Any]:
+        root_name, sub_key_path = key.key_id.split('\\', 1)
+        values = {}
+        try:
+            with winreg.OpenKey(self._root(root_name), sub_key_path) as app_key:
+                for i in range(winreg.QueryInfoKey(app_key)[1]):
+                    try:
+                        name, data, _ = winreg.EnumValue(app_key, i)
+                    except OSError:
+                        break
+                    values[name] = data
+        except OSError:
+            pass
+        return values
+
+
+class FileRegistryProvider(RegistryProvider):
+    """从导出的快照文件回放卸载键，用于在没有注册表的机器上测试和性能分析
+
+    支持两种格式：
+    - JSON：{"keys": [{"key": "HKLM\\...\\Uninstall\\xxx", "last_write": 0, "values": {...}}]}
+    - regedit 导出的 .reg 文件（只读取字符串和 dword 值，没有最后写入时间时记为 0）
+    """
+
+    REG_ROOTS = {'HKEY_LOCAL_MACHINE': 'HKLM', 'HKEY_CURRENT_USER': 'HKCU'}
+
+    def __init__(self, snapshot_file: str):
+        self.snapshot_file = snapshot_file
+        self.entries: List[Dict] = []
+        self.load()
+
+    def load(self):
+        """加载快照文件"""
+        if self.snapshot_file.lower().endswith('.reg'):
+            self.entries = self._parse_reg(self._read_reg_text())
+        else:
+            with open(self.snapshot_file, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f).get('keys', [])
+        self._by_key = {entry['key']: entry for entry in self.entries}
+
+    def _read_reg_text(self) -> str:
+        """regedit 默认以 UTF-16 导出，旧格式为 ANSI"""
+        with open(self.snapshot_file, 'rb') as f:
+            raw = f.read()
+        if raw.startswith(b'\xff\xfe') or raw.startswith(b'\xfe\xff'):
+            return raw.decode('utf-16')
+        return raw.decode('utf-8-sig', errors='replace')
+
+    def _parse_reg(self, text: str) -> List[Dict]:
+        """解析 .reg 文件中位于 Uninstall 下一级的键"""
+        entries = []
+        current = None
+        # 行尾的反斜杠表示续行
+        text = re.sub(r'\\\r?\n\s*', '', text)
+        for line in text.splitlines():
+            line = line.strip()
+            if line.startswith('[') and line.endswith(']'):
+                current = None
+                path = line[1:-1]
+                root, _, rest = path.partition('\\')
+                parent, _, name = rest.rpartition('\\')
+                if root in self.REG_ROOTS and parent.lower().endswith(r'\uninstall') and name:
+                    current = {'key': fr'{self.REG_ROOTS[root]}\{rest}', 'last_write': 0, 'values': {}}
+                    entries.append(current)
+            elif current is not None and '=' in line:
+                match = re.match(r'"((?:[^"\\]|\\.)*)"=(.*)', line)
+                if not match:
+                    continue
+                name, data = match.group(1), match.group(2)
+                if data.startswith('"') and data.endswith('"'):
+                    current['values'][self._unescape(name)] = self._unescape(data[1:-1])
+                elif data.startswith('dword:'):
+                    current['values'][self._unescape(name)] = int(data[6:], 16)
+        return entries
+
+    @staticmethod
+    def _unescape(text: str) -> str:
+        return text.replace('\\"', '"').replace('\\\\', '\\')
+
+    def count_keys(self) -> int:
+        return len(self.entries)
+
+    def iter_keys(self) -> Iterator[RegistryKey]:
+        for entry in self.entries:
+            key_id = entry['key']
+            yield RegistryKey(key_id, key_id.rsplit('\\', 1)[-1], entry.get('last_write', 0))
+
+    def read_values(self, key: RegistryKey) -> Dict[str, Any]:
+        entry = self._by_key.get(key.key_id)
+        return dict(entry['values']) if entry else {}
+
+    @staticmethod
+    def export(provider: RegistryProvider, snapshot_file: str):
+        """把任意数据源（通常是本机注册表）导出为 JSON 快照"""
+        keys = [{'key': key.key_id, 'last_write': key.last_write, 'values': provider.read_values(key)}
+                for key in provider.iter_keys()]
+        with open(snapshot_file, 'w', encoding='utf-8') as f:
+            json.dump({'keys': keys}, f, ensure_ascii=False, indent=2, default=str)
+
+
+def default_registry_provider(snapshot_file: Optional[str] = None) -> RegistryProvider:
+    """选择注册表数据源：指定快照文件时回放快照，否则在 Windows 上读取本机注册表"""
+    if snapshot_file:
+        return FileRegistryProvider(snapshot_file)
+    if winreg is not None:
+        return WinRegProvider()
+    return RegistryProvider()
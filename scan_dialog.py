@@ -3,21 +3,35 @@
 用于显示扫描结果和进度
 """
 
+import queue
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-from typing import List, Dict, Callable, Optional
+from typing import List, Dict, Callable, Iterable, Mapping, Optional
+from game_size import size_text
 
 class ScanDialog:
     """扫描对话框类"""
     
-    def __init__(self, parent, existing_games: List[Dict], on_add_selected: Callable):
+    # 处理扫描事件的间隔（毫秒），进度更新按这个帧率合并
+    DRAIN_INTERVAL_MS = 50
+    # 每次最多处理的扫描结果数，避免一次插入太多行阻塞界面
+    MAX_RESULTS_PER_TICK = 200
+    
+    def __init__(self, parent, existing_games: Iterable[Mapping], on_add_selected: Callable,
+                 size_cache=None, snapshot=None, classifier=None, dedup_index=None):
         """初始化扫描对话框"""
         self.parent = parent
         self.existing_games = existing_games
         self.on_add_selected = on_add_selected
+        self.size_cache = size_cache
+        self.snapshot = snapshot
+        self.classifier = classifier
+        self.dedup_index = dedup_index
         self.scanned_games: List[Dict] = []
         self.selected_games: List[Dict] = []
         self.custom_directories: List[str] = []
+        # 扫描线程通过这个队列把结果和进度交给界面线程
+        self.event_queue: queue.Queue = queue.Queue()
         
         # 创建对话框窗口
         self.dialog = tk.Toplevel(parent)
@@ -26,6 +40,7 @@ class ScanDialog:
         self.dialog.configure(bg="#2c3e50")
         self.dialog.transient(parent)
         self.dialog.grab_set()
+        self.dialog.protocol("WM_DELETE_WINDOW", self.close)
         
         # 居中显示
         self.dialog.update_idletasks()
@@ -57,6 +72,11 @@ class ScanDialog:
                        variable=self.scan_registry_var,
                        bg="#2c3e50", fg="#ecf0f1", selectcolor="#2c3e50").pack(anchor=tk.W, padx=10, pady=5)
         
+        self.incremental_var = tk.BooleanVar(value=True)
+        tk.Checkbutton(options_frame, text="增量扫描（只检查上次扫描后变化的项目）", 
+                       variable=self.incremental_var,
+                       bg="#2c3e50", fg="#ecf0f1", selectcolor="#2c3e50").pack(anchor=tk.W, padx=10, pady=5)
+        
         # 自定义目录选择
         dir_frame = tk.Frame(options_frame, bg="#2c3e50")
         dir_frame.pack(fill=tk.X, padx=10, pady=5)
@@ -146,7 +166,7 @@ class ScanDialog:
                                               command=self.deselect_all, state=tk.DISABLED, bg="#95a5a6", fg="#ecf0f1")
         self.deselect_all_button.pack(side=tk.LEFT, padx=(0, 10))
         
-        tk.Button(bottom_frame, text="关闭", command=self.dialog.destroy, bg="#7f8c8d", fg="#ecf0f1").pack(side=tk.RIGHT)
+        tk.Button(bottom_frame, text="关闭", command=self.close, bg="#7f8c8d", fg="#ecf0f1").pack(side=tk.RIGHT)
     
     def toggle_custom_dir_ui(self):
         """切换自定义目录UI状态"""
@@ -172,60 +192,103 @@ class ScanDialog:
         for item in self.results_tree.get_children():
             self.results_tree.delete(item)
         self.scanned_games = []
+        self.event_queue = queue.Queue()
         
         # 更新按钮状态
         self.scan_button.config(state=tk.DISABLED)
         self.stop_button.config(state=tk.NORMAL)
         
         # 创建扫描器
-        self.scanner = GameScanner(self.existing_games)
+        self.scanner = GameScanner(self.existing_games, self.size_cache, self.snapshot,
+                                   self.classifier, self.dedup_index)
         
         # 如果启用了自定义目录，设置自定义目录
         if self.scan_custom_var.get() and self.custom_directories:
             self.scanner.set_custom_directories(self.custom_directories)
         
-        self.scanner.set_scan_callback(self.on_game_found)
-        self.scanner.set_progress_callback(self.on_progress_update)
+        self.scanner.set_event_queue(self.event_queue)
         
         # 开始扫描
-        self.scanner.start_scan(scan_custom_dirs=self.scan_custom_var.get())
+        self.scanner.start_scan(scan_custom_dirs=self.scan_custom_var.get(),
+                                incremental=self.incremental_var.get(),
+                                scan_registry=self.scan_registry_var.get())
         
-        # 定期检查扫描状态
-        self.check_scan_complete()
+        # 定期在界面线程中处理扫描事件
+        self.dialog.after(self.DRAIN_INTERVAL_MS, self.drain_events)
     
     def stop_scan(self):
         """停止扫描"""
         if hasattr(self, 'scanner'):
-            self.scanner.is_scanning = False
-            self.status_label.config(text="扫描已停止")
-            self.scan_button.config(state=tk.NORMAL)
+            # 取消令牌会让扫描线程尽快退出，按钮状态在 on_scan_complete 中恢复
+            self.scanner.cancel()
+            self.status_label.config(text="正在停止扫描...")
             self.stop_button.config(state=tk.DISABLED)
     
-    def check_scan_complete(self):
-        """检查扫描是否完成"""
-        if hasattr(self, 'scanner') and not self.scanner.is_scanning:
-            # 扫描完成
-            self.status_label.config(text=f"扫描完成，找到 {len(self.scanned_games)} 个游戏")
-            self.scan_button.config(state=tk.NORMAL)
-            self.stop_button.config(state=tk.DISABLED)
-            
-            # 启用按钮
-            if self.scanned_games:
-                self.add_button.config(state=tk.NORMAL)
-                self.select_all_button.config(state=tk.NORMAL)
-                self.deselect_all_button.config(state=tk.NORMAL)
+    def close(self):
+        """关闭对话框，同时停止正在进行的扫描"""
+        if hasattr(self, 'scanner'):
+            self.scanner.cancel()
+        self.dialog.destroy()
+    
+    def drain_events(self):
+        """批量处理扫描线程放入队列的事件（在界面线程中执行）"""
+        if not self.dialog.winfo_exists():
+            return
+        
+        new_games = []
+        last_progress = None
+        done = False
+        try:
+            while len(new_games) < self.MAX_RESULTS_PER_TICK:
+                kind, payload = self.event_queue.get_nowait()
+                if kind == 'game':
+                    new_games.append(payload)
+                elif kind == 'progress':
+                    # 同一帧内只保留最新的进度
+                    last_progress = payload
+                elif kind == 'done':
+                    done = True
+                    break
+        except queue.Empty:
+            pass
+        
+        for game in new_games:
+            self.on_game_found(game)
+        if last_progress:
+            self.on_progress_update(*last_progress)
+        
+        if done:
+            self.on_scan_complete()
+        else:
+            self.dialog.after(self.DRAIN_INTERVAL_MS, self.drain_events)
+    
+    def on_scan_complete(self):
+        """扫描结束（完成或停止）后更新界面"""
+        diff = self.scanner.scan_diff
+        if self.scanner.was_cancelled:
+            self.status_label.config(text=f"扫描已停止，已找到 {len(self.scanned_games)} 个游戏")
         else:
-            # 继续检查
-            self.dialog.after(100, self.check_scan_complete)
+            self.status_label.config(text=f"扫描完成，找到 {len(self.scanned_games)} 个游戏"
+                                          f"（与上次相比：新增 {len(diff['added'])}，"
+                                          f"移除 {len(diff['removed'])}，变化 {len(diff['changed'])}）")
+        self.scan_button.config(state=tk.NORMAL)
+        self.stop_button.config(state=tk.DISABLED)
+        
+        # 启用按钮
+        if self.scanned_games:
+            self.add_button.config(state=tk.NORMAL)
+            self.select_all_button.config(state=tk.NORMAL)
+            self.deselect_all_button.config(state=tk.NORMAL)
     
     def on_game_found(self, game: Dict):
         """游戏发现回调"""
         self.scanned_games.append(game)
-        self.results_tree.insert('', tk.END, values=(
+        # 行的iid是结果在 scanned_games 中的下标
+        self.results_tree.insert('', tk.END, iid=str(len(self.scanned_games) - 1), values=(
             False,  # 未选中
             game['name'],
             game['platform'],
-            game['size'],
+            size_text(game),
             game['directory'] or game['executable']
         ))
     
@@ -252,11 +315,7 @@ class ScanDialog:
         for item in selected_items:
             values = self.results_tree.item(item)['values']
             if values[0]:  # 已选中
-                game_name = values[1]
-                for game in self.scanned_games:
-                    if game['name'] == game_name:
-                        selected_games.append(game)
-                        break
+                selected_games.append(self.scanned_games[int(item)])
         
         if selected_games:
             self.on_add_selected(selected_games)
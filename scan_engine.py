@@ -0,0 +1,178 @@
+"""
+目录扫描引擎模块
+基于 os.scandir 的单次遍历目录扫描，同时收集可执行文件和目录大小
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Dict, Optional, Set
+
+
+class CancelToken:
+    """扫描取消令牌
+
+    可以手动取消，也可以设置时间预算；子令牌在父令牌取消或自身超时时都视为取消，
+    用于给单个目录设置单独的时间预算。
+    """
+
+    def __init__(self, timeout: Optional[float] = None, parent: Optional['CancelToken'] = None):
+        self._event = threading.Event()
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+        self.parent = parent
+
+    def cancel(self):
+        """取消扫描"""
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """是否已取消或已超出时间预算"""
+        if self._event.is_set():
+            return True
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            return True
+        return self.parent is not None and self.parent.cancelled
+
+    def child(self, timeout: Optional[float] = None) -> 'CancelToken':
+        """创建带单独时间预算的子令牌"""
+        return CancelToken(timeout, self)
+
+
+class WalkResult:
+    """一次目录遍历的结果"""
+
+    def __init__(self, root: str):
+        self.root = root
+        # 遍历是否完整结束（被取消或超时时为 False，结果只包含已遍历的部分）
+        self.complete = True
+        # 候选可执行文件的完整路径（按发现顺序）
+        self.executables: List[str] = []
+        # 每个目录自身（不含子目录）的文件字节数和文件数
+        self.dir_bytes: Dict[str, int] = {}
+        self.dir_files: Dict[str, int] = {}
+        # 每个目录的修改时间（纳秒），供大小缓存使用
+        self.dir_mtime: Dict[str, int] = {}
+        # 每个目录的直接子目录
+        self.dir_children: Dict[str, List[str]] = {}
+        # 每个目录包含子目录在内的总字节数和总文件数（遍历结束后计算）
+        self.total_bytes: Dict[str, int] = {}
+        self.total_files: Dict[str, int] = {}
+        # 自身和所有子目录都已遍历的目录；遍历不完整时只有这些目录的总大小是准确的
+        self.complete_dirs: Set[str] = set()
+
+    def finalize(self):
+        """自底向上汇总各目录的总大小和文件数"""
+        totals = dict(self.dir_bytes)
+        files = dict(self.dir_files)
+        complete = set()
+        # 路径越长的目录层级越深，先处理子目录再累加到父目录
+        for directory in sorted(self.dir_children, key=len, reverse=True):
+            children = self.dir_children[directory]
+            for child in children:
+                totals[directory] = totals.get(directory, 0) + totals.get(child, 0)
+                files[directory] = files.get(directory, 0) + files.get(child, 0)
+            if self.complete or all(child in complete for child in children):
+                complete.add(directory)
+        self.total_bytes = totals
+        self.total_files = files
+        self.complete_dirs = complete
+
+    def size_of(self, directory: str) -> Optional[int]:
+        """获取目录（含子目录）的总字节数；目录没有完整遍历时返回 None"""
+        if directory not in self.complete_dirs:
+            return None
+        return self.total_bytes.get(directory, 0)
+
+    def files_of(self, directory: str) -> Optional[int]:
+        """获取目录（含子目录）的总文件数；目录没有完整遍历时返回 None"""
+        if directory not in self.complete_dirs:
+            return None
+        return self.total_files.get(directory, 0)
+
+
+class ScanEngine:
+    """目录扫描引擎：每棵目录树只遍历一次，子目录分发到有界线程池"""
+
+    DEFAULT_WORKERS = 8
+
+    def __init__(self, max_workers: int = None):
+        self.max_workers = max_workers or min(self.DEFAULT_WORKERS, (os.cpu_count() or 1) * 2)
+
+    # 单个目录内每读取这么多条目检查一次取消状态
+    CANCEL_CHECK_INTERVAL = 256
+
+    @classmethod
+    def _scan_one(cls, directory: str, token: Optional[CancelToken] = None):
+        """扫描单个目录，返回 (目录, 修改时间, 文件字节数, 文件数, 可执行文件, 子目录)
+
+        中途被取消时返回 None，避免把不完整的目录统计当成结果。
+        """
+        mtime_ns = 0
+        file_bytes = 0
+        file_count = 0
+        executables = []
+        subdirs = []
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns
+            with os.scandir(directory) as it:
+                for index, entry in enumerate(it):
+                    if token and index % cls.CANCEL_CHECK_INTERVAL == 0 and token.cancelled:
+                        return None
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            file_count += 1
+                            file_bytes += entry.stat(follow_symlinks=False).st_size
+                            if entry.name.lower().endswith('.exe'):
+                                executables.append(entry.path)
+                    except OSError:
+                        pass
+        except OSError:
+            pass
+        return directory, mtime_ns, file_bytes, file_count, executables, subdirs
+
+    def walk(self, root: str, token: Optional[CancelToken] = None) -> WalkResult:
+        """遍历目录树，返回可执行文件列表和各目录大小
+
+        token 被取消时尽快停止，已遍历部分的结果仍然保留，result.complete 为 False。
+        """
+        result = WalkResult(root)
+        if not root or not os.path.isdir(root):
+            return result
+
+        pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            pending = {pool.submit(self._scan_one, root, token)}
+            while pending:
+                if token and token.cancelled:
+                    result.complete = False
+                    break
+                done, pending = wait(pending, timeout=0.05, return_when=FIRST_COMPLETED)
+                for future in done:
+                    scanned = future.result()
+                    if scanned is None:
+                        result.complete = False
+                        continue
+                    directory, mtime_ns, file_bytes, file_count, executables, subdirs = scanned
+                    result.dir_mtime[directory] = mtime_ns
+                    result.dir_bytes[directory] = file_bytes
+                    result.dir_files[directory] = file_count
+                    result.dir_children[directory] = subdirs
+                    result.executables.extend(executables)
+                    for subdir in subdirs:
+                        pending.add(pool.submit(self._scan_one, subdir, token))
+        finally:
+            # 不等待排队中的任务；正在执行的任务会在下一次检查取消状态时退出
+            for future in pending:
+                future.cancel()
+            pool.shutdown(wait=False)
+
+        result.finalize()
+        return result
+
+    def walk_many(self, roots: List[str], token: Optional[CancelToken] = None) -> List[WalkResult]:
+        """依次遍历多个根目录"""
+        return [self.walk(root, token) for root in roots]
@@ -0,0 +1,121 @@
+"""
+扫描快照模块
+记录上一次扫描的注册表键和目录指纹，用于增量扫描
+"""
+
+import json
+import os
+from typing import Dict, List, Optional
+
+from library_store import atomic_write_json
+
+
+class ScanSnapshot:
+    """上一次扫描的快照
+
+    registry:    注册表键 -> {'last_write': 键的最后写入时间, 'dir_mtime': 安装目录修改时间, 'game': 识别结果或None}
+    directories: 自定义目录 -> {'dirs': {子目录: 修改时间}, 'games': [识别结果]}
+
+    快照文件在第一次访问 registry/directories 时才读取（通常在扫描线程中），不占用启动时间。
+    """
+
+    SNAPSHOT_FILENAME = "scan_snapshot.json"
+    # 比较两次扫描结果时只看这些字段，measured_at 等每次扫描都会变化的字段不算变化
+    DIFF_FIELDS = ('name', 'executable', 'directory', 'size_bytes', 'file_count')
+
+    def __init__(self, snapshot_file: Optional[str] = None):
+        self.snapshot_file = snapshot_file
+        self._registry: Dict[str, Dict] = {}
+        self._directories: Dict[str, Dict] = {}
+        self._loaded = False
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self.load()
+
+    @property
+    def registry(self) -> Dict[str, Dict]:
+        self._ensure_loaded()
+        return self._registry
+
+    @registry.setter
+    def registry(self, value: Dict[str, Dict]):
+        self._ensure_loaded()
+        self._registry = value
+
+    @property
+    def directories(self) -> Dict[str, Dict]:
+        self._ensure_loaded()
+        return self._directories
+
+    @directories.setter
+    def directories(self, value: Dict[str, Dict]):
+        self._ensure_loaded()
+        self._directories = value
+
+    @classmethod
+    def for_library(cls, data_file: str) -> 'ScanSnapshot':
+        """创建与游戏库文件放在同一目录下的快照"""
+        snapshot_dir = os.path.dirname(os.path.abspath(data_file))
+        return cls(os.path.join(snapshot_dir, cls.SNAPSHOT_FILENAME))
+
+    def load(self):
+        """从快照文件加载"""
+        self._loaded = True
+        if not self.snapshot_file or not os.path.exists(self.snapshot_file):
+            return
+        try:
+            with open(self.snapshot_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self._registry = data.get('registry', {})
+            self._directories = data.get('directories', {})
+        except Exception as e:
+            print(f"加载扫描快照失败: {e}")
+            self._registry = {}
+            self._directories = {}
+
+    def save(self):
+        """保存快照到文件"""
+        # 没有读取过的快照也没有被修改过
+        if not self.snapshot_file or not self._loaded:
+            return
+        data = {'version': 1, 'registry': self.registry, 'directories': self.directories}
+        try:
+            # 先写临时文件再替换，写入中途崩溃不会留下不完整的快照
+            atomic_write_json(self.snapshot_file, data, indent=None)
+        except Exception as e:
+            print(f"保存扫描快照失败: {e}")
+
+    def games_by_key(self, directories: List[str] = None) -> Dict[str, Dict]:
+        """按来源键汇总快照中识别出的游戏（注册表全部，自定义目录只取指定的目录）"""
+        games = {}
+        for key, entry in self.registry.items():
+            if entry.get('game'):
+                games[key] = entry['game']
+        for directory in directories or []:
+            for game in self.directories.get(directory, {}).get('games', []):
+                games[game['executable']] = game
+        return games
+
+    @staticmethod
+    def directory_unchanged(dirs: Dict[str, int]) -> bool:
+        """检查记录的各子目录修改时间是否都没有变化"""
+        if not dirs:
+            return False
+        for directory, mtime_ns in dirs.items():
+            try:
+                if os.stat(directory).st_mtime_ns != mtime_ns:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    @classmethod
+    def diff(cls, old_games: Dict[str, Dict], new_games: Dict[str, Dict]) -> Dict[str, List[Dict]]:
+        """比较两次扫描结果，返回新增、移除和变化的游戏（只比较 DIFF_FIELDS 中的字段）"""
+        added = [game for key, game in new_games.items() if key not in old_games]
+        removed = [game for key, game in old_games.items() if key not in new_games]
+        changed = [game for key, game in new_games.items()
+                   if key in old_games and any(old_games[key].get(field) != game.get(field)
+                                               for field in cls.DIFF_FIELDS)]
+        return {'added': added, 'removed': removed, 'changed': changed}
@@ -0,0 +1,192 @@
+"""
+搜索索引模块
+预先计算游戏名称、平台和拼音的搜索键，用 n-gram 倒排索引完成子串和模糊查找
+"""
+
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+# pypinyin 导入时要加载拼音词典，比较慢：第一次遇到汉字名称时才导入
+_lazy_pinyin: Optional[Callable] = None
+_pinyin_checked = False
+
+
+def _pinyin_function() -> Optional[Callable]:
+    """返回 pypinyin.lazy_pinyin；没有安装 pypinyin 时返回 None（不支持拼音搜索）"""
+    global _lazy_pinyin, _pinyin_checked
+    if not _pinyin_checked:
+        try:
+            from pypinyin import lazy_pinyin
+            _lazy_pinyin = lazy_pinyin
+        except ImportError:
+            _lazy_pinyin = None
+        _pinyin_checked = True
+    return _lazy_pinyin
+
+
+class SearchIndex:
+    """游戏搜索索引
+
+    每个游戏预先生成小写的名称、平台、全拼和拼音首字母搜索键，
+    并把所有搜索键中长度 1~3 的片段记入倒排索引：
+    查询时只需要对少量候选做子串校验，耗时与游戏库大小基本无关。
+    子串匹配结果太少时，按三元组重合度补充模糊匹配的结果。
+    """
+
+    # 倒排索引记录的最长片段
+    GRAM_SIZE = 3
+    # 子串匹配结果少于这个数量时补充模糊匹配
+    FUZZY_MIN_RESULTS = 5
+    # 模糊匹配至少需要命中查询中这个比例的三元组
+    FUZZY_THRESHOLD = 0.5
+
+    def __init__(self, games: Iterable[Dict] = ()):
+        # 游戏ID -> (名称, 平台, 全拼, 首字母)
+        self.keys: Dict[str, Tuple[str, str, str, str]] = {}
+        # 游戏ID -> 添加顺序，相关度相同时保持游戏库顺序
+        self.order: Dict[str, int] = {}
+        self.grams: Dict[str, Set[str]] = {}
+        self._counter = 0
+        for game in games:
+            self.add(game)
+
+    @staticmethod
+    def normalize(text: Optional[str]) -> str:
+        """搜索键和查询都忽略大小写并去掉首尾空白"""
+        return text.strip().casefold() if text else ''
+
+    @staticmethod
+    def pinyin_keys(name: str) -> Tuple[str, str]:
+        """返回名称中汉字的全拼和拼音首字母，例如 黑神话 -> ('heishenhua', 'hsh')"""
+        if not any('\u4e00' <= char <= '\u9fff' for char in name):
+            return '', ''
+        lazy_pinyin = _pinyin_function()
+        if lazy_pinyin is None:
+            return '', ''
+        syllables = lazy_pinyin(name, errors='ignore')
+        return ''.join(syllables), ''.join(s[0] for s in syllables if s)
+
+    def _grams(self, text: str) -> Set[str]:
+        """文本中所有长度 1~GRAM_SIZE 的片段"""
+        grams = set()
+        for size in range(1, self.GRAM_SIZE + 1):
+            for i in range(len(text) - size + 1):
+                grams.add(text[i:i + size])
+        return grams
+
+    def _game_grams(self, keys: Tuple[str, ...]) -> Set[str]:
+        grams = set()
+        for key in keys:
+            grams |= self._grams(key)
+        return grams
+
+    def add(self, game: Dict):
+        """加入或更新一个游戏"""
+        game_id = game['id']
+        order = self.order.get(game_id)
+        if order is None:
+            order = self._counter
+            self._counter += 1
+        else:
+            # 更新时保持原来的顺序
+            self.remove(game_id)
+        name = self.normalize(game.get('name'))
+        full, initials = self.pinyin_keys(name)
+        keys = (name, self.normalize(game.get('platform')), full, initials)
+        self.keys[game_id] = keys
+        self.order[game_id] = order
+        for gram in self._game_grams(keys):
+            self.grams.setdefault(gram, set()).add(game_id)
+
+    update = add
+
+    def remove(self, game_id: str):
+        """从索引中删除游戏"""
+        keys = self.keys.pop(game_id, None)
+        self.order.pop(game_id, None)
+        if keys is None:
+            return
+        for gram in self._game_grams(keys):
+            ids = self.grams.get(gram)
+            if ids is not None:
+                ids.discard(game_id)
+                if not ids:
+                    del self.grams[gram]
+
+    def _candidates(self, query: str) -> Set[str]:
+        """所有包含查询中每个片段的游戏（子串匹配的必要条件）"""
+        if len(query) <= self.GRAM_SIZE:
+            return self.grams.get(query, set())
+        postings = []
+        for i in range(len(query) - self.GRAM_SIZE + 1):
+            ids = self.grams.get(query[i:i + self.GRAM_SIZE])
+            if not ids:
+                return set()
+            postings.append(ids)
+        postings.sort(key=len)
+        result = set(postings[0])
+        for ids in postings[1:]:
+            result &= ids
+            if not result:
+                break
+        return result
+
+    @staticmethod
+    def _rank(query: str, keys: Tuple[str, str, str, str]) -> Optional[Tuple[int, int]]:
+        """子串匹配的相关度 (级别, 位置)，越小越相关；不匹配时返回 None"""
+        name, platform, full, initials = keys
+        if name == query:
+            return 0, 0
+        position = name.find(query)
+        if position == 0:
+            return 1, 0
+        if position > 0:
+            return 2, position
+        for key in (initials, full):
+            position = key.find(query) if key else -1
+            if position == 0:
+                return 3, 0
+            if position > 0:
+                return 4, position
+        if query in platform:
+            return 5, 0
+        return None
+
+    def _fuzzy(self, query: str, exclude: Set[str]) -> List[Tuple[float, str]]:
+        """按三元组重合度模糊匹配，返回 (负的重合比例, 游戏ID)"""
+        query_grams = {query[i:i + self.GRAM_SIZE] for i in range(len(query) - self.GRAM_SIZE + 1)}
+        if not query_grams:
+            return []
+        hits: Dict[str, int] = {}
+        for gram in query_grams:
+            for game_id in self.grams.get(gram, ()):
+                if game_id not in exclude:
+                    hits[game_id] = hits.get(game_id, 0) + 1
+        needed = self.FUZZY_THRESHOLD * len(query_grams)
+        return [(-count / len(query_grams), game_id) for game_id, count in hits.items() if count >= needed]
+
+    def search(self, query: str, within: Optional[Set[str]] = None) -> List[str]:
+        """按相关度返回匹配的游戏ID
+
+        within: 只在这些游戏中做子串匹配（例如上一次的搜索结果），模糊匹配不受限制。
+        """
+        query = self.normalize(query)
+        if not query:
+            return sorted(within if within is not None else self.keys, key=self.order.__getitem__)
+
+        candidates = self._candidates(query)
+        if within is not None:
+            candidates = candidates & within
+
+        ranked = []
+        for game_id in candidates:
+            rank = self._rank(query, self.keys[game_id])
+            if rank is not None:
+                ranked.append((rank, len(self.keys[game_id][0]), self.order[game_id], game_id))
+        ranked.sort()
+        result = [item[-1] for item in ranked]
+
+        if len(result) < self.FUZZY_MIN_RESULTS and len(query) >= self.GRAM_SIZE:
+            fuzzy = self._fuzzy(query, set(result))
+            fuzzy.sort(key=lambda item: (item[0], self.order[item[1]]))
+            result.extend(game_id for _, game_id in fuzzy)
+        return result
@@ -0,0 +1,194 @@
+"""
+目录大小缓存模块
+按目录路径缓存文件大小，根据目录修改时间判断是否需要重新统计
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from library_store import atomic_write_json
+
+
+class SizeCache:
+    """持久化的目录大小缓存
+
+    每个目录记录自身的修改时间、直接包含的文件数和字节数以及子目录列表。
+    目录的修改时间未变时直接复用缓存，只对发生变化的子树重新读取文件信息。
+    注意：原地修改文件内容不会改变目录的修改时间，这类变化需要手动重新计算。
+
+    每次统计或遍历的起始目录记为根目录并记录使用时间。保存时只保留从根目录能到达的目录，
+    已删除的子目录随之被清除；超过 ROOT_MAX_AGE 秒没有再统计过的根目录（例如已卸载的游戏）连同其子目录一起丢弃。
+
+    缓存文件在第一次统计或写入时才读取（通常在后台线程中），不占用启动时间。
+    """
+
+    CACHE_FILENAME = "size_cache.json"
+    # 根目录多久没有被统计就从缓存中清除（秒）
+    ROOT_MAX_AGE = 90 * 24 * 3600
+
+    def __init__(self, cache_file: Optional[str] = None):
+        self.cache_file = cache_file
+        self.entries: Dict[str, Dict] = {}
+        # 根目录 -> 最后一次统计的时间
+        self.roots: Dict[str, float] = {}
+        self.dirty = False
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._loaded = False
+
+    @classmethod
+    def for_library(cls, data_file: str) -> 'SizeCache':
+        """创建与游戏库文件放在同一目录下的缓存"""
+        cache_dir = os.path.dirname(os.path.abspath(data_file))
+        return cls(os.path.join(cache_dir, cls.CACHE_FILENAME))
+
+    @staticmethod
+    def _key(directory: str) -> str:
+        return os.path.normcase(os.path.abspath(directory))
+
+    def _ensure_loaded(self):
+        """第一次使用时读取缓存文件（多个线程同时使用时只读取一次）"""
+        if self._loaded:
+            return
+        with self._load_lock:
+            if not self._loaded:
+                self.load()
+
+    def load(self):
+        """从缓存文件加载"""
+        try:
+            if self.cache_file and os.path.exists(self.cache_file):
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.entries = data.get('entries', {})
+                # 旧版本的缓存没有记录根目录，把所有目录都当作刚使用过的根目录，之后按时间淘汰
+                self.roots = data.get('roots') or dict.fromkeys(self.entries, time.time())
+        except Exception as e:
+            print(f"加载大小缓存失败: {e}")
+            self.entries = {}
+            self.roots = {}
+        # 读取完成后才标记，其他线程不会看到读了一半的缓存
+        self._loaded = True
+
+    def save(self):
+        """清除不再需要的目录后保存缓存到文件（没有变化时跳过）
+
+        先写入临时文件再替换，保存过程中崩溃不会留下写了一半的缓存文件。
+        """
+        if not self.cache_file or not self.dirty:
+            return
+        with self._lock:
+            self.prune()
+            data = {'version': 2, 'roots': dict(self.roots), 'entries': dict(self.entries)}
+            self.dirty = False
+        try:
+            atomic_write_json(self.cache_file, data, indent=None)
+        except Exception as e:
+            print(f"保存大小缓存失败: {e}")
+
+    def prune(self, now: Optional[float] = None):
+        """丢弃过期的根目录，以及从剩下的根目录到达不了的目录（调用方持有锁）"""
+        now = time.time() if now is None else now
+        self.roots = {root: used_at for root, used_at in self.roots.items()
+                      if now - used_at <= self.ROOT_MAX_AGE}
+        reachable = set()
+        stack = [root for root in self.roots if root in self.entries]
+        while stack:
+            key = stack.pop()
+            if key in reachable:
+                continue
+            reachable.add(key)
+            stack.extend(child for child in self.entries[key]['dirs'] if child in self.entries)
+        if len(reachable) < len(self.entries):
+            self.entries = {key: entry for key, entry in self.entries.items() if key in reachable}
+
+    def _touch_root(self, directory: str):
+        """记录一次从这个目录开始的统计"""
+        self._ensure_loaded()
+        with self._lock:
+            self.roots[self._key(directory)] = time.time()
+            self.dirty = True
+
+    def store(self, directory: str, mtime_ns: int, file_bytes: int, file_count: int, subdirs):
+        """记录单个目录的统计结果"""
+        self._ensure_loaded()
+        entry = {
+            'mtime': mtime_ns,
+            'bytes': file_bytes,
+            'files': file_count,
+            'dirs': [self._key(d) for d in subdirs],
+        }
+        with self._lock:
+            self.entries[self._key(directory)] = entry
+            self.dirty = True
+
+    def store_walk(self, walk_result):
+        """将一次目录遍历（ScanEngine.walk）的结果写入缓存
+
+        被取消的遍历中已经读完的目录各自都是完整的，同样可以写入。
+        """
+        self._touch_root(walk_result.root)
+        for directory, mtime_ns in walk_result.dir_mtime.items():
+            self.store(directory, mtime_ns,
+                       walk_result.dir_bytes.get(directory, 0),
+                       walk_result.dir_files.get(directory, 0),
+                       walk_result.dir_children.get(directory, []))
+
+    def _read_dir(self, directory: str, mtime_ns: int) -> Dict:
+        """重新读取单个目录的文件信息"""
+        file_bytes = 0
+        file_count = 0
+        subdirs = []
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            file_count += 1
+                            file_bytes += entry.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        pass
+        except OSError:
+            pass
+        self.store(directory, mtime_ns, file_bytes, file_count, subdirs)
+        return self.entries[self._key(directory)]
+
+    # 统计进度时每读取这么多个目录报告一次
+    PROGRESS_INTERVAL = 200
+
+    def measure(self, directory: str, token=None, refresh: bool = False,
+                progress: Optional[Callable[[int, int], None]] = None) -> Tuple[int, int]:
+        """计算目录（含子目录）的总字节数和文件数，优先使用缓存
+
+        token: 可选的 CancelToken，取消后返回已统计部分的结果。
+        refresh: 为 True 时忽略缓存重新读取所有目录（用于文件被原地修改的情况）。
+        progress: 可选的进度回调 progress(已统计字节数, 已统计文件数)。
+        """
+        self._touch_root(directory)
+        total_bytes = 0
+        total_files = 0
+        visited = 0
+        stack = [directory]
+        while stack:
+            if token is not None and token.cancelled:
+                break
+            current = stack.pop()
+            try:
+                mtime_ns = os.stat(current).st_mtime_ns
+            except OSError:
+                continue
+            entry = None if refresh else self.entries.get(self._key(current))
+            if entry is None or entry.get('mtime') != mtime_ns:
+                entry = self._read_dir(current, mtime_ns)
+            total_bytes += entry['bytes']
+            total_files += entry['files']
+            stack.extend(entry['dirs'])
+            visited += 1
+            if progress is not None and visited % self.PROGRESS_INTERVAL == 0:
+                progress(total_bytes, total_files)
+        return total_bytes, total_files
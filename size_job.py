@@ -0,0 +1,114 @@
+"""
+后台大小计算模块
+在对话框中计算游戏目录大小：路径停止变化后才开始，在后台线程中进行，可以随时取消
+"""
+
+import queue
+import threading
+from typing import Callable, Dict, Optional
+
+from game_size import measured_size, size_fields
+from scan_engine import CancelToken
+from size_cache import SizeCache
+
+
+class SizeJob:
+    """对话框使用的后台目录大小计算
+
+    request(目录) 在路径保持 DEBOUNCE_MS 毫秒不变后才开始计算，
+    新的请求会取消正在等待或正在进行的计算，旧计算的进度和结果都会被丢弃。
+    后台线程只把进度和结果放入队列，由界面线程通过 after() 取出后调用回调，
+    回调总是在界面线程中执行。大小缓存也由后台线程在计算结束后保存，不占用界面线程。
+    """
+
+    # 路径停止变化多久后开始计算（毫秒）
+    DEBOUNCE_MS = 400
+    # 检查后台计算进度的间隔（毫秒）
+    POLL_MS = 100
+
+    def __init__(self, widget, size_cache: SizeCache, on_done: Callable[[Dict], None],
+                 on_progress: Optional[Callable[[int, int], None]] = None):
+        """on_done(大小字段) 在计算完成时调用（失败时大小为 None）；
+        on_progress(已统计字节数, 已统计文件数) 在计算过程中调用
+        """
+        self.widget = widget
+        self.size_cache = size_cache
+        self.on_done = on_done
+        self.on_progress = on_progress
+        self._events = queue.Queue()
+        # 每次请求的编号，只处理最新一次请求的事件
+        self._generation = 0
+        self._token: Optional[CancelToken] = None
+        self._after_id = None
+        self._poll_id = None
+
+    @property
+    def running(self) -> bool:
+        """是否有等待开始或正在进行的计算"""
+        return self._after_id is not None or self._token is not None
+
+    def request(self, directory: str, refresh: bool = False, delay: Optional[int] = None):
+        """计算目录大小，取代之前的请求
+
+        refresh: 为 True 时忽略大小缓存重新统计；delay: 开始前等待的毫秒数，默认 DEBOUNCE_MS。
+        """
+        self.cancel()
+        generation = self._generation
+        self._after_id = self.widget.after(self.DEBOUNCE_MS if delay is None else delay,
+                                           lambda: self._start(generation, directory, refresh))
+
+    def cancel(self):
+        """取消等待中和进行中的计算"""
+        self._generation += 1
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+        if self._token is not None:
+            self._token.cancel()
+            self._token = None
+
+    def _start(self, generation: int, directory: str, refresh: bool):
+        self._after_id = None
+        if generation != self._generation:
+            return
+        token = CancelToken()
+        self._token = token
+
+        def progress(total_bytes: int, total_files: int):
+            self._events.put(('progress', generation, (total_bytes, total_files)))
+
+        def worker():
+            try:
+                total_bytes, total_files = self.size_cache.measure(directory, token, refresh, progress)
+            except Exception as e:
+                print(f"计算目录大小失败: {e}")
+                self._events.put(('done', generation, size_fields()))
+                return
+            # 被取消时只统计了一部分，结果不可用
+            if not token.cancelled:
+                self._events.put(('done', generation, measured_size(total_bytes, total_files)))
+            # 已经读取的每个目录各自都是完整的，被取消时同样保存
+            self.size_cache.save()
+
+        threading.Thread(target=worker, daemon=True).start()
+        if self._poll_id is None:
+            self._poll_id = self.widget.after(self.POLL_MS, self._poll)
+
+    def _poll(self):
+        """在界面线程中处理后台计算的进度和结果"""
+        self._poll_id = None
+        while True:
+            try:
+                kind, generation, payload = self._events.get_nowait()
+            except queue.Empty:
+                break
+            if generation != self._generation:
+                continue
+            if kind == 'progress':
+                if self.on_progress:
+                    self.on_progress(*payload)
+                continue
+            self._token = None
+            self.on_done(payload)
+        if self._token is not None:
+            self._poll_id = self.widget.after(self.POLL_MS, self._poll)
@@ -0,0 +1,182 @@
+"""
+SQLite 游戏库存储模块
+游戏、分类和平台分别保存在数据表中，修改单个游戏时只写入对应的行
+"""
+
+import json
+import os
+import sqlite3
+from typing import Callable, Dict, Iterable, List, Optional
+
+from library_store import QueuedWriterStore, migrate_legacy_data
+
+
+class SqliteLibraryStore(QueuedWriterStore):
+    """SQLite 游戏库存储
+
+    每行保存游戏的完整 JSON（data 列），常用于查找的字段单独成列并建立索引。
+    所有写入由一个后台线程按顺序执行，排队中的多个操作在同一个事务中提交。
+    数据库为空且存在旧的 JSON 游戏库时，第一次加载会把它迁移到数据库中。
+    """
+
+    ROW_UPDATES = True
+    SCHEMA_VERSION = 1
+
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+        CREATE TABLE IF NOT EXISTS games (
+            id TEXT PRIMARY KEY,
+            position INTEGER NOT NULL,
+            name TEXT,
+            executable TEXT,
+            platform TEXT,
+            category_id TEXT,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_games_position ON games(position);
+        CREATE INDEX IF NOT EXISTS idx_games_name ON games(name);
+        CREATE INDEX IF NOT EXISTS idx_games_executable ON games(executable);
+        CREATE INDEX IF NOT EXISTS idx_games_category_id ON games(category_id);
+        CREATE INDEX IF NOT EXISTS idx_games_platform ON games(platform);
+        CREATE TABLE IF NOT EXISTS categories (
+            id TEXT PRIMARY KEY,
+            position INTEGER NOT NULL,
+            name TEXT,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS platforms (
+            position INTEGER PRIMARY KEY,
+            data TEXT NOT NULL
+        );
+    '''
+
+    def __init__(self, path: str, legacy_json: Optional[str] = None):
+        super().__init__(path)
+        self.legacy_json = legacy_json
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path)
+        # WAL 模式下读写互不阻塞，写入中断也不会损坏数据库
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.executescript(self.SCHEMA)
+        return conn
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path) or bool(self.legacy_json and os.path.exists(self.legacy_json))
+
+    # ---- 读取 ----
+
+    def load(self) -> Dict:
+        """读取游戏库；数据库还没有初始化时先迁移旧的 JSON 游戏库"""
+        self.flush()
+        conn = self._connect()
+        try:
+            initialized = conn.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+            if initialized is None and self.legacy_json and os.path.exists(self.legacy_json):
+                self._migrate(conn)
+            return {
+                'games': [json.loads(row[0]) for row in
+                          conn.execute('SELECT data FROM games ORDER BY position')],
+                'platforms': [json.loads(row[0]) for row in
+                              conn.execute('SELECT data FROM platforms ORDER BY position')],
+                'categories': [json.loads(row[0]) for row in
+                               conn.execute('SELECT data FROM categories ORDER BY position')],
+            }
+        finally:
+            conn.close()
+
+    def _migrate(self, conn: sqlite3.Connection):
+        """把旧的 JSON 游戏库（包括分类ID的兼容处理）一次性导入数据库"""
+        with open(self.legacy_json, 'r', encoding='utf-8') as f:
+            data = migrate_legacy_data(json.load(f))
+        with conn:
+            self._replace_all(conn, data)
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated_from', ?)",
+                         (os.path.abspath(self.legacy_json),))
+        print(f"已将 {len(data['games'])} 个游戏从 {self.legacy_json} 迁移到 {self.path}")
+
+    # ---- 写入（在后台线程中执行） ----
+
+    @staticmethod
+    def _game_row(game: Dict):
+        return (game['id'], game.get('name'), game.get('executable'), game.get('platform'),
+                game.get('category_id'), json.dumps(game, ensure_ascii=False))
+
+    def _replace_all(self, conn: sqlite3.Connection, data: Dict):
+        conn.execute('DELETE FROM games')
+        conn.executemany(
+            'INSERT INTO games (position, id, name, executable, platform, category_id, data) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            ((position,) + self._game_row(game) for position, game in enumerate(data.get('games', []))))
+        self._replace_categories(conn, data.get('categories', []))
+        self._replace_platforms(conn, data.get('platforms', []))
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('schema_version', ?)",
+                     (str(self.SCHEMA_VERSION),))
+
+    @staticmethod
+    def _replace_categories(conn: sqlite3.Connection, categories: List[Dict]):
+        conn.execute('DELETE FROM categories')
+        conn.executemany(
+            'INSERT INTO categories (id, position, name, data) VALUES (?, ?, ?, ?)',
+            ((cat['id'], position, cat.get('name'), json.dumps(cat, ensure_ascii=False))
+             for position, cat in enumerate(categories)))
+
+    @staticmethod
+    def _replace_platforms(conn: sqlite3.Connection, platforms: List[Dict]):
+        conn.execute('DELETE FROM platforms')
+        conn.executemany(
+            'INSERT INTO platforms (position, data) VALUES (?, ?)',
+            ((position, json.dumps(platform, ensure_ascii=False)) for position, platform in enumerate(platforms)))
+
+    def _upsert_games(self, conn: sqlite3.Connection, games: List[Dict]):
+        """新增或更新游戏；新游戏排在最后，已有游戏保持原来的位置"""
+        next_position = conn.execute('SELECT COALESCE(MAX(position), -1) + 1 FROM games').fetchone()[0]
+        rows = []
+        for offset, game in enumerate(games):
+            rows.append((next_position + offset,) + self._game_row(game))
+        conn.executemany(
+            'INSERT INTO games (position, id, name, executable, platform, category_id, data) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?) '
+            'ON CONFLICT(id) DO UPDATE SET name = excluded.name, executable = excluded.executable, '
+            'platform = excluded.platform, category_id = excluded.category_id, data = excluded.data',
+            rows)
+
+    def write(self, data: Dict):
+        self.save(data)
+        self.flush()
+
+    def save(self, data: Dict):
+        self._enqueue(lambda conn: self._replace_all(conn, data), replace_pending=True)
+
+    def save_changes(self, changed_games: Iterable[Dict], removed_ids: Iterable[str],
+                     categories: List[Dict], platforms: List[Dict]):
+        changed_games = list(changed_games)
+        removed_ids = [(game_id,) for game_id in removed_ids]
+
+        def apply(conn: sqlite3.Connection):
+            if changed_games:
+                self._upsert_games(conn, changed_games)
+            if removed_ids:
+                conn.executemany('DELETE FROM games WHERE id = ?', removed_ids)
+            self._replace_categories(conn, categories)
+            self._replace_platforms(conn, platforms)
+
+        self._enqueue(apply)
+
+    # ---- 后台写入线程 ----
+
+    def _open_writer(self) -> sqlite3.Connection:
+        return self._connect()
+
+    def _close_writer(self, conn: sqlite3.Connection):
+        conn.close()
+
+    def _run_ops(self, conn: sqlite3.Connection, ops: List[Callable[[sqlite3.Connection], None]]):
+        # 排队中的所有操作在一个事务中提交
+        with conn:
+            for op in ops:
+                op(conn)
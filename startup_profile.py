@@ -0,0 +1,47 @@
+"""
+启动耗时统计模块
+记录启动过程中各个阶段完成的时间，使用 --profile-startup 参数启动时输出耗时明细
+"""
+
+import threading
+import time
+from typing import List, Optional, Tuple
+
+
+class StartupProfile:
+    """启动阶段计时
+
+    mark(阶段名) 记录从上一个阶段到现在的耗时，可以在后台线程中调用；
+    report() 按完成顺序输出每个阶段的耗时和累计时间。
+    没有启用或已经输出过时 mark() 什么也不做，不影响正常运行。
+    """
+
+    def __init__(self, enabled: bool = False, started_at: Optional[float] = None):
+        self.enabled = enabled
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        self.marks: List[Tuple[str, float]] = []
+        self._lock = threading.Lock()
+        self._reported = False
+
+    def mark(self, stage: str):
+        """记录一个阶段完成"""
+        if not self.enabled or self._reported:
+            return
+        with self._lock:
+            self.marks.append((stage, time.perf_counter()))
+
+    def report(self):
+        """输出耗时明细（只输出一次）"""
+        if not self.enabled or self._reported:
+            return
+        self._reported = True
+        with self._lock:
+            marks = list(self.marks)
+        print("=" * 50)
+        print("启动耗时明细:")
+        previous = self.started_at
+        for stage, at in marks:
+            # 阶段名放在最后，中文名称宽度不一也能对齐
+            print(f"  {(at - previous) * 1000:8.1f} ms   累计 {(at - self.started_at) * 1000:8.1f} ms   {stage}")
+            previous = at
+        print("=" * 50)
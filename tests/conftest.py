@@ -0,0 +1,8 @@
+"""
+测试配置：模块都在仓库根目录下，把根目录加入导入路径
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
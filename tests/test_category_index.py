@@ -0,0 +1,77 @@
+"""
+分类索引测试：移动、重命名和删除分类时的成员集合、游戏数和暂存的修改
+"""
+
+import pytest
+
+from category_index import UNCATEGORIZED, CategoryIndex
+from game_library import GameLibrary
+
+CATEGORIES = [{'id': 'rpg', 'name': 'RPG'}, {'id': 'act', 'name': '动作'}]
+
+
+@pytest.fixture
+def library():
+    return GameLibrary([
+        {'id': 'a', 'name': 'Alpha', 'category': 'RPG', 'category_id': 'rpg'},
+        {'id': 'b', 'name': 'Beta', 'category': 'RPG', 'category_id': 'rpg'},
+        {'id': 'c', 'name': 'Gamma', 'category': '动作', 'category_id': 'act'},
+        {'id': 'd', 'name': 'Delta'},
+        # 分类已经不存在的游戏也算未分类
+        {'id': 'e', 'name': 'Epsilon', 'category': '旧分类', 'category_id': 'gone'},
+    ])
+
+
+@pytest.fixture
+def index(library):
+    return CategoryIndex(library.snapshot().transaction(), CATEGORIES)
+
+
+def test_initial_members(index):
+    assert index.members_of('rpg') == {'a', 'b'}
+    assert index.members_of(None) == {'d', 'e'}
+    assert index.count('act') == 1
+    assert index.count('gone') == 0
+    assert index.category_of('e') is None
+
+
+def test_move(index):
+    assert index.move(['a', 'c', 'd', 'missing'], CATEGORIES[1]) == {'a', 'd'}
+    assert index.members_of('act') == {'a', 'c', 'd'}
+    assert index.members_of('rpg') == {'b'}
+    assert index.members_of(None) == {'e'}
+    assert (index.count('act'), index.count('rpg'), index.count(None)) == (3, 1, 1)
+    assert index.transaction.get('d')['category'] == '动作'
+    assert index.transaction.get('d')['category_id'] == 'act'
+    # 已经在目标分类中的游戏不算修改
+    assert index.move(['a', 'c'], CATEGORIES[1]) == frozenset()
+
+
+def test_moving_last_member_empties_category(index):
+    index.move(['c'], CATEGORIES[0])
+    assert index.count('act') == 0
+    assert 'act' not in index.members
+
+
+def test_rename(index):
+    renamed = {'id': 'rpg', 'name': '角色扮演'}
+    assert index.rename(renamed) == {'a', 'b'}
+    assert index.transaction.get('a')['category'] == '角色扮演'
+    assert index.members_of('rpg') == {'a', 'b'}
+    assert index.rename(renamed) == frozenset()
+
+
+def test_delete(library, index):
+    assert index.delete('rpg') == {'a', 'b'}
+    assert index.count('rpg') == 0
+    assert index.members_of(None) == {'a', 'b', 'd', 'e'}
+    for game_id in ('a', 'b'):
+        game = index.transaction.get(game_id)
+        assert game['category_id'] is None
+        assert game['category'] == UNCATEGORIZED
+    assert index.delete('rpg') == frozenset()
+    # 修改只暂存在事务中，提交后才写入游戏库
+    assert library.get('a')['category_id'] == 'rpg'
+    library.commit(index.transaction)
+    assert library.get('a')['category_id'] is None
+    assert library.get('c')['category_id'] == 'act'
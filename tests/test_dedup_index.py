@@ -0,0 +1,65 @@
+"""
+去重索引测试
+"""
+
+from dedup_index import DedupIndex
+
+
+def game(name, executable):
+    return {'name': name, 'executable': executable}
+
+
+def test_names_and_paths_are_normalized():
+    index = DedupIndex([game('Hollow Knight', 'C:/Games/HK/hollow_knight.exe')])
+    assert index.contains(game(' hollow knight ', None))
+    assert index.contains(game('Other', 'C:/Games/HK/../HK/hollow_knight.exe'))
+    assert not index.contains(game('Hollow Knight 2', 'C:/Games/HK2/hk2.exe'))
+
+
+def test_removed_game_no_longer_blocks():
+    hk = game('Hollow Knight', 'C:/hk.exe')
+    index = DedupIndex([hk, game('Celeste', 'C:/celeste.exe')])
+    index.remove(hk)
+    assert not index.contains(hk)
+    assert index.add_if_new(hk)
+    assert index.contains(game('Celeste', None))
+
+
+def test_renamed_game_frees_old_name():
+    old = game('Hollow Knight', 'C:/hk.exe')
+    new = game('Hollow Knight Voidheart', 'C:/hk/hollow_knight.exe')
+    index = DedupIndex([old])
+    index.update(old, new)
+    assert not index.contains(old)
+    assert index.contains(game('hollow knight voidheart', None))
+    assert index.contains(game('x', 'C:/hk/hollow_knight.exe'))
+
+
+def test_duplicate_blocks_while_one_copy_remains():
+    first = game('Celeste', 'C:/a/celeste.exe')
+    second = game('celeste', 'C:/b/celeste.exe')
+    index = DedupIndex([first, second])
+    index.remove(first)
+    assert index.contains(game('Celeste', None))
+    assert not index.contains(game('x', 'C:/a/celeste.exe'))
+    index.remove(second)
+    assert not index.contains(game('Celeste', None))
+
+
+def test_remove_unknown_or_missing_game_is_ignored():
+    index = DedupIndex([game('Celeste', 'C:/celeste.exe')])
+    index.remove(None)
+    index.remove(game('Other', 'C:/other.exe'))
+    index.update(None, game('New', None))
+    assert index.contains(game('Celeste', None))
+    assert index.contains(game('new', None))
+
+
+def test_copy_is_independent():
+    index = DedupIndex([game('Celeste', 'C:/celeste.exe')])
+    scan = index.copy()
+    assert scan.add_if_new(game('Hades', 'C:/hades.exe'))
+    assert not scan.add_if_new(game('HADES', None))
+    assert not index.contains(game('Hades', None))
+    scan.remove(game('Celeste', 'C:/celeste.exe'))
+    assert index.contains(game('Celeste', None))
@@ -0,0 +1,76 @@
+"""
+游戏库快照和事务测试
+"""
+
+import pytest
+
+from game_library import GameLibrary
+
+
+@pytest.fixture
+def library():
+    return GameLibrary([
+        {'id': 'a', 'name': 'A', 'executable': 'C:/a.exe', 'category': '未分类'},
+        {'id': 'b', 'name': 'B', 'executable': 'C:/b.exe', 'category': '未分类'},
+    ])
+
+
+def test_snapshot_is_not_affected_by_later_changes(library):
+    snapshot = library.snapshot()
+    library.update('a', name='A2')
+    library.remove('b')
+    assert snapshot.get('a')['name'] == 'A'
+    assert snapshot.ids() == ['a', 'b']
+    with pytest.raises(TypeError):
+        snapshot.get('a')['name'] = 'X'
+
+
+def test_commit_keeps_fields_changed_after_snapshot(library):
+    transaction = library.snapshot().transaction()
+    library.update('a', name='A2')
+    transaction.update('a', category='RPG', category_id='c1')
+
+    stored, removed = library.commit(transaction)
+    assert removed == []
+    assert [game['id'] for game in stored] == ['a']
+    assert library.get('a')['name'] == 'A2'
+    assert library.get('a')['category_id'] == 'c1'
+    assert library.find_by_name('a2')[0]['category'] == 'RPG'
+
+
+def test_commit_does_not_restore_removed_games(library):
+    transaction = library.snapshot().transaction()
+    transaction.update('b', category='RPG')
+    library.remove('b')
+    stored, _ = library.commit(transaction)
+    assert stored == []
+    assert 'b' not in library
+
+
+def test_delta_ignores_unchanged_fields(library):
+    transaction = library.snapshot().transaction()
+    transaction.update('a', category='未分类')
+    transaction.update('b', category='RPG')
+    transaction.update('b', category='未分类', name='B2')
+    added = transaction.add({'name': 'C'})
+    transaction.remove('a')
+
+    changes, added_games, removed = transaction.delta()
+    assert changes == {'b': {'name': 'B2'}}
+    assert added_games == [dict(added)]
+    assert removed == ['a']
+    assert [game['name'] for game in transaction] == ['B2', 'C']
+    assert len(transaction) == 2
+
+
+def test_discarded_transaction_leaves_library_unchanged(library):
+    transaction = library.snapshot().transaction()
+    transaction.update('a', name='X')
+    transaction.remove('b')
+    assert [game['name'] for game in library] == ['A', 'B']
+
+
+def test_commit_rejects_transaction_from_other_library(library):
+    transaction = GameLibrary().snapshot().transaction()
+    with pytest.raises(ValueError):
+        library.commit(transaction)
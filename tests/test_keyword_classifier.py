@@ -0,0 +1,117 @@
+"""
+关键词分类器测试：与原来逐个关键词做子串匹配的判断结果一致
+"""
+
+import json
+
+import pytest
+
+from game_scanner import GameScanner
+from keyword_classifier import KeywordClassifier
+from registry_provider import RegistryProvider
+from scan_snapshot import ScanSnapshot
+from size_cache import SizeCache
+
+
+def substring_is_game(name, install_location, publisher=None, game_keywords=GameScanner.GAME_KEYWORDS,
+                      exclude_keywords=GameScanner.EXCLUDE_KEYWORDS,
+                      software_publishers=GameScanner.SOFTWARE_PUBLISHERS,
+                      path_keywords=KeywordClassifier.PATH_KEYWORDS):
+    """编译分类器之前 GameScanner._is_game 的判断方式"""
+    if not name:
+        return False
+    name_lower = name.lower()
+    if publisher:
+        publisher_lower = publisher.lower()
+        if any(pub.lower() in publisher_lower for pub in software_publishers):
+            return False
+    if any(exclude.lower() in name_lower for exclude in exclude_keywords):
+        return False
+    if any(keyword.lower() in name_lower for keyword in game_keywords):
+        return True
+    if install_location:
+        path_lower = install_location.lower()
+        return any(keyword in path_lower for keyword in path_keywords)
+    return False
+
+
+CASES = [
+    # (名称, 安装目录, 发布商)
+    ('Star Blaster Game', None, None),
+    ('Steam', 'C:/Program Files (x86)/Steam', 'Valve'),
+    ('WeGame', None, 'Tencent'),
+    ('原神 游戏', None, None),
+    ('Notepad++', 'C:/Program Files/Notepad++', 'Notepad++ Team'),
+    ('Python 3.11 Game Toolkit', None, None),
+    ('NVIDIA GeForce Experience', None, 'NVIDIA Corporation'),
+    ('Microsoft Visual C++ 2015 Redistributable', None, 'Microsoft Corporation'),
+    ('Age of Empires', None, 'Microsoft Corporation'),
+    ('Hollow Knight', 'D:/SteamLibrary/steamapps/common/Hollow Knight', None),
+    ('Some Tool', 'D:/Games/Some Tool', None),
+    ('Some Tool', 'D:/Tools/Some Tool', None),
+    ('Some Tool', None, None),
+    ('WeGame Plugin', 'D:/WeGameApps/x', None),
+    ('Epic Games Launcher', 'C:/Program Files/Epic Games', 'Epic Games, Inc.'),
+    ('Battle.net', 'C:/Program Files (x86)/Battle.net', 'Blizzard Entertainment'),
+    ('Intel Graphics Game Mode', None, None),
+    ('Java Game Runtime', None, 'Oracle Corporation'),
+    ('', 'D:/Games', None),
+]
+
+
+@pytest.fixture
+def scanner():
+    return GameScanner(size_cache=SizeCache(), snapshot=ScanSnapshot(), registry_provider=RegistryProvider())
+
+
+@pytest.mark.parametrize('name, install_location, publisher', CASES)
+def test_same_result_as_substring_matching(scanner, name, install_location, publisher):
+    assert scanner._is_game(name, install_location, publisher) == \
+        substring_is_game(name, install_location, publisher)
+
+
+def test_exclude_keywords_win_over_game_keywords():
+    classifier = KeywordClassifier(['game', 'gamepad'], ['pad', 'driver'], [])
+    # 游戏关键词在前面出现，排除关键词仍然优先
+    assert classifier.classify('Game Driver') == ('exclude', 'driver')
+    # 重叠的关键词：gamepad 中包含 pad
+    assert classifier.classify('Gamepad Tool') == ('exclude', 'pad')
+    assert classifier.classify('Space Game') == ('include', 'game')
+    assert classifier.classify('Calculator') is None
+
+
+def test_keywords_are_case_insensitive_and_prefix_shared():
+    classifier = KeywordClassifier(['Steam', 'steamworks', 'ST'], [], ['Microsoft', 'micro'])
+    assert classifier.classify('STEAMWORKS Common')[0] == 'include'
+    assert classifier.classify('first')[0] == 'include'
+    assert classifier.is_software_publisher('MICROSOFT Corporation')
+    assert classifier.is_software_publisher('Micron')
+    assert not classifier.is_software_publisher('Valve')
+
+
+def test_config_file_is_merged(tmp_path):
+    config = tmp_path / KeywordClassifier.CONFIG_FILENAME
+    config.write_text(json.dumps({
+        'game_keywords': ['roguelike'],
+        'exclude_keywords': ['benchmark'],
+        'software_publishers': ['Acme Tools'],
+        'path_keywords': ['mygames'],
+    }), encoding='utf-8')
+    classifier = GameScanner.build_classifier(str(config))
+
+    assert classifier.classify('Tiny Roguelike') == ('include', 'roguelike')
+    assert classifier.classify('Game Benchmark')[0] == 'exclude'
+    # 内置关键词仍然有效
+    assert classifier.classify('Space Game') == ('include', 'game')
+    assert classifier.classify('Adobe Reader')[0] == 'exclude'
+    assert classifier.is_software_publisher('ACME Tools Ltd')
+    assert classifier.is_game_path('E:/MyGames/tool')
+    assert classifier.is_game_path('D:/steamapps/x')
+
+
+def test_invalid_config_falls_back_to_builtin(tmp_path):
+    config = tmp_path / KeywordClassifier.CONFIG_FILENAME
+    config.write_text('{not json', encoding='utf-8')
+    classifier = KeywordClassifier.from_config(str(config), ['game'], ['tool'], [])
+    assert classifier.classify('Game Tool') == ('exclude', 'tool')
+    assert classifier.classify('Game') == ('include', 'game')
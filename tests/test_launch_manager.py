@@ -0,0 +1,78 @@
+"""
+启动管理器测试：后台线程在任何情况下都会发出结束事件，界面线程据此移除运行记录
+"""
+
+import subprocess
+import sys
+
+import pytest
+
+from launch_manager import LaunchManager, RunningProcess
+
+
+class FakeWidget:
+    """代替 Tk 控件，只记录 after() 的调用"""
+
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, ms, callback):
+        self.scheduled.append(callback)
+        return len(self.scheduled)
+
+
+@pytest.fixture
+def manager():
+    events = []
+    manager = LaunchManager(FakeWidget(), events.append)
+    manager.events = events
+    return manager
+
+
+def run(manager, key, executable, args=''):
+    """在当前线程中执行后台线程的工作，然后处理事件"""
+    entry = RunningProcess(key, key)
+    manager.running[key] = entry
+    manager._run(entry, executable, args, None, 0.0)
+    manager._poll()
+    return [event.kind for event in manager.events]
+
+
+def test_started_and_exited(manager):
+    assert run(manager, 'py', sys.executable, '-c pass') == ['started', 'exited']
+    exited = manager.events[-1]
+    assert exited.returncode == 0
+    assert exited.ended_at >= exited.started_at
+    assert not manager.is_running('py')
+
+
+def test_missing_file_fails(manager, tmp_path):
+    assert run(manager, 'missing', str(tmp_path / 'missing.exe')) == ['failed']
+    assert not manager.is_running('missing')
+
+
+def test_unexpected_error_before_start_fails(manager, monkeypatch):
+    def broken_popen(*args, **kwargs):
+        raise ValueError("embedded null byte")
+
+    monkeypatch.setattr(subprocess, 'Popen', broken_popen)
+    assert run(manager, 'broken', sys.executable) == ['failed']
+    assert manager.events[0].error == "embedded null byte"
+    assert not manager.is_running('broken')
+
+
+def test_error_while_waiting_still_exits(manager, monkeypatch):
+    class LostProcess:
+        pid = 1234
+
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def wait(self):
+            raise RuntimeError("lost")
+
+    monkeypatch.setattr(subprocess, 'Popen', LostProcess)
+    assert run(manager, 'lost', sys.executable) == ['started', 'exited']
+    exited = manager.events[-1]
+    assert (exited.pid, exited.returncode, exited.error) == (1234, None, "lost")
+    assert not manager.is_running('lost')
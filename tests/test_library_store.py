@@ -0,0 +1,168 @@
+"""
+游戏库存储测试：日志模式的 JSON 游戏库和 SQLite 游戏库
+"""
+
+import json
+import os
+import sqlite3
+
+import pytest
+
+from library_store import JournalLibraryStore, atomic_write_json, open_library_store
+from sqlite_store import SqliteLibraryStore
+
+
+def game(game_id, name, **fields):
+    return {'id': game_id, 'name': name, 'platform': 'Steam', 'executable': f'C:/{name}.exe',
+            'directory': 'C:/', **fields}
+
+
+CATEGORIES = [{'id': 'c1', 'name': '全部', 'color': '#95a5a6'}]
+
+
+@pytest.fixture
+def library_file(tmp_path):
+    path = tmp_path / 'game_library.json'
+    atomic_write_json(str(path), {'games': [game('a', 'Alpha'), game('b', 'Beta')],
+                                  'platforms': [], 'categories': CATEGORIES})
+    return str(path)
+
+
+def reload(path):
+    store = JournalLibraryStore(path)
+    try:
+        return store.load()
+    finally:
+        store.flush()
+
+
+def test_journal_put_and_delete_round_trip(library_file):
+    store = JournalLibraryStore(library_file)
+    store.load()
+    store.save_changes([game('a', 'Alpha 2'), game('c', 'Gamma')], ['b'], CATEGORIES, [])
+    assert store.flush(5)
+    assert store.take_error() is None
+    # 修改只追加到日志，快照文件不变
+    assert os.path.getsize(store.journal_path) > 0
+    with open(library_file, encoding='utf-8') as f:
+        assert [g['id'] for g in json.load(f)['games']] == ['a', 'b']
+
+    data = reload(library_file)
+    # 已有的游戏保持原来的位置，新游戏排在最后
+    assert [(g['id'], g['name']) for g in data['games']] == [('a', 'Alpha 2'), ('c', 'Gamma')]
+    assert data['categories'] == CATEGORIES
+
+
+def test_journal_skips_truncated_last_line(library_file):
+    store = JournalLibraryStore(library_file)
+    store.load()
+    store.save_changes([game('c', 'Gamma')], [], CATEGORIES, [])
+    assert store.flush(5)
+    # 模拟写入一半时崩溃
+    with open(store.journal_path, 'a', encoding='utf-8') as f:
+        f.write('{"op": "delete", "id": "a"')
+
+    data = reload(library_file)
+    assert [g['id'] for g in data['games']] == ['a', 'b', 'c']
+
+
+def test_journal_compacts_at_threshold(library_file):
+    store = JournalLibraryStore(library_file)
+    store.COMPACT_BYTES = 200
+    store.load()
+    store.save_changes([game('c', 'Gamma')], [], CATEGORIES, [])
+    assert store.flush(5)
+    # 一条修改还没有超过阈值
+    assert 0 < os.path.getsize(store.journal_path) <= store.COMPACT_BYTES
+
+    store.save_changes([game('d', 'Delta', notes='x' * 200)], ['a'], CATEGORIES, [])
+    assert store.flush(5)
+    assert os.path.getsize(store.journal_path) == 0
+    with open(library_file, encoding='utf-8') as f:
+        snapshot = json.load(f)
+    assert [g['id'] for g in snapshot['games']] == ['b', 'c', 'd']
+    assert snapshot['summary']['total_games'] == 3
+    assert [g['id'] for g in reload(library_file)['games']] == ['b', 'c', 'd']
+
+
+def test_journal_close_compacts(library_file):
+    store = JournalLibraryStore(library_file)
+    store.load()
+    store.save_changes([], ['a'], CATEGORIES, [])
+    store.close(5)
+    assert os.path.getsize(store.journal_path) == 0
+    with open(library_file, encoding='utf-8') as f:
+        assert [g['id'] for g in json.load(f)['games']] == ['b']
+
+
+def test_journal_assigns_missing_ids_before_logging(tmp_path):
+    path = str(tmp_path / 'legacy.json')
+    atomic_write_json(path, {'games': [{'name': 'Old', 'executable': 'C:/old.exe', 'size': '1.00 KB'}],
+                             'categories': [{'name': '全部'}]})
+    store = JournalLibraryStore(path)
+    data = store.load()
+    store.flush(5)
+    game_id = data['games'][0]['id']
+    assert game_id and data['games'][0]['size_bytes'] == 1024
+    # 补上的ID已经写入快照，之后的日志可以引用它
+    store.save_changes([{**data['games'][0], 'name': 'Renamed'}], [], data['categories'], [])
+    assert store.flush(5)
+    assert [(g['id'], g['name']) for g in reload(path)['games']] == [(game_id, 'Renamed')]
+
+
+@pytest.fixture
+def legacy_json(tmp_path):
+    path = tmp_path / 'game_library.json'
+    path.write_text(json.dumps({
+        'games': [
+            {'name': 'Alpha', 'executable': 'C:/a.exe', 'category': 'RPG', 'size': '2.00 MB'},
+            {'name': 'Beta', 'executable': 'C:/b.exe', 'category': '未分类'},
+        ],
+        'platforms': [{'name': 'Steam', 'executable': 'C:/steam.exe'}],
+        'categories': [{'name': '全部'}, {'name': 'RPG', 'color': '#e74c3c'}],
+    }, ensure_ascii=False), encoding='utf-8')
+    return str(path)
+
+
+def test_sqlite_migrates_legacy_json(tmp_path, legacy_json):
+    db_path = str(tmp_path / 'game_library.db')
+    store = open_library_store(db_path)
+    assert isinstance(store, SqliteLibraryStore)
+    assert store.exists()
+
+    data = store.load()
+    alpha, beta = data['games']
+    rpg = data['categories'][1]
+    assert (alpha['name'], beta['name']) == ('Alpha', 'Beta')
+    assert alpha['id'] and beta['id'] and alpha['id'] != beta['id']
+    assert rpg['id'] and alpha['category_id'] == rpg['id']
+    assert 'category_id' not in beta
+    assert alpha['size_bytes'] == 2 * 1024 * 1024 and 'size' not in alpha
+    assert data['platforms'] == [{'name': 'Steam', 'executable': 'C:/steam.exe'}]
+    with sqlite3.connect(db_path) as conn:
+        migrated_from = conn.execute("SELECT value FROM meta WHERE key = 'migrated_from'").fetchone()[0]
+    assert migrated_from == os.path.abspath(legacy_json)
+    store.close(5)
+
+    # 数据库已经初始化，之后不会再次导入 JSON 游戏库
+    with open(legacy_json, 'w', encoding='utf-8') as f:
+        json.dump({'games': [{'name': 'Other'}]}, f)
+    store = open_library_store(db_path)
+    assert [g['id'] for g in store.load()['games']] == [alpha['id'], beta['id']]
+    store.close(5)
+
+
+def test_sqlite_upsert_keeps_positions(tmp_path, legacy_json):
+    db_path = str(tmp_path / 'game_library.db')
+    store = open_library_store(db_path)
+    data = store.load()
+    alpha, beta = data['games']
+    store.save_changes([game('c', 'Gamma'), {**alpha, 'name': 'Alpha 2'}], [beta['id']],
+                       data['categories'], data['platforms'])
+    store.close(5)
+    assert store.take_error() is None
+
+    games = SqliteLibraryStore(db_path).load()['games']
+    assert [(g['id'], g['name']) for g in games] == [(alpha['id'], 'Alpha 2'), ('c', 'Gamma')]
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute('SELECT name FROM games WHERE id = ?', (alpha['id'],)).fetchone()[0] == 'Alpha 2'
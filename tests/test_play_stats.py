@@ -0,0 +1,79 @@
+"""
+游玩统计测试：汇总、排序索引和会话日志的重新读取
+"""
+
+import pytest
+
+from play_stats import PlayStats
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    return tmp_path / PlayStats.LOG_FILENAME
+
+
+@pytest.fixture
+def stats(log_file):
+    stats = PlayStats(str(log_file))
+    stats.record('a', 1000.04, 1600.0, 0)
+    stats.record('b', 2000.0, 2060.0, 0)
+    stats.record('a', 3000.0, 3300.0, 1)
+    stats.record('c', 4000.0, 3990.0, None)
+    return stats
+
+
+def test_aggregates(stats):
+    assert stats.get('a') == {'play_time': 900.0, 'last_played': 3300.0, 'launch_count': 2}
+    assert stats.get('b') == {'play_time': 60.0, 'last_played': 2060.0, 'launch_count': 1}
+    # 结束时间早于开始时间（例如系统时间被调整）时按 0 秒计
+    assert stats.get('c')['play_time'] == 0.0
+    assert stats.get('missing') is None
+    assert stats.total_play_time == 960.0
+    assert stats.session_count == 4
+
+
+def test_sorted_orders(stats):
+    assert stats.ids_by('play_time') == ['a', 'b', 'c']
+    assert stats.ids_by('play_time', descending=False) == ['c', 'b', 'a']
+    assert stats.ids_by('last_played') == ['c', 'a', 'b']
+    assert stats.ids_by('launch_count')[0] == 'a'
+    stats.record('b', 5000.0, 6000.0, 0)
+    assert stats.ids_by('play_time') == ['b', 'a', 'c']
+    assert stats.ids_by('last_played')[0] == 'b'
+
+
+def test_reload_matches_recorded(stats, log_file):
+    reloaded = PlayStats(str(log_file))
+    assert reloaded.stats == stats.stats
+    assert reloaded.total_play_time == stats.total_play_time
+    assert reloaded.session_count == stats.session_count
+    for field in ('last_played', 'play_time', 'launch_count'):
+        assert reloaded.ids_by(field) == stats.ids_by(field)
+
+
+def test_malformed_lines_are_skipped(log_file):
+    log_file.write_text('\n'.join([
+        '["a",100,200,0]',
+        '',
+        'not json',
+        '["a",100]',
+        '42',
+        '["a","x",300,0]',
+        '["b",100,150,0]',
+        # 写入一半的最后一行
+        '["a",300,4',
+    ]), encoding='utf-8')
+    stats = PlayStats(str(log_file))
+    assert stats.get('a') == {'play_time': 100.0, 'last_played': 200, 'launch_count': 1}
+    assert stats.get('b')['play_time'] == 50.0
+    assert stats.session_count == 2
+    assert stats.ids_by('play_time') == ['a', 'b']
+
+
+def test_for_library_and_without_log(tmp_path):
+    stats = PlayStats.for_library(str(tmp_path / 'game_library.json'))
+    assert stats.log_file == str(tmp_path / PlayStats.LOG_FILENAME)
+    assert stats.stats == {}
+    memory = PlayStats()
+    memory.record('a', 0.0, 10.0, 0)
+    assert memory.get('a')['launch_count'] == 1
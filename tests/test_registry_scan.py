@@ -0,0 +1,221 @@
+"""
+注册表扫描测试：用导出的快照文件代替本机注册表
+"""
+
+import asyncio
+import json
+import os
+import time
+
+import pytest
+
+from dedup_index import DedupIndex
+from game_scanner import GameScanner
+from registry_provider import FileRegistryProvider
+from scan_snapshot import ScanSnapshot
+from size_cache import SizeCache
+
+UNINSTALL = r'SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall'
+
+
+@pytest.fixture
+def install_dir(tmp_path):
+    """一个安装目录，里面有游戏主程序和卸载程序"""
+    directory = tmp_path / 'Games' / 'Star Blaster'
+    directory.mkdir(parents=True)
+    (directory / 'StarBlaster.exe').write_bytes(b'x' * 1000)
+    (directory / 'unins000.exe').write_bytes(b'x' * 10)
+    return directory
+
+
+def reg_string(text: str) -> str:
+    return '"' + text.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+@pytest.fixture
+def reg_file(tmp_path, install_dir):
+    """regedit 格式（UTF-16）的快照：一个游戏、一个普通软件和一个不在 Uninstall 下的键"""
+    lines = [
+        'Windows Registry Editor Version 5.00',
+        '',
+        rf'[HKEY_LOCAL_MACHINE\{UNINSTALL}\StarBlaster]',
+        f'"DisplayName"={reg_string("Star Blaster Game")}',
+        f'"InstallLocation"={reg_string(str(install_dir))}',
+        '"EstimatedSize"=dword:00000400',
+        '',
+        rf'[HKEY_LOCAL_MACHINE\{UNINSTALL}\VCRedist]',
+        '"DisplayName"="Microsoft Visual C++ 2015 Redistributable"',
+        '"Publisher"="Microsoft Corporation"',
+        '',
+        r'[HKEY_CURRENT_USER\SOFTWARE\Valve\Steam]',
+        '"DisplayName"="Steam Settings"',
+        '',
+    ]
+    path = tmp_path / 'uninstall.reg'
+    path.write_bytes('\r\n'.join(lines).encode('utf-16'))
+    return path
+
+
+@pytest.fixture
+def json_file(tmp_path, install_dir):
+    keys = [
+        {'key': rf'HKLM\{UNINSTALL}\StarBlaster', 'last_write': 1,
+         'values': {'DisplayName': 'Star Blaster Game', 'InstallLocation': str(install_dir)}},
+        {'key': rf'HKCU\{UNINSTALL}\Notes', 'last_write': 1,
+         'values': {'DisplayName': 'Notes', 'Publisher': 'Microsoft'}},
+    ]
+    path = tmp_path / 'uninstall.json'
+    path.write_text(json.dumps({'keys': keys}), encoding='utf-8')
+    return path
+
+
+def make_scanner(snapshot_file, existing=()):
+    return GameScanner(existing, size_cache=SizeCache(), snapshot=ScanSnapshot(),
+                       registry_provider=FileRegistryProvider(str(snapshot_file)))
+
+
+def test_reg_file_keys(reg_file, install_dir):
+    provider = FileRegistryProvider(str(reg_file))
+    assert provider.count_keys() == 2
+    key = next(provider.iter_keys())
+    assert key.name == 'StarBlaster'
+    values = provider.read_values(key)
+    assert values['InstallLocation'] == str(install_dir)
+    assert values['EstimatedSize'] == 0x400
+
+
+@pytest.mark.parametrize('snapshot', ['reg_file', 'json_file'])
+def test_scan_registry_finds_games(request, snapshot, install_dir):
+    scanner = make_scanner(request.getfixturevalue(snapshot))
+    games = scanner.scan_registry()
+    assert [game['name'] for game in games] == ['Star Blaster Game']
+    game = games[0]
+    assert game['executable'] == str(install_dir / 'StarBlaster.exe')
+    assert game['directory'] == str(install_dir)
+    assert game['size_bytes'] == 1010
+    assert game['file_count'] == 2
+
+
+def test_scan_registry_skips_existing_games(json_file):
+    existing = [{'name': 'star blaster game ', 'executable': 'C:/other/path.exe'}]
+    scanner = make_scanner(json_file, existing)
+    assert scanner.scan_registry() == []
+
+
+def test_incremental_scan_reuses_snapshot(json_file):
+    scanner = make_scanner(json_file)
+    first = scanner.scan_registry()
+    # 注册表键和安装目录都没有变化时直接复用快照，不再读取键值
+    scanner.registry_provider.read_values = lambda key: pytest.fail("不应该重新读取键值")
+    scanner.dedup_index = DedupIndex()
+    assert scanner.scan_registry(incremental=True) == first
+
+
+@pytest.fixture
+def many_games(tmp_path):
+    """五个注册表中的游戏和一个自定义目录中的游戏，返回 (快照文件, 自定义目录)"""
+    keys = []
+    for i in range(5):
+        directory = tmp_path / 'Games' / f'Game {i}'
+        directory.mkdir(parents=True)
+        (directory / f'Game{i}.exe').write_bytes(b'x' * 10)
+        keys.append({'key': rf'HKLM\{UNINSTALL}\Game{i}', 'last_write': 1,
+                     'values': {'DisplayName': f'Space Game {i}', 'InstallLocation': str(directory)}})
+    path = tmp_path / 'uninstall.json'
+    path.write_text(json.dumps({'keys': keys}), encoding='utf-8')
+    custom = tmp_path / 'Portable'
+    (custom / 'Arcade').mkdir(parents=True)
+    (custom / 'Arcade' / 'ArcadeGame.exe').write_bytes(b'x' * 10)
+    return path, custom
+
+
+def make_full_scanner(tmp_path, many_games):
+    snapshot_file, custom = many_games
+    scanner = GameScanner(size_cache=SizeCache(), snapshot=ScanSnapshot(str(tmp_path / 'scan_snapshot.json')),
+                          registry_provider=FileRegistryProvider(str(snapshot_file)))
+    scanner.custom_directories = [str(custom)]
+    return scanner
+
+
+def test_iter_scan_limit(tmp_path, many_games):
+    scanner = make_full_scanner(tmp_path, many_games)
+    games = list(scanner.iter_scan(['registry'], limit=2))
+    assert [game['name'] for game in games] == ['Space Game 0', 'Space Game 1']
+    # 提前结束时只记录检查过的键，差异中也只有这两个游戏
+    assert len(scanner.snapshot.registry) == 2
+    assert [game['name'] for game in scanner.scan_diff['added']] == ['Space Game 0', 'Space Game 1']
+    assert os.path.exists(scanner.snapshot.snapshot_file)
+
+
+def test_iter_scan_sources(tmp_path, many_games):
+    scanner = make_full_scanner(tmp_path, many_games)
+    assert [game['name'] for game in scanner.iter_scan(['custom'])] == ['ArcadeGame']
+    assert len(list(scanner.iter_scan(['registry']))) == 5
+    assert len(list(scanner.iter_scan())) == 6
+
+
+def test_closing_iter_scan_saves_snapshot(tmp_path, many_games):
+    scanner = make_full_scanner(tmp_path, many_games)
+    games = scanner.iter_scan()
+    first = next(games)
+    assert not os.path.exists(scanner.snapshot.snapshot_file)
+    games.close()
+
+    assert [game['name'] for game in scanner.scan_diff['added']] == [first['name']]
+    with open(scanner.snapshot.snapshot_file, encoding='utf-8') as f:
+        assert len(json.load(f)['registry']) == 1
+    # 下一次增量扫描复用已检查的键，继续检查剩下的键
+    rest = list(make_full_scanner(tmp_path, many_games).iter_scan(['registry'], incremental=True))
+    assert len(rest) == 5
+
+
+def test_ascan_yields_all_games_with_backpressure(tmp_path, many_games):
+    scanner = make_full_scanner(tmp_path, many_games)
+
+    async def collect():
+        return [game async for game in scanner.ascan(buffer_size=1)]
+
+    games = asyncio.run(collect())
+    assert len(games) == 6
+    assert not scanner.was_cancelled
+    assert len(scanner.scan_diff['added']) == 6
+
+
+def test_ascan_cancels_when_consumer_stops(tmp_path, many_games):
+    scanner = make_full_scanner(tmp_path, many_games)
+
+    async def take_first():
+        games = scanner.ascan(buffer_size=1)
+        first = await games.__anext__()
+        await games.aclose()
+        return first
+
+    first = asyncio.run(take_first())
+    assert first['name'] == 'Space Game 0'
+    assert scanner.was_cancelled
+    # 扫描线程在后台自行结束，结束时同样保存快照
+    deadline = time.monotonic() + 5
+    while not os.path.exists(scanner.snapshot.snapshot_file) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert os.path.exists(scanner.snapshot.snapshot_file)
+    assert len(scanner.scan_diff['added']) < 6
+
+
+def test_full_rescan_of_unchanged_tree_reports_no_changes(tmp_path, many_games, monkeypatch):
+    first = list(make_full_scanner(tmp_path, many_games).iter_scan())
+    assert len(first) == 6
+    # 第二次全量扫描重新测量大小，测量时间不同，但内容没有变化
+    monkeypatch.setattr(time, 'time', lambda: 2e9)
+    scanner = make_full_scanner(tmp_path, many_games)
+    second = list(scanner.iter_scan())
+    assert {game['measured_at'] for game in second} == {2e9}
+    assert scanner.scan_diff == {'added': [], 'removed': [], 'changed': []}
+
+
+def test_rescan_reports_changed_size(tmp_path, many_games):
+    _, custom = many_games
+    list(make_full_scanner(tmp_path, many_games).iter_scan())
+    (custom / 'Arcade' / 'data.pak').write_bytes(b'x' * 5)
+    scanner = make_full_scanner(tmp_path, many_games)
+    list(scanner.iter_scan())
+    assert [(game['name'], game['size_bytes']) for game in scanner.scan_diff['changed']] == [('ArcadeGame', 15)]
@@ -0,0 +1,112 @@
+"""
+目录扫描引擎测试：取消令牌和不完整的遍历结果
+"""
+
+import pytest
+
+from game_scanner import GameScanner
+from registry_provider import RegistryProvider
+from scan_engine import CancelToken, ScanEngine, WalkResult
+from scan_snapshot import ScanSnapshot
+from size_cache import SizeCache
+
+
+@pytest.fixture
+def games_dir(tmp_path):
+    """games/Alpha Game 和 games/Beta Game/bin 下各有一个游戏主程序"""
+    root = tmp_path / 'games'
+    (root / 'Alpha Game').mkdir(parents=True)
+    (root / 'Beta Game' / 'bin').mkdir(parents=True)
+    (root / 'Alpha Game' / 'AlphaGame.exe').write_bytes(b'x' * 100)
+    (root / 'Beta Game' / 'bin' / 'BetaGame.exe').write_bytes(b'x' * 200)
+    return root
+
+
+def make_scanner(directory):
+    scanner = GameScanner(size_cache=SizeCache(), snapshot=ScanSnapshot(), registry_provider=RegistryProvider())
+    scanner.custom_directories = [str(directory)]
+    return scanner
+
+
+def test_cancel_token_budgets():
+    parent = CancelToken()
+    assert not parent.cancelled
+    assert not parent.child(None).cancelled
+    # 0 秒的预算立即超时，None 表示不限制
+    assert parent.child(0).cancelled
+    child = parent.child(60)
+    parent.cancel()
+    assert child.cancelled
+
+
+def test_complete_walk(games_dir):
+    result = ScanEngine(max_workers=2).walk(str(games_dir))
+    assert result.complete
+    assert len(result.executables) == 2
+    assert result.size_of(str(games_dir)) == 300
+    assert result.files_of(str(games_dir / 'Beta Game')) == 1
+
+
+@pytest.mark.parametrize('make_token', [
+    lambda: CancelToken(),
+    lambda: CancelToken().child(0),
+], ids=['cancelled', 'expired'])
+def test_cancelled_walk_is_incomplete(games_dir, make_token):
+    token = make_token()
+    if not token.cancelled:
+        token.cancel()
+    result = ScanEngine(max_workers=2).walk(str(games_dir), token)
+    assert not result.complete
+    assert result.size_of(str(games_dir)) is None
+    assert result.files_of(str(games_dir)) is None
+
+
+def test_finalize_only_trusts_finished_subtrees():
+    result = WalkResult('/r')
+    result.complete = False
+    # /r/b 的子目录 /r/b/c 没有遍历到
+    result.dir_children = {'/r': ['/r/a', '/r/b'], '/r/a': [], '/r/b': ['/r/b/c']}
+    result.dir_bytes = {'/r': 1, '/r/a': 2, '/r/b': 3}
+    result.dir_files = {'/r': 1, '/r/a': 1, '/r/b': 1}
+    result.finalize()
+    assert (result.size_of('/r/a'), result.files_of('/r/a')) == (2, 1)
+    assert result.size_of('/r/b') is None
+    assert result.size_of('/r') is None
+
+
+def test_expired_directory_budget_skips_snapshot(games_dir):
+    scanner = make_scanner(games_dir)
+    scanner.snapshot.directories[str(games_dir)] = {'dirs': {}, 'games': []}
+    scanner.set_time_budget(per_directory=0)
+    assert scanner.scan_custom_directories() == []
+    # 不完整的遍历结果不能用于下次增量扫描，旧的快照也被丢弃
+    assert str(games_dir) not in scanner.snapshot.directories
+
+
+def test_partial_walk_keeps_found_games_without_sizes(games_dir, monkeypatch):
+    alpha_dir = str(games_dir / 'Alpha Game')
+    beta_dir = str(games_dir / 'Beta Game')
+    beta_bin = str(games_dir / 'Beta Game' / 'bin')
+
+    def partial_walk(root, token=None):
+        # Beta Game 已经读完，但它的子目录 bin 是在取消前才读到的，Alpha Game 完整
+        result = WalkResult(root)
+        result.complete = False
+        result.dir_children = {root: [alpha_dir, beta_dir], alpha_dir: [], beta_dir: [beta_bin]}
+        result.dir_bytes = {root: 0, alpha_dir: 100, beta_dir: 0}
+        result.dir_files = {root: 0, alpha_dir: 1, beta_dir: 0}
+        result.dir_mtime = {root: 1, alpha_dir: 1, beta_dir: 1}
+        result.executables = [alpha_dir + '/AlphaGame.exe', beta_dir + '/BetaGame.exe']
+        result.finalize()
+        return result
+
+    scanner = make_scanner(games_dir)
+    monkeypatch.setattr(scanner.engine, 'walk', partial_walk)
+    games = {game['name']: game for game in scanner.scan_custom_directories()}
+
+    assert set(games) == {'AlphaGame', 'BetaGame'}
+    assert games['AlphaGame']['size_bytes'] == 100
+    assert games['AlphaGame']['file_count'] == 1
+    assert games['BetaGame']['size_bytes'] is None
+    assert games['BetaGame']['measured_at'] is None
+    assert str(games_dir) not in scanner.snapshot.directories
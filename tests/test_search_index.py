@@ -0,0 +1,86 @@
+"""
+搜索索引测试
+"""
+
+import pytest
+
+from search_index import SearchIndex
+
+
+def game(game_id, name, platform='Steam'):
+    return {'id': game_id, 'name': name, 'platform': platform}
+
+
+@pytest.fixture
+def index():
+    return SearchIndex([
+        game('substring', 'Return to Hades'),
+        game('platform', 'Solitaire', platform='Hades Store'),
+        game('prefix', 'Hades II'),
+        game('exact', 'Hades'),
+        game('other', 'Celeste'),
+    ])
+
+
+def test_ranking_order(index):
+    assert index.search('hades') == ['exact', 'prefix', 'substring', 'platform']
+
+
+def test_query_is_normalized(index):
+    assert index.search('  HADES ')[:2] == ['exact', 'prefix']
+
+
+def test_ties_keep_library_order():
+    index = SearchIndex([game('b', 'Alpha Beta'), game('a', 'Gamma Beta'), game('c', 'Beta')])
+    # 同一级别中名称短的在前，长度也相同时按添加顺序
+    assert index.search('beta') == ['c', 'b', 'a']
+    assert index.search('') == ['b', 'a', 'c']
+
+
+def test_search_within_previous_results(index):
+    previous = set(index.search('ha'))
+    assert index.search('hades', within=previous - {'exact'})[:2] == ['prefix', 'substring']
+
+
+def test_fuzzy_results_fill_up_few_hits():
+    index = SearchIndex([game('hk', 'Hollow Knight'), game('ce', 'Celeste')])
+    assert index.search('hollow knight') == ['hk']
+    # 拼错的查询没有子串匹配，按三元组重合度补充
+    assert index.search('holow knigth') == ['hk']
+    assert index.search('xyzzy') == []
+
+
+def test_no_fuzzy_results_when_enough_hits():
+    games = [game(f'g{i}', f'Space Game {i}') for i in range(SearchIndex.FUZZY_MIN_RESULTS)]
+    index = SearchIndex(games + [game('typo', 'Spaec Gmae')])
+    assert index.search('space game') == [f'g{i}' for i in range(SearchIndex.FUZZY_MIN_RESULTS)]
+
+    index.remove('g0')
+    # 子串匹配结果不足时才补充模糊匹配
+    assert 'typo' not in index.search('space game')
+    assert 'typo' in index.search('space gmae')
+
+
+def test_update_in_place(index):
+    index.update(game('other', 'Hades Remastered'))
+    assert 'other' not in index.search('celeste')
+    assert index.search('hades')[:3] == ['exact', 'prefix', 'other']
+    # 更新后保持原来的顺序
+    assert index.search('') == ['substring', 'platform', 'prefix', 'exact', 'other']
+
+
+def test_remove_cleans_postings(index):
+    for game_id in list(index.keys):
+        index.remove(game_id)
+    assert index.search('hades') == []
+    assert index.grams == {}
+    index.remove('missing')
+
+
+def test_pinyin_search():
+    pytest.importorskip('pypinyin')
+    index = SearchIndex([game('wukong', '黑神话：悟空'), game('latin', 'Hshift')])
+    assert index.search('heishenhua') == ['wukong']
+    assert index.search('悟空') == ['wukong']
+    # 英文名称前缀排在拼音首字母前缀之前
+    assert index.search('hsh') == ['latin', 'wukong']
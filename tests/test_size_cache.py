@@ -0,0 +1,116 @@
+"""
+目录大小缓存测试
+"""
+
+import json
+import os
+
+import pytest
+
+from size_cache import SizeCache
+
+
+@pytest.fixture
+def game_dir(tmp_path):
+    """game/a/b 下一个 100 字节的文件，game/c 为空目录"""
+    root = tmp_path / 'game'
+    (root / 'a' / 'b').mkdir(parents=True)
+    (root / 'c').mkdir()
+    (root / 'a' / 'b' / 'data.bin').write_bytes(b'x' * 100)
+    (root / 'readme.txt').write_bytes(b'x' * 10)
+    return root
+
+
+@pytest.fixture
+def cache_file(tmp_path):
+    return str(tmp_path / 'size_cache.json')
+
+
+def saved_entries(cache_file):
+    with open(cache_file, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_measure_counts_whole_tree(game_dir, cache_file):
+    cache = SizeCache(cache_file)
+    assert cache.measure(str(game_dir)) == (110, 2)
+    cache.save()
+    assert len(saved_entries(cache_file)['entries']) == 4
+    assert SizeCache(cache_file).measure(str(game_dir)) == (110, 2)
+
+
+def test_unchanged_directories_are_not_read_again(game_dir, cache_file, monkeypatch):
+    cache = SizeCache(cache_file)
+    cache.measure(str(game_dir))
+    cache.save()
+
+    cache = SizeCache(cache_file)
+    monkeypatch.setattr(cache, '_read_dir', lambda *args: pytest.fail("不应该重新读取目录"))
+    assert cache.measure(str(game_dir)) == (110, 2)
+
+
+def test_changed_mtime_rereads_only_that_directory(game_dir, cache_file):
+    cache = SizeCache(cache_file)
+    cache.measure(str(game_dir))
+    leaf = game_dir / 'a' / 'b'
+    # 原地修改文件不会改变目录的修改时间，缓存仍然返回旧结果
+    (leaf / 'data.bin').write_bytes(b'x' * 300)
+    mtime = os.stat(leaf).st_mtime_ns
+    os.utime(leaf, ns=(mtime, mtime))
+    assert cache.measure(str(game_dir)) == (110, 2)
+
+    # 目录修改时间变化后重新读取
+    os.utime(leaf, ns=(mtime + 10 ** 9, mtime + 10 ** 9))
+    assert cache.measure(str(game_dir)) == (310, 2)
+
+
+def test_refresh_ignores_cache(game_dir, cache_file):
+    cache = SizeCache(cache_file)
+    cache.measure(str(game_dir))
+    leaf = game_dir / 'a' / 'b'
+    mtime = os.stat(leaf).st_mtime_ns
+    (leaf / 'data.bin').write_bytes(b'x' * 300)
+    os.utime(leaf, ns=(mtime, mtime))
+    assert cache.measure(str(game_dir)) == (110, 2)
+    assert cache.measure(str(game_dir), refresh=True) == (310, 2)
+
+
+def test_prune_drops_deleted_subdirectories(game_dir, cache_file):
+    cache = SizeCache(cache_file)
+    cache.measure(str(game_dir))
+    (game_dir / 'a' / 'b' / 'data.bin').unlink()
+    (game_dir / 'a' / 'b').rmdir()
+    (game_dir / 'a').rmdir()
+    assert cache.measure(str(game_dir)) == (10, 1)
+    cache.save()
+    entries = saved_entries(cache_file)['entries']
+    assert sorted(os.path.basename(key) for key in entries) == ['c', 'game']
+
+
+def test_prune_drops_aged_roots(tmp_path, game_dir, cache_file):
+    other = tmp_path / 'other'
+    other.mkdir()
+    cache = SizeCache(cache_file)
+    cache.measure(str(game_dir))
+    cache.measure(str(other))
+    # game 目录很久没有统计过
+    cache.roots[cache._key(str(game_dir))] -= SizeCache.ROOT_MAX_AGE + 1
+    cache.save()
+
+    data = saved_entries(cache_file)
+    assert list(data['roots']) == [cache._key(str(other))]
+    assert list(data['entries']) == [cache._key(str(other))]
+
+
+def test_legacy_cache_without_roots_is_kept(game_dir, cache_file):
+    cache = SizeCache(cache_file)
+    cache.measure(str(game_dir))
+    cache.save()
+    data = saved_entries(cache_file)
+    with open(cache_file, 'w', encoding='utf-8') as f:
+        json.dump({'version': 1, 'entries': data['entries']}, f)
+
+    cache = SizeCache(cache_file)
+    cache.measure(str(game_dir / 'c'))
+    cache.save()
+    assert len(saved_entries(cache_file)['entries']) == 4
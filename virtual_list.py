@@ -0,0 +1,248 @@
+"""
+虚拟列表模块
+只为窗口中可见的行创建 Treeview 条目，滚动时复用这些行显示不同的数据
+"""
+
+import tkinter as tk
+from tkinter import ttk
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+class VirtualList(ttk.Frame):
+    """虚拟化的列表控件
+
+    数据是一组条目ID（例如游戏ID），每行的内容通过 row_values(条目ID) 获取。
+    Treeview 中只保留窗口能显示的行数再加少量预留行，滚动时只更新这些行的内容，
+    所以创建和刷新的开销只与窗口高度有关，与条目总数无关。
+
+    selectmode 为 'browse' 时单击选中一行，选中变化时调用 on_select；
+    为 'none' 时不处理选中，由使用者通过 item_at() 自行处理点击。
+    """
+
+    # 可见行之外额外创建的行数
+    OVERSCAN = 5
+    # 滚轮每格滚动的行数
+    WHEEL_ROWS = 3
+
+    def __init__(self, parent, columns: Sequence[str], row_values: Callable[[str], Tuple],
+                 style: Optional[str] = None, selectmode: str = 'browse',
+                 on_select: Optional[Callable[[], None]] = None):
+        super().__init__(parent)
+        self.row_values = row_values
+        self.selectmode = selectmode
+        self.on_select = on_select
+
+        self.items: List[str] = []
+        # 条目ID -> 在 items 中的位置
+        self._positions: Dict[str, int] = {}
+        self.offset = 0
+        self._selected: Optional[str] = None
+        self._pool: List[str] = []
+        self._row_height = 0
+        self._header_height = 0
+        self._measured = False
+        self._measure_retries = 10
+
+        tree_options = {'columns': columns, 'show': 'headings', 'selectmode': 'none'}
+        if style:
+            tree_options['style'] = style
+        # 选中状态由本控件管理，Treeview 自身的点击选中关闭，只用它的选中样式显示选中行
+        self.tree = ttk.Treeview(self, **tree_options)
+        self.style = style or 'Treeview'
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scrollbar)
+
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.tree.bind('<Configure>', lambda e: self._resize_pool())
+        self.tree.bind('<MouseWheel>', self._on_mousewheel)
+        self.tree.bind('<Button-4>', lambda e: self.scroll_rows(-self.WHEEL_ROWS))
+        self.tree.bind('<Button-5>', lambda e: self.scroll_rows(self.WHEEL_ROWS))
+        if selectmode != 'none':
+            self.tree.bind('<Button-1>', self._on_click)
+            self.tree.bind('<Up>', lambda e: self._move_selection(-1))
+            self.tree.bind('<Down>', lambda e: self._move_selection(1))
+            self.tree.bind('<Prior>', lambda e: self._move_selection(-self.visible_rows()))
+            self.tree.bind('<Next>', lambda e: self._move_selection(self.visible_rows()))
+
+    # ---- 与 Treeview 相同的列设置 ----
+
+    def heading(self, column: str, **options):
+        return self.tree.heading(column, **options)
+
+    def column(self, column: str, **options):
+        return self.tree.column(column, **options)
+
+    def identify_column(self, x: int) -> str:
+        return self.tree.identify_column(x)
+
+    def identify_region(self, x: int, y: int) -> str:
+        return self.tree.identify('region', x, y)
+
+    # ---- 数据 ----
+
+    def set_items(self, items: Iterable[str]):
+        """设置要显示的条目ID（按显示顺序）"""
+        self.items = list(items)
+        self._positions = {item: position for position, item in enumerate(self.items)}
+        if self._selected is not None and self._selected not in self._positions:
+            self._selected = None
+        self.offset = max(0, min(self.offset, len(self.items) - self.visible_rows()))
+        self.refresh()
+
+    def refresh(self):
+        """重新获取可见行的内容（条目数据变化后调用）"""
+        selected_rows = []
+        for index, row in enumerate(self._pool):
+            position = self.offset + index
+            if position < len(self.items):
+                item = self.items[position]
+                self.tree.item(row, values=self.row_values(item))
+                if item == self._selected:
+                    selected_rows.append(row)
+            else:
+                self.tree.item(row, values=())
+        self.tree.selection_set(selected_rows)
+        # 行数多于窗口时 Treeview 自己可能会滚动，始终保持在顶部
+        self.tree.yview_moveto(0)
+        self._update_scrollbar()
+
+    def refresh_items(self, items: Iterable[str]):
+        """只更新正在显示这些条目的行，耗时只与窗口中的行数有关"""
+        items = items if isinstance(items, (set, frozenset)) else set(items)
+        for index, row in enumerate(self._pool):
+            position = self.offset + index
+            if position < len(self.items) and self.items[position] in items:
+                self.tree.item(row, values=self.row_values(self.items[position]))
+
+    def position(self, item: str) -> Optional[int]:
+        """条目在列表中的位置，不在列表中时返回 None"""
+        return self._positions.get(item)
+
+    def item_at(self, y: int) -> Optional[str]:
+        """返回窗口中纵坐标 y 处的条目ID"""
+        row = self.tree.identify_row(y)
+        if not row:
+            return None
+        position = self.offset + self._pool.index(row)
+        return self.items[position] if position < len(self.items) else None
+
+    # ---- 选中 ----
+
+    def selection(self) -> Tuple[str, ...]:
+        """选中的条目ID"""
+        return (self._selected,) if self._selected is not None else ()
+
+    def selection_set(self, item: Optional[str]):
+        """选中指定条目（None 表示取消选中），并滚动到该条目"""
+        if item == self._selected:
+            return
+        self._selected = item
+        if item is not None:
+            self._scroll_into_view(item)
+        self.refresh()
+        if self.on_select:
+            self.on_select()
+
+    def see(self, item: str):
+        """滚动使条目可见"""
+        self._scroll_into_view(item)
+        self.refresh()
+
+    def _scroll_into_view(self, item: str):
+        position = self._positions.get(item)
+        if position is None:
+            return
+        visible = self.visible_rows()
+        if position < self.offset:
+            self.offset = position
+        elif position >= self.offset + visible:
+            self.offset = position - visible + 1
+
+    def _on_click(self, event):
+        self.tree.focus_set()
+        if self.identify_region(event.x, event.y) == 'cell':
+            item = self.item_at(event.y)
+            if item is not None:
+                self.selection_set(item)
+        return 'break'
+
+    def _move_selection(self, step: int):
+        if not self.items:
+            return 'break'
+        if self._selected is None:
+            position = 0
+        else:
+            position = self._positions[self._selected] + step
+        self.selection_set(self.items[max(0, min(position, len(self.items) - 1))])
+        return 'break'
+
+    # ---- 滚动 ----
+
+    def visible_rows(self) -> int:
+        """窗口中完整显示的行数"""
+        if not self._row_height:
+            return max(1, len(self._pool) - self.OVERSCAN)
+        height = self.tree.winfo_height() - self._header_height
+        return max(1, height // self._row_height)
+
+    def scroll_to(self, offset: int):
+        """滚动到第 offset 个条目显示在第一行"""
+        offset = max(0, min(offset, len(self.items) - self.visible_rows()))
+        if offset != self.offset:
+            self.offset = offset
+            self.refresh()
+
+    def scroll_rows(self, rows: int):
+        """向下（正数）或向上（负数）滚动若干行"""
+        self.scroll_to(self.offset + rows)
+        return 'break'
+
+    def _on_mousewheel(self, event):
+        return self.scroll_rows(-self.WHEEL_ROWS if event.delta > 0 else self.WHEEL_ROWS)
+
+    def _on_scrollbar(self, *args):
+        if args[0] == 'moveto':
+            self.scroll_to(int(float(args[1]) * len(self.items)))
+        elif args[0] == 'scroll':
+            amount = int(args[1])
+            self.scroll_rows(amount * self.visible_rows() if args[2] == 'pages' else amount)
+
+    def _update_scrollbar(self):
+        total = len(self.items)
+        if total == 0:
+            self.scrollbar.set(0, 1)
+            return
+        visible = self.visible_rows()
+        self.scrollbar.set(self.offset / total, min(1.0, (self.offset + visible) / total))
+
+    def _measure_rows(self):
+        """根据第一行的位置得到表头和行的高度；行还没有显示时先按样式中的行高估计"""
+        bbox = self.tree.bbox(self._pool[0]) if self._pool else ''
+        if bbox:
+            self._header_height, self._row_height = bbox[1], bbox[3]
+            self._measured = True
+        elif not self._row_height:
+            try:
+                self._row_height = int(ttk.Style().lookup(self.style, 'rowheight') or 20)
+            except (tk.TclError, ValueError):
+                self._row_height = 20
+            self._header_height = self._row_height
+
+    def _resize_pool(self):
+        """窗口大小变化后调整行池的大小"""
+        if not self._pool:
+            self._pool.append(self.tree.insert('', tk.END, values=()))
+        self._measure_rows()
+        if not self._measured and self._measure_retries > 0:
+            # 第一行显示出来后再按实际高度调整一次
+            self._measure_retries -= 1
+            self.after_idle(self._resize_pool)
+        wanted = self.visible_rows() + self.OVERSCAN
+        while len(self._pool) < wanted:
+            self._pool.append(self.tree.insert('', tk.END, values=()))
+        if len(self._pool) > wanted:
+            self.tree.delete(*self._pool[wanted:])
+            del self._pool[wanted:]
+        self.offset = max(0, min(self.offset, len(self.items) - self.visible_rows()))
+        self.refresh()